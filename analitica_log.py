@@ -0,0 +1,297 @@
+"""
+Analitica incremental del log de detecciones (jersey_log.csv)
+Una sola pasada en streaming con memoria constante por fila:
+- Detecciones y confianza promedio por numero
+- Histograma de confianza
+- Detecciones por intervalo de tiempo
+El estado (incluido el offset en bytes) se guarda en disco, de modo que cada
+reporte solo lee las filas nuevas.
+
+Uso:
+    python analitica_log.py
+    python analitica_log.py --log jersey_log.csv --cubeta-min 15 --json outputs/reporte_log.json
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from instrumentacion import logger
+
+
+RUTA_ESTADO = Path("./outputs/analitica_log.json")
+
+VERSION_ESTADO = 1
+
+
+class AnalizadorLog:
+    """Agregados del log CSV que se actualizan leyendo solo lo agregado desde la ultima vez"""
+
+    def __init__(
+        self,
+        ruta_log: Path = Path("./jersey_log.csv"),
+        ruta_estado: Optional[Path] = RUTA_ESTADO,
+        minutos_cubeta: int = 60,
+        bins_confianza: int = 10
+    ):
+        """
+        Args:
+            ruta_log: Log CSV de detecciones
+            ruta_estado: Archivo JSON del estado persistido (None = solo en memoria)
+            minutos_cubeta: Ancho de las cubetas de tiempo (1440 = por dia)
+            bins_confianza: Intervalos del histograma de confianza en [0, 1]
+        """
+        self.ruta_log = Path(ruta_log)
+        self.ruta_estado = Path(ruta_estado) if ruta_estado is not None else None
+        self.minutos_cubeta = minutos_cubeta
+        self.bins_confianza = bins_confianza
+        self._lock = threading.Lock()
+
+        self.estado = self._cargar_estado()
+
+    def actualizar(self) -> int:
+        """
+        Procesa las filas agregadas al log desde la ultima llamada
+
+        Returns:
+            Filas nuevas procesadas
+        """
+        with self._lock:
+            try:
+                info = os.stat(self.ruta_log)
+            except FileNotFoundError:
+                return 0
+
+            estado = self.estado
+            if info.st_ino != estado['inodo'] or info.st_size < estado['offset']:
+                # Log rotado o truncado: se recalcula desde el principio
+                logger.info("Log reemplazado, se reinician los agregados", extra={'datos': {'log': str(self.ruta_log)}})
+                estado = self.estado = self._estado_vacio()
+                estado['inodo'] = info.st_ino
+
+            if info.st_size == estado['offset']:
+                return 0
+
+            nuevas = self._procesar_desde(estado)
+            self._guardar_estado()
+            return nuevas
+
+    def reporte(self, limite_cubetas: Optional[int] = None) -> Dict:
+        """Agregados actuales (no lee el log; llamar antes a actualizar)"""
+        with self._lock:
+            estado = self.estado
+            por_numero = sorted(
+                (
+                    {
+                        'numero': numero,
+                        'detecciones': n,
+                        'confianza_promedio': round(suma / n, 3) if n else 0.0
+                    }
+                    for numero, (n, suma) in estado['numeros'].items()
+                ),
+                key=lambda fila: (-fila['detecciones'], fila['numero'])
+            )
+
+            ancho = 1.0 / self.bins_confianza
+            histograma = [
+                {
+                    'desde': round(i * ancho, 3),
+                    'hasta': round((i + 1) * ancho, 3),
+                    'detecciones': n
+                }
+                for i, n in enumerate(estado['histograma'])
+            ]
+
+            cubetas = sorted(estado['cubetas'].items())
+            if limite_cubetas is not None:
+                cubetas = cubetas[-limite_cubetas:]
+
+            return {
+                'log': str(self.ruta_log),
+                'filas': estado['filas'],
+                'filas_invalidas': estado['invalidas'],
+                'offset_bytes': estado['offset'],
+                'minutos_cubeta': self.minutos_cubeta,
+                'por_numero': por_numero,
+                'histograma_confianza': histograma,
+                'por_tiempo': [{'cubeta': clave, 'detecciones': n} for clave, n in cubetas]
+            }
+
+    def reiniciar(self):
+        """Descarta los agregados; el proximo actualizar relee todo el log"""
+        with self._lock:
+            self.estado = self._estado_vacio()
+            self._guardar_estado()
+
+    def _procesar_desde(self, estado: Dict) -> int:
+        """Lee lineas completas desde el offset guardado y actualiza los agregados"""
+        numeros = estado['numeros']
+        histograma = estado['histograma']
+        cubetas = estado['cubetas']
+        bins = self.bins_confianza
+        nuevas = 0
+        invalidas = 0
+        offset = estado['offset']
+
+        with open(self.ruta_log, 'rb') as f:
+            f.seek(offset)
+            for linea in f:
+                # Una linea sin salto final puede estar a medio escribir
+                if not linea.endswith(b'\n'):
+                    break
+                offset += len(linea)
+
+                if b'"' in linea:
+                    campos = next(csv.reader(io.StringIO(linea.decode('utf-8'))), [])
+                else:
+                    campos = linea.decode('utf-8').rstrip('\r\n').split(',')
+
+                if len(campos) < 3 or campos[0] == 'Timestamp':
+                    continue
+                try:
+                    confianza = float(campos[2])
+                except ValueError:
+                    invalidas += 1
+                    continue
+
+                timestamp, numero = campos[0], campos[1]
+
+                acumulado = numeros.get(numero)
+                if acumulado is None:
+                    numeros[numero] = [1, confianza]
+                else:
+                    acumulado[0] += 1
+                    acumulado[1] += confianza
+
+                histograma[min(max(int(confianza * bins), 0), bins - 1)] += 1
+
+                clave = self._clave_cubeta(timestamp)
+                if clave is not None:
+                    cubetas[clave] = cubetas.get(clave, 0) + 1
+
+                nuevas += 1
+
+        estado['offset'] = offset
+        estado['filas'] += nuevas
+        estado['invalidas'] += invalidas
+        return nuevas
+
+    def _clave_cubeta(self, timestamp: str) -> Optional[str]:
+        """'YYYY-MM-DD HH:MM:SS' -> inicio de su cubeta ('YYYY-MM-DD HH:MM' o 'YYYY-MM-DD')"""
+        if len(timestamp) < 16:
+            return None
+        if self.minutos_cubeta >= 1440:
+            return timestamp[:10]
+        try:
+            minutos = int(timestamp[11:13]) * 60 + int(timestamp[14:16])
+        except ValueError:
+            return None
+        inicio = minutos - minutos % self.minutos_cubeta
+        return f"{timestamp[:10]} {inicio // 60:02d}:{inicio % 60:02d}"
+
+    def _estado_vacio(self) -> Dict:
+        return {
+            'version': VERSION_ESTADO,
+            'log': str(self.ruta_log.resolve()),
+            'minutos_cubeta': self.minutos_cubeta,
+            'bins_confianza': self.bins_confianza,
+            'inodo': None,
+            'offset': 0,
+            'filas': 0,
+            'invalidas': 0,
+            'numeros': {},
+            'histograma': [0] * self.bins_confianza,
+            'cubetas': {}
+        }
+
+    def _cargar_estado(self) -> Dict:
+        """Estado persistido si corresponde a este log y configuracion; si no, vacio"""
+        if self.ruta_estado is None or not self.ruta_estado.exists():
+            return self._estado_vacio()
+
+        try:
+            estado = json.loads(self.ruta_estado.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return self._estado_vacio()
+
+        compatible = (
+            estado.get('version') == VERSION_ESTADO
+            and estado.get('log') == str(self.ruta_log.resolve())
+            and estado.get('minutos_cubeta') == self.minutos_cubeta
+            and estado.get('bins_confianza') == self.bins_confianza
+        )
+        return estado if compatible else self._estado_vacio()
+
+    def _guardar_estado(self):
+        """Escritura atomica: archivo temporal + rename"""
+        if self.ruta_estado is None:
+            return
+
+        self.ruta_estado.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.ruta_estado.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f)
+        os.replace(tmp, self.ruta_estado)
+
+
+def formatear_reporte(reporte: Dict, limite_numeros: int = 20) -> List[str]:
+    """Lineas de texto del reporte para la consola"""
+    lineas = [
+        f"Log: {reporte['log']}",
+        f"Filas: {reporte['filas']} (invalidas: {reporte['filas_invalidas']})",
+        "",
+        "DETECCIONES POR NUMERO",
+    ]
+    for fila in reporte['por_numero'][:limite_numeros]:
+        lineas.append(f"  {fila['numero']:>6}  {fila['detecciones']:>10}  conf={fila['confianza_promedio']:.3f}")
+
+    lineas += ["", "HISTOGRAMA DE CONFIANZA"]
+    maximo = max((b['detecciones'] for b in reporte['histograma_confianza']), default=0) or 1
+    for b in reporte['histograma_confianza']:
+        barra = '#' * round(40 * b['detecciones'] / maximo)
+        lineas.append(f"  {b['desde']:.1f}-{b['hasta']:.1f}  {b['detecciones']:>10}  {barra}")
+
+    lineas += ["", f"DETECCIONES POR CUBETA DE {reporte['minutos_cubeta']} MIN"]
+    for c in reporte['por_tiempo']:
+        lineas.append(f"  {c['cubeta']:<16}  {c['detecciones']:>10}")
+
+    return lineas
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Reporte incremental del log de detecciones")
+    parser.add_argument('--log', type=Path, default=Path('./jersey_log.csv'))
+    parser.add_argument('--estado', type=Path, default=RUTA_ESTADO,
+                        help="Estado persistido entre ejecuciones")
+    parser.add_argument('--cubeta-min', type=int, default=60, help="Minutos por cubeta de tiempo")
+    parser.add_argument('--bins', type=int, default=10, help="Intervalos del histograma de confianza")
+    parser.add_argument('--cubetas', type=int, default=24, help="Cubetas mas recientes a mostrar")
+    parser.add_argument('--reiniciar', action='store_true', help="Recalcular desde el principio del log")
+    parser.add_argument('--json', type=Path, default=None, help="Guardar el reporte completo en JSON")
+    args = parser.parse_args()
+
+    analizador = AnalizadorLog(args.log, args.estado, args.cubeta_min, args.bins)
+    if args.reiniciar:
+        analizador.reiniciar()
+
+    nuevas = analizador.actualizar()
+    print(f"[INFO] {nuevas} filas nuevas procesadas")
+
+    reporte = analizador.reporte()
+    print("\n".join(formatear_reporte(dict(reporte, por_tiempo=reporte['por_tiempo'][-args.cubetas:]))))
+
+    if args.json is not None:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(reporte, indent=2), encoding='utf-8')
+        print(f"\nReporte: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Lector indexado del JSONL de anotaciones de Roboflow (_annotations.*.jsonl)
+- Una sola pasada de parseo por registro: URLs de imagen y respuesta del asistente
+- Indice de offsets en bytes persistido junto al archivo (se reconstruye si
+  el archivo cambia de tamano o fecha)
+- Acceso aleatorio, muestreo estratificado por numero y fragmentos por trabajador
+- Usa orjson si esta instalado
+
+Uso:
+    python anotaciones.py ../basketball-jersey-numbers-ocr.v7i.openai/_annotations.train.jsonl
+    python anotaciones.py anotaciones.jsonl --por-numero 5 --fragmento 0/4
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from arranque import importar_perezoso
+from instrumentacion import logger
+
+
+VERSION_INDICE = 1
+
+_CARGAR_JSON = None
+
+
+class Anotacion(NamedTuple):
+    """Una imagen del dataset con su etiqueta"""
+    indice: int
+    url: str
+    numero: Optional[str]
+
+
+def cargar_json(datos: bytes):
+    """json.loads sobre bytes; usa orjson si esta disponible"""
+    global _CARGAR_JSON
+    if _CARGAR_JSON is None:
+        try:
+            _CARGAR_JSON = importar_perezoso('orjson').loads
+        except ImportError:
+            _CARGAR_JSON = json.loads
+    return _CARGAR_JSON(datos)
+
+
+def extraer_imagenes(registro: Dict) -> tuple:
+    """
+    (urls, numero) de un registro en un solo recorrido de los mensajes
+
+    El numero es el contenido del primer mensaje del asistente (None si no hay).
+    """
+    urls = []
+    numero = None
+    hay_respuesta = False
+
+    for msg in registro.get('messages', []):
+        contenido = msg.get('content')
+        if not hay_respuesta and msg.get('role') == 'assistant':
+            numero = msg.get('content', 'unknown')
+            hay_respuesta = True
+        if isinstance(contenido, list):
+            for item in contenido:
+                if item.get('type') == 'image_url':
+                    urls.append(item['image_url']['url'])
+
+    return urls, numero
+
+
+class LectorAnotaciones:
+    """
+    Indice de las imagenes de un JSONL de anotaciones
+
+    Cada entrada es una imagen: (offset del registro, longitud, url, numero).
+    El indice se construye una vez y se guarda en `<archivo>.idx.json`; las
+    consultas (muestreo, fragmentos, URLs y etiquetas) no vuelven a parsear el JSONL.
+    """
+
+    def __init__(self, ruta: Path, ruta_indice: Optional[Path] = None, persistir: bool = True):
+        """
+        Args:
+            ruta: Archivo JSONL de anotaciones
+            ruta_indice: Archivo del indice (por defecto junto al JSONL)
+            persistir: Guardar y reutilizar el indice en disco
+        """
+        self.ruta = Path(ruta)
+        self.ruta_indice = Path(ruta_indice) if ruta_indice is not None else \
+            self.ruta.with_name(self.ruta.name + '.idx.json')
+        self.persistir = persistir
+
+        self._indice = self._cargar_indice() if persistir else None
+        if self._indice is None:
+            self._indice = self._construir_indice()
+            if persistir:
+                self._guardar_indice()
+
+        self.offsets: List[int] = self._indice['offsets']
+        self.longitudes: List[int] = self._indice['longitudes']
+        self.urls: List[str] = self._indice['urls']
+        self.numeros: List[Optional[str]] = self._indice['numeros']
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __getitem__(self, indice: int) -> Anotacion:
+        if indice < 0:
+            indice += len(self)
+        return Anotacion(indice, self.urls[indice], self.numeros[indice])
+
+    def __iter__(self) -> Iterator[Anotacion]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def anotaciones(self, indices: Sequence[int]) -> List[Anotacion]:
+        return [self[i] for i in indices]
+
+    def registro(self, indice: int) -> Dict:
+        """Registro JSON completo de una entrada (lee solo su linea)"""
+        return self.registros([indice])[0]
+
+    def registros(self, indices: Sequence[int]) -> List[Dict]:
+        """Registros completos, leidos en orden de offset con un solo archivo abierto"""
+        resultado = {}
+        with open(self.ruta, 'rb') as f:
+            for i in sorted(set(indices), key=lambda i: self.offsets[i]):
+                f.seek(self.offsets[i])
+                resultado[i] = cargar_json(f.read(self.longitudes[i]))
+        return [resultado[i] for i in indices]
+
+    def conteo_por_numero(self) -> Counter:
+        return Counter(self.numeros)
+
+    def muestreo_estratificado(
+        self,
+        por_numero: int,
+        semilla: int = 0,
+        numeros: Optional[Sequence[str]] = None
+    ) -> List[int]:
+        """
+        Hasta `por_numero` entradas al azar de cada numero (reproducible con `semilla`)
+
+        Returns:
+            Indices ordenados (lectura secuencial del archivo)
+        """
+        grupos: Dict[Optional[str], List[int]] = {}
+        for i, numero in enumerate(self.numeros):
+            grupos.setdefault(numero, []).append(i)
+
+        if numeros is not None:
+            grupos = {n: grupos.get(n, []) for n in numeros}
+
+        generador = random.Random(semilla)
+        seleccion = []
+        for numero in sorted(grupos, key=str):
+            indices = grupos[numero]
+            seleccion.extend(indices if len(indices) <= por_numero else generador.sample(indices, por_numero))
+        return sorted(seleccion)
+
+    def fragmento(
+        self,
+        trabajador: int,
+        trabajadores: int,
+        indices: Optional[Sequence[int]] = None
+    ) -> List[int]:
+        """
+        Parte contigua de las entradas (o de `indices`) que le toca a un trabajador
+
+        Los fragmentos de 0..trabajadores-1 cubren todo sin solaparse y difieren
+        en tamano a lo sumo en 1.
+        """
+        if not 0 <= trabajador < trabajadores:
+            raise ValueError(f"Trabajador {trabajador} fuera de rango (0..{trabajadores - 1})")
+
+        indices = list(range(len(self))) if indices is None else list(indices)
+        base, resto = divmod(len(indices), trabajadores)
+        inicio = trabajador * base + min(trabajador, resto)
+        fin = inicio + base + (1 if trabajador < resto else 0)
+        return indices[inicio:fin]
+
+    def _construir_indice(self) -> Dict:
+        """Una pasada sobre el JSONL parseando cada registro una sola vez"""
+        offsets, longitudes, urls, numeros = [], [], [], []
+        invalidas = 0
+
+        with open(self.ruta, 'rb') as f:
+            offset = 0
+            for linea in f:
+                longitud = len(linea)
+                if linea.strip():
+                    try:
+                        registro = cargar_json(linea)
+                    except ValueError:
+                        invalidas += 1
+                    else:
+                        urls_registro, numero = extraer_imagenes(registro)
+                        for url in urls_registro:
+                            offsets.append(offset)
+                            longitudes.append(longitud)
+                            urls.append(url)
+                            numeros.append(numero)
+                offset += longitud
+
+        if invalidas:
+            logger.warning("Lineas invalidas en el JSONL", extra={'datos': {'archivo': str(self.ruta), 'lineas': invalidas}})
+
+        info = os.stat(self.ruta)
+        return {
+            'version': VERSION_INDICE,
+            'tamano': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+            'offsets': offsets,
+            'longitudes': longitudes,
+            'urls': urls,
+            'numeros': numeros
+        }
+
+    def _cargar_indice(self) -> Optional[Dict]:
+        """Indice persistido si corresponde a la version actual del JSONL"""
+        if not self.ruta_indice.exists():
+            return None
+
+        try:
+            indice = json.loads(self.ruta_indice.read_text(encoding='utf-8'))
+            info = os.stat(self.ruta)
+        except (OSError, ValueError):
+            return None
+
+        vigente = (
+            indice.get('version') == VERSION_INDICE
+            and indice.get('tamano') == info.st_size
+            and indice.get('mtime_ns') == info.st_mtime_ns
+        )
+        return indice if vigente else None
+
+    def _guardar_indice(self):
+        """Escritura atomica: archivo temporal + rename (sin indice si el directorio es de solo lectura)"""
+        try:
+            self.ruta_indice.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.ruta_indice.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._indice, f)
+            os.replace(tmp, self.ruta_indice)
+        except OSError as e:
+            logger.warning("No se pudo guardar el indice", extra={'datos': {'indice': str(self.ruta_indice), 'error': str(e)}})
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Indice y muestreo del JSONL de anotaciones")
+    parser.add_argument('jsonl', type=Path, help="Archivo _annotations.*.jsonl")
+    parser.add_argument('--por-numero', type=int, default=None, help="Muestreo estratificado: imagenes por numero")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--fragmento', default=None, help="Parte para un trabajador, ej. 0/4")
+    parser.add_argument('--listar', type=int, default=10, help="Entradas a mostrar")
+    args = parser.parse_args()
+
+    lector = LectorAnotaciones(args.jsonl)
+    print(f"Imagenes indexadas: {len(lector)} (indice: {lector.ruta_indice})")
+
+    conteo = lector.conteo_por_numero()
+    print(f"Numeros distintos: {len(conteo)}")
+    for numero, n in conteo.most_common(10):
+        print(f"  {str(numero):>6}  {n:>8}")
+
+    indices = None
+    if args.por_numero is not None:
+        indices = lector.muestreo_estratificado(args.por_numero, args.semilla)
+    if args.fragmento is not None:
+        trabajador, trabajadores = (int(p) for p in args.fragmento.split('/'))
+        indices = lector.fragmento(trabajador, trabajadores, indices)
+
+    if indices is None:
+        indices = range(len(lector))
+    print(f"\nSeleccion: {len(indices)} imagenes")
+    for anotacion in lector.anotaciones(list(indices)[:args.listar]):
+        print(f"  [{anotacion.indice}] {anotacion.numero}  {anotacion.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Utilidades de arranque rapido
+- Importacion perezosa de modulos pesados con medicion de tiempos
+- Verificacion de dependencias por metadatos, cacheada contra una huella del entorno
+- Reporte de tiempos de arranque para seguimiento de regresiones
+"""
+
+import hashlib
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import site
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Tiempo de importacion (s) de cada modulo cargado con importar_perezoso
+TIEMPOS_IMPORTACION: Dict[str, float] = {}
+
+# Duracion (s) de cada fase de arranque registrada con registrar_fase
+TIEMPOS_FASES: Dict[str, float] = {}
+
+ARCHIVO_CACHE_DEPENDENCIAS = Path("./outputs/.cache_dependencias.json")
+
+# Modulos ya importados por completo (sys.modules tambien contiene modulos a medio
+# inicializar mientras otro hilo los importa)
+_MODULOS: Dict[str, object] = {}
+_LOCK_IMPORTACION = threading.RLock()
+
+
+def importar_perezoso(nombre: str):
+    """Importa un modulo solo cuando se necesita y registra cuanto tardo (seguro entre hilos)"""
+    modulo = _MODULOS.get(nombre)
+    if modulo is not None:
+        return modulo
+
+    with _LOCK_IMPORTACION:
+        modulo = _MODULOS.get(nombre)
+        if modulo is None:
+            ya_cargado = nombre in sys.modules
+            inicio = time.perf_counter()
+            modulo = importlib.import_module(nombre)
+            if not ya_cargado:
+                TIEMPOS_IMPORTACION[nombre] = time.perf_counter() - inicio
+            _MODULOS[nombre] = modulo
+    return modulo
+
+
+class registrar_fase:
+    """Context manager que mide la duracion de una fase de arranque"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        TIEMPOS_FASES[self.nombre] = time.perf_counter() - self._inicio
+        return False
+
+
+def huella_entorno() -> str:
+    """
+    Huella del entorno de Python: interprete, version y mtime de site-packages
+
+    Instalar o desinstalar un paquete modifica el directorio site-packages,
+    por lo que la huella cambia y el cache de dependencias se invalida.
+    """
+    partes = [sys.executable, sys.version]
+
+    directorios = list(getattr(site, 'getsitepackages', lambda: [])())
+    usuario = getattr(site, 'getusersitepackages', lambda: None)()
+    if usuario:
+        directorios.append(usuario)
+
+    for directorio in sorted(set(directorios)):
+        try:
+            partes.append(f"{directorio}:{os.stat(directorio).st_mtime_ns}")
+        except OSError:
+            partes.append(f"{directorio}:-")
+
+    return hashlib.sha1("|".join(partes).encode()).hexdigest()
+
+
+def _version_instalada(modulo: str, distribuciones: List[str]) -> Optional[str]:
+    """Version instalada segun metadatos, sin importar el modulo"""
+    for distribucion in distribuciones:
+        try:
+            return importlib.metadata.version(distribucion)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+
+    # Modulos sin metadatos con el mismo nombre: basta con que se puedan localizar
+    if importlib.util.find_spec(modulo) is not None:
+        return "desconocida"
+    return None
+
+
+def verificar_dependencias(
+    paquetes: Dict[str, List[str]],
+    archivo_cache: Path = ARCHIVO_CACHE_DEPENDENCIAS
+) -> Dict[str, Optional[str]]:
+    """
+    Retorna {modulo: version o None si falta}, usando el cache si el entorno no cambio
+
+    Args:
+        paquetes: {modulo: [nombres de distribucion candidatos]}
+        archivo_cache: Archivo JSON donde se guarda el resultado
+    """
+    huella = huella_entorno()
+    clave = hashlib.sha1(json.dumps(paquetes, sort_keys=True).encode()).hexdigest()
+
+    try:
+        cache = json.loads(archivo_cache.read_text(encoding='utf-8'))
+        if cache.get('huella') == huella and cache.get('clave') == clave:
+            return cache['versiones']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    versiones = {
+        modulo: _version_instalada(modulo, distribuciones)
+        for modulo, distribuciones in paquetes.items()
+    }
+
+    # Solo se cachea un entorno completo: si falta algo se vuelve a verificar tras instalar
+    if all(versiones.values()):
+        try:
+            archivo_cache.parent.mkdir(parents=True, exist_ok=True)
+            archivo_cache.write_text(
+                json.dumps({'huella': huella, 'clave': clave, 'versiones': versiones}),
+                encoding='utf-8'
+            )
+        except OSError:
+            pass
+
+    return versiones
+
+
+def reporte_arranque(ruta_json: Optional[Path] = None) -> Dict:
+    """
+    Imprime (y opcionalmente guarda en JSON) los tiempos de importacion y de fases
+
+    Para el detalle completo de importaciones tambien se puede ejecutar
+    `python -X importtime basketball_jersey_analyzer.py`.
+    """
+    reporte = {
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': sys.version.split()[0],
+        'importaciones_s': {k: round(v, 4) for k, v in TIEMPOS_IMPORTACION.items()},
+        'fases_s': {k: round(v, 4) for k, v in TIEMPOS_FASES.items()},
+        'total_fases_s': round(sum(TIEMPOS_FASES.values()), 4)
+    }
+
+    print("=" * 60)
+    print("REPORTE DE ARRANQUE")
+    print("=" * 60)
+    for modulo, segundos in sorted(TIEMPOS_IMPORTACION.items(), key=lambda x: -x[1]):
+        print(f"  import {modulo:<20} {segundos * 1000:9.1f} ms")
+    for fase, segundos in TIEMPOS_FASES.items():
+        print(f"  fase   {fase:<20} {segundos * 1000:9.1f} ms")
+    print(f"  total fases {reporte['total_fases_s'] * 1000:22.1f} ms")
+    print("=" * 60)
+
+    if ruta_json is not None:
+        ruta_json.parent.mkdir(parents=True, exist_ok=True)
+        ruta_json.write_text(json.dumps(reporte, indent=2), encoding='utf-8')
+
+    return reporte
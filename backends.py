@@ -0,0 +1,387 @@
+"""
+Backends de inferencia intercambiables para JerseyAnalyzer
+- BackendRoboflow: modelo de Roboflow `inference` (comportamiento original)
+- BackendOnnxRuntime: pesos ONNX ejecutados en CPU con ONNX Runtime
+- BackendSintetico: respuestas deterministas con latencia configurable (benchmarks)
+
+Todos exponen infer(imagen | lista, confidence) con la misma forma de respuesta
+que los modelos YOLO de `inference` (objeto con `.predictions`).
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from arranque import importar_perezoso
+from cache_modelo import CacheArtefactosModelo
+
+
+@dataclass
+class Prediccion:
+    """Prediccion individual (mismos campos que las predicciones YOLO de inference)"""
+    class_name: str
+    confidence: float
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+@dataclass
+class RespuestaDeteccion:
+    """Respuesta de deteccion de un backend local"""
+    predictions: List[Prediccion] = field(default_factory=list)
+
+
+class BackendInferencia:
+    """Interfaz comun de los backends de inferencia"""
+
+    #: Identificador del modelo (se usa en la clave del cache de resultados)
+    model_id: str = ""
+
+    #: True si infer() admite llamadas concurrentes desde varios hilos
+    seguro_entre_hilos: bool = False
+
+    def cargar(self):
+        """Prepara el backend para inferir (descarga, sesion, etc.)"""
+
+    def infer(self, imagenes: Union[np.ndarray, List[np.ndarray]], confidence: float = 0.4):
+        """
+        Ejecuta el modelo
+
+        Args:
+            imagenes: Imagen RGB o lista de imagenes RGB
+            confidence: Umbral minimo de confianza
+
+        Returns:
+            Una respuesta si se paso una imagen, o lista de respuestas en el mismo orden
+        """
+        raise NotImplementedError
+
+
+class BackendRoboflow(BackendInferencia):
+    """Modelo de Roboflow `inference` (GPU o CPU segun la instalacion)"""
+
+    def __init__(
+        self,
+        model_id: str = "basketball-jersey-numbers-ocr/7",
+        api_key: Optional[str] = None,
+        cache_modelo: Optional[CacheArtefactosModelo] = None
+    ):
+        """
+        Args:
+            model_id: ID del modelo en formato workspace/project/version
+            api_key: Roboflow API key (None si los artefactos estan en cache)
+            cache_modelo: Cache de artefactos del modelo (por defecto outputs/model_cache)
+        """
+        self.model_id = model_id
+        self.api_key = api_key
+        self.cache_modelo = cache_modelo if cache_modelo is not None else CacheArtefactosModelo()
+        self.modelo = None
+
+    def cargar(self):
+        # Debe configurarse antes de importar inference
+        self.cache_modelo.configurar_entorno()
+        en_cache = self.cache_modelo.verificar_integridad(self.model_id)
+
+        if not en_cache and not self.api_key:
+            raise RuntimeError(
+                f"Modelo {self.model_id} no esta en el cache local "
+                f"({self.cache_modelo.directorio}) y no se proporciono API key"
+            )
+
+        from inference import get_model
+
+        # Inicializar modelo con API key (solo descarga, no consume creditos).
+        # Con artefactos verificados en cache se carga sin red ni API key.
+        self.modelo = get_model(
+            model_id=self.model_id,
+            api_key=None if en_cache else self.api_key
+        )
+
+        if en_cache:
+            print(f"[OK] Modelo cargado desde cache local (offline)")
+        else:
+            self.cache_modelo.registrar_manifiesto(self.model_id)
+            print(f"[OK] Modelo cargado en GPU local")
+
+    def infer(self, imagenes, confidence: float = 0.4):
+        return self.modelo.infer(imagenes, confidence=confidence)
+
+
+class BackendOnnxRuntime(BackendInferencia):
+    """
+    Detector YOLOv8 exportado a ONNX ejecutado en CPU con ONNX Runtime
+
+    Las imagenes se llevan a `tam_entrada` con letterbox y las cajas se
+    devuelven en coordenadas de la imagen original.
+    """
+
+    # InferenceSession.run es seguro entre hilos
+    seguro_entre_hilos = True
+
+    def __init__(
+        self,
+        ruta_modelo: Path,
+        nombres_clases: Sequence[str],
+        tam_entrada: int = 640,
+        hilos_intra: int = 0,
+        hilos_inter: int = 0,
+        umbral_nms: float = 0.45
+    ):
+        """
+        Args:
+            ruta_modelo: Archivo .onnx
+            nombres_clases: Nombre de cada clase en orden de indice
+            tam_entrada: Lado de la entrada cuadrada del modelo
+            hilos_intra: Hilos dentro de cada operador (0 = decide ONNX Runtime)
+            hilos_inter: Hilos entre operadores (0 = decide ONNX Runtime; >1 activa modo paralelo)
+            umbral_nms: IoU de supresion de no maximos
+        """
+        self.ruta_modelo = Path(ruta_modelo)
+        self.nombres_clases = list(nombres_clases)
+        self.tam_entrada = tam_entrada
+        self.hilos_intra = hilos_intra
+        self.hilos_inter = hilos_inter
+        self.umbral_nms = umbral_nms
+        self.model_id = f"onnx:{self.ruta_modelo.name}"
+        self.sesion = None
+
+    @classmethod
+    def desde_cache_roboflow(
+        cls,
+        model_id: str = "basketball-jersey-numbers-ocr/7",
+        cache_modelo: Optional[CacheArtefactosModelo] = None,
+        **opciones
+    ) -> 'BackendOnnxRuntime':
+        """Construye el backend con los artefactos que Roboflow ya descargo al cache local"""
+        cache_modelo = cache_modelo if cache_modelo is not None else CacheArtefactosModelo()
+        directorio = cache_modelo.directorio_modelo(model_id)
+
+        entorno = json.loads((directorio / "environment.json").read_text(encoding='utf-8'))
+        mapa = entorno.get('CLASS_MAP', {})
+        nombres = [mapa[k] for k in sorted(mapa, key=int)]
+
+        backend = cls(directorio / "weights.onnx", nombres, **opciones)
+        backend.model_id = model_id
+        return backend
+
+    def cargar(self):
+        ort = importar_perezoso('onnxruntime')
+
+        opciones = ort.SessionOptions()
+        opciones.intra_op_num_threads = self.hilos_intra
+        opciones.inter_op_num_threads = self.hilos_inter
+        if self.hilos_inter > 1:
+            opciones.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.sesion = ort.InferenceSession(
+            str(self.ruta_modelo),
+            sess_options=opciones,
+            providers=['CPUExecutionProvider']
+        )
+        entrada = self.sesion.get_inputs()[0]
+        self._nombre_entrada = entrada.name
+        # Modelos exportados con batch fijo = 1 se ejecutan imagen por imagen
+        self._batch_dinamico = not isinstance(entrada.shape[0], int) or entrada.shape[0] != 1
+
+        print(f"[OK] Modelo ONNX cargado en CPU: {self.ruta_modelo} "
+              f"(intra={self.hilos_intra}, inter={self.hilos_inter})")
+
+    def infer(self, imagenes, confidence: float = 0.4):
+        individual = isinstance(imagenes, np.ndarray)
+        lista = [imagenes] if individual else list(imagenes)
+
+        entradas = [self._letterbox(imagen) for imagen in lista]
+        tensores = np.stack([tensor for tensor, _ in entradas])
+
+        if self._batch_dinamico:
+            salidas = self.sesion.run(None, {self._nombre_entrada: tensores})[0]
+        else:
+            salidas = np.concatenate([
+                self.sesion.run(None, {self._nombre_entrada: tensores[i:i + 1]})[0]
+                for i in range(len(lista))
+            ])
+
+        respuestas = [
+            self._postprocesar(salida, transformacion, confidence)
+            for salida, (_, transformacion) in zip(salidas, entradas)
+        ]
+        return respuestas[0] if individual else respuestas
+
+    def _letterbox(self, imagen: np.ndarray):
+        """
+        Redimensiona conservando aspecto y rellena a tam_entrada x tam_entrada (NCHW float32)
+
+        Si el Preprocesador ya llevo la imagen a tam_entrada (lado mayor igual a
+        tam_entrada, o letterbox completo) no se vuelve a redimensionar: solo se
+        rellena, o se usa tal cual.
+        """
+        h, w = imagen.shape[:2]
+        escala = min(self.tam_entrada / h, self.tam_entrada / w)
+        nh, nw = int(round(h * escala)), int(round(w * escala))
+        pad_y, pad_x = (self.tam_entrada - nh) // 2, (self.tam_entrada - nw) // 2
+
+        if (nh, nw) == (h, w):
+            escala = 1.0
+            escalada = imagen
+        else:
+            cv2 = importar_perezoso('cv2')
+            escalada = cv2.resize(imagen, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+        if nh == nw == self.tam_entrada:
+            lienzo = escalada
+        else:
+            lienzo = np.full((self.tam_entrada, self.tam_entrada, 3), 114, dtype=np.uint8)
+            lienzo[pad_y:pad_y + nh, pad_x:pad_x + nw] = escalada
+
+        tensor = lienzo.transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, (escala, pad_x, pad_y)
+
+    def _postprocesar(self, salida: np.ndarray, transformacion, confidence: float) -> RespuestaDeteccion:
+        """Salida YOLOv8 (4 + clases, N) -> predicciones en coordenadas originales"""
+        cv2 = importar_perezoso('cv2')
+        escala, pad_x, pad_y = transformacion
+
+        salida = salida.T
+        puntajes = salida[:, 4:]
+        clases = puntajes.argmax(axis=1)
+        confianzas = puntajes[np.arange(len(clases)), clases]
+
+        mascara = confianzas >= confidence
+        cajas, clases, confianzas = salida[mascara, :4], clases[mascara], confianzas[mascara]
+        if len(cajas) == 0:
+            return RespuestaDeteccion()
+
+        # Centro/tamano en el espacio letterbox -> espacio original
+        cajas = cajas.copy()
+        cajas[:, 0] = (cajas[:, 0] - pad_x) / escala
+        cajas[:, 1] = (cajas[:, 1] - pad_y) / escala
+        cajas[:, 2:4] /= escala
+
+        esquinas = np.column_stack([
+            cajas[:, 0] - cajas[:, 2] / 2,
+            cajas[:, 1] - cajas[:, 3] / 2,
+            cajas[:, 2],
+            cajas[:, 3]
+        ])
+        # NMS por clase desplazando las cajas de cada clase
+        desplazadas = esquinas.copy()
+        desplazadas[:, :2] += clases[:, None] * 4096
+        indices = cv2.dnn.NMSBoxes(
+            desplazadas.tolist(), confianzas.tolist(), confidence, self.umbral_nms
+        )
+
+        return RespuestaDeteccion([
+            Prediccion(
+                class_name=self.nombres_clases[int(clases[i])],
+                confidence=float(confianzas[i]),
+                x=float(cajas[i, 0]),
+                y=float(cajas[i, 1]),
+                width=float(cajas[i, 2]),
+                height=float(cajas[i, 3])
+            )
+            for i in np.array(indices).reshape(-1)
+        ])
+
+
+class BackendSintetico(BackendInferencia):
+    """
+    Backend determinista sin modelo real, para medir el resto del pipeline
+
+    Las predicciones dependen solo del contenido de la imagen, y cada llamada
+    tarda `latencia_s` + `latencia_por_imagen_s` * imagenes.
+    """
+
+    seguro_entre_hilos = True
+
+    def __init__(
+        self,
+        latencia_s: float = 0.0,
+        latencia_por_imagen_s: float = 0.0,
+        detecciones_por_imagen: int = 1
+    ):
+        """
+        Args:
+            latencia_s: Latencia fija por llamada a infer
+            latencia_por_imagen_s: Latencia adicional por imagen del lote
+            detecciones_por_imagen: Predicciones generadas por imagen
+        """
+        self.latencia_s = latencia_s
+        self.latencia_por_imagen_s = latencia_por_imagen_s
+        self.detecciones_por_imagen = detecciones_por_imagen
+        self.model_id = "sintetico"
+
+    def infer(self, imagenes, confidence: float = 0.4):
+        individual = isinstance(imagenes, np.ndarray)
+        lista = [imagenes] if individual else list(imagenes)
+
+        espera = self.latencia_s + self.latencia_por_imagen_s * len(lista)
+        if espera > 0:
+            time.sleep(espera)
+
+        respuestas = [self._predecir(imagen, confidence) for imagen in lista]
+        return respuestas[0] if individual else respuestas
+
+    def _predecir(self, imagen: np.ndarray, confidence: float) -> RespuestaDeteccion:
+        h, w = imagen.shape[:2]
+        # Semilla derivada de una muestra de pixeles: determinista y barata
+        muestra = np.ascontiguousarray(imagen[::max(1, h // 16), ::max(1, w // 16)])
+        semilla = int.from_bytes(hashlib.blake2b(muestra.tobytes(), digest_size=8).digest(), 'little')
+        rng = np.random.default_rng(semilla)
+
+        # Todos los valores se sortean antes de filtrar: las predicciones no dependen
+        # del umbral, y refiltrar una inferencia a umbral bajo da el mismo resultado
+        predicciones = []
+        for _ in range(self.detecciones_por_imagen):
+            confianza = round(float(rng.uniform(0.1, 1.0)), 3)
+            ancho, alto = float(rng.uniform(0.1, 0.4) * w), float(rng.uniform(0.1, 0.4) * h)
+            prediccion = Prediccion(
+                class_name=str(int(rng.integers(0, 100))),
+                confidence=confianza,
+                x=float(rng.uniform(ancho / 2, w - ancho / 2)),
+                y=float(rng.uniform(alto / 2, h - alto / 2)),
+                width=ancho,
+                height=alto
+            )
+            if confianza >= confidence:
+                predicciones.append(prediccion)
+
+        return RespuestaDeteccion(predicciones)
+
+
+def agregar_argumentos_backend(parser):
+    """Agrega a un argparse.ArgumentParser las opciones de seleccion de backend"""
+    grupo = parser.add_argument_group("backend de inferencia")
+    grupo.add_argument('--backend', choices=['roboflow', 'onnx', 'sintetico'], default='roboflow')
+    grupo.add_argument('--onnx-modelo', type=Path, default=None,
+                       help="Archivo .onnx (por defecto los pesos de Roboflow en el cache local)")
+    grupo.add_argument('--onnx-clases', type=Path, default=None,
+                       help="Archivo de texto con un nombre de clase por linea")
+    grupo.add_argument('--hilos-intra', type=int, default=0, help="Hilos intra-op de ONNX Runtime")
+    grupo.add_argument('--hilos-inter', type=int, default=0, help="Hilos inter-op de ONNX Runtime")
+    grupo.add_argument('--latencia-sintetica', type=float, default=0.0,
+                       help="Latencia por llamada del backend sintetico (s)")
+
+
+def backend_desde_argumentos(args) -> Optional[BackendInferencia]:
+    """Construye el backend elegido en la linea de comandos (None = Roboflow por defecto)"""
+    if args.backend == 'sintetico':
+        return BackendSintetico(latencia_s=args.latencia_sintetica)
+
+    if args.backend == 'onnx':
+        opciones = {'hilos_intra': args.hilos_intra, 'hilos_inter': args.hilos_inter}
+        if args.onnx_modelo is None:
+            return BackendOnnxRuntime.desde_cache_roboflow(args.model_id, **opciones)
+        if args.onnx_clases is None:
+            raise ValueError("--onnx-clases es obligatorio junto con --onnx-modelo")
+        nombres = args.onnx_clases.read_text(encoding='utf-8').split()
+        return BackendOnnxRuntime(args.onnx_modelo, nombres, **opciones)
+
+    return None
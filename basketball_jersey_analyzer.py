@@ -4,19 +4,38 @@ Modelo: basketball-jersey-numbers-ocr/7
 Entorno: PyCharm + Google Colab GPU T4
 """
 
+import importlib.util
 import os
 import sys
-import csv
-import re
+import subprocess
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 
-import torch
-import cv2
-import gradio as gr
 import numpy as np
-from PIL import Image
+
+# torch, cv2, gradio y PIL se importan de forma perezosa (ver arranque.importar_perezoso)
+from analitica_log import AnalizadorLog
+from arranque import importar_perezoso, registrar_fase, reporte_arranque, verificar_dependencias
+from backends import BackendInferencia, BackendOnnxRuntime, BackendRoboflow, BackendSintetico
+from cache_modelo import CacheArtefactosModelo
+from cache_inferencia import CacheInferencia, clave_cache, huella_imagen
+from detecciones import COLUMNAS, Detecciones
+from exportacion import exportar_filas, filas_detecciones
+from historial_sqlite import HistorialSQLite
+from instrumentacion import MedidorEtapas, configurar_logging
+from normalizacion import normalizar_respuesta
+from preprocesamiento import Preprocesador, a_arreglo_rgb
+from registro_detecciones import RegistroCSVAsincrono
+from renderizador import RenderizadorDetecciones
+
+
+# Umbral con el que se ejecuta el modelo (minimo del slider de la interfaz).
+# El umbral del usuario se aplica despues filtrando las predicciones crudas,
+# asi un cambio de umbral no requiere repetir la inferencia.
+CONFIANZA_INFERENCIA = 0.1
 
 
 def verificar_gpu():
@@ -25,6 +44,19 @@ def verificar_gpu():
     print("VERIFICACION DE GPU")
     print("=" * 60)
 
+    # Sin torch instalado (backends onnx o sintetico en CPU) no hay nada que verificar
+    if importlib.util.find_spec('torch') is None:
+        print("torch no esta instalado: no se puede usar la GPU")
+        print("=" * 60)
+        return False
+
+    try:
+        torch = importar_perezoso('torch')
+    except ImportError as e:
+        print(f"No se pudo importar torch: {e}")
+        print("=" * 60)
+        return False
+
     if torch.cuda.is_available():
         print(f"GPU disponible: {torch.cuda.get_device_name(0)}")
         print(f"CUDA version: {torch.version.cuda}")
@@ -41,67 +73,147 @@ def verificar_gpu():
 
 
 def instalar_dependencias():
-    """Instala dependencias necesarias si no están presentes"""
+    """
+    Instala dependencias necesarias si no están presentes
+
+    La verificacion usa metadatos de los paquetes (no los importa) y se cachea
+    contra la huella del entorno, por lo que en arranques repetidos no cuesta nada.
+    """
     paquetes = {
         'inference': 'inference[gpu]',
         'supervision': 'supervision',
         'gradio': 'gradio',
         'roboflow': 'roboflow'
     }
+    distribuciones = {
+        'inference': ['inference', 'inference-gpu'],
+        'supervision': ['supervision'],
+        'gradio': ['gradio'],
+        'roboflow': ['roboflow']
+    }
+
+    versiones = verificar_dependencias(distribuciones)
 
     for modulo, paquete in paquetes.items():
-        try:
-            __import__(modulo)
-            print(f"[OK] {modulo} ya instalado")
-        except ImportError:
+        if versiones.get(modulo):
+            print(f"[OK] {modulo} ya instalado ({versiones[modulo]})")
+        else:
             print(f"[INSTALANDO] {paquete}...")
-            os.system(f"{sys.executable} -m pip install -q {paquete}")
+            subprocess.run([sys.executable, '-m', 'pip', 'install', '-q', paquete], check=False)
             print(f"[OK] {paquete} instalado")
 
 
 class JerseyAnalyzer:
     """Analizador de numeros de camisetas de baloncesto con inferencia local"""
 
-    def __init__(self, api_key: str, model_id: str = "basketball-jersey-numbers-ocr/7"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_id: str = "basketball-jersey-numbers-ocr/7",
+        cache: Optional[CacheInferencia] = None,
+        cache_modelo: Optional[CacheArtefactosModelo] = None,
+        calentamiento: int = 1,
+        backend: Optional[BackendInferencia] = None,
+        renderizador: Optional[RenderizadorDetecciones] = None,
+        preprocesador: Optional[Preprocesador] = None,
+        historial: Optional[HistorialSQLite] = None,
+        escribir_csv: bool = True
+    ):
         """
         Inicializa el analizador con inferencia local en GPU
 
         Args:
-            api_key: Roboflow API key (solo para descargar modelo)
+            api_key: Roboflow API key (solo para descargar modelo). Puede ser None
+                si los artefactos ya estan en el cache local y pasan la verificacion
             model_id: ID del modelo en formato workspace/project/version
+            cache: Cache de resultados de inferencia (por defecto LRU en memoria;
+                usar CacheInferencia(dir_disco=Path("./outputs/cache_inferencia"))
+                para agregar el nivel en disco)
+            cache_modelo: Cache de artefactos del modelo (por defecto outputs/model_cache)
+            calentamiento: Inferencias de prueba antes de quedar listo (0 = ninguna)
+            backend: Backend de inferencia (por defecto BackendRoboflow con model_id y api_key)
+            renderizador: Renderizador de anotaciones (RenderizadorDetecciones(desactivado=True)
+                omite el dibujo en ejecuciones sin salida visual)
+            preprocesador: Preparacion de imagenes antes del modelo (por defecto reduce
+                el lado mayor a 640 px, o al tam_entrada del backend si lo define;
+                Preprocesador(modo='ninguno') envia la imagen original)
+            historial: Historial SQLite que recibe las mismas filas que jersey_log.csv (opcional)
+            escribir_csv: False deja de escribir jersey_log.csv y registra solo en el historial
         """
+        if backend is None:
+            backend = BackendRoboflow(model_id=model_id, api_key=api_key, cache_modelo=cache_modelo)
+
         self.api_key = api_key
-        self.model_id = model_id
+        self.backend = backend
+        self.model_id = backend.model_id
         self.model = None
+        self.cache = cache if cache is not None else CacheInferencia()
+        self.renderizador = renderizador if renderizador is not None else RenderizadorDetecciones()
+        if preprocesador is None:
+            # Backends con entrada fija (ONNX) reciben la imagen ya a su tamano: un solo resize
+            preprocesador = Preprocesador(getattr(backend, 'tam_entrada', 640))
+        self.preprocesador = preprocesador
+        # El resultado depende del modelo y de la preparacion de la imagen
+        self._id_cache = f"{self.model_id}|{self.preprocesador.firma}"
+        self.medidor = MedidorEtapas()
+        self._anotadores_sv = None
+        # Serializa model.infer cuando el backend no admite llamadas concurrentes
+        self._lock_modelo = None if backend.seguro_entre_hilos else threading.Lock()
+        self.calentamiento = calentamiento
+        self.listo = False
+        self.tiempos_arranque = {'carga_s': 0.0, 'calentamiento_s': 0.0}
         self.output_dir = Path("./outputs/detections")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.csv_log = Path("./jersey_log.csv")
 
-        # Inicializar CSV si no existe
-        if not self.csv_log.exists():
-            with open(self.csv_log, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Timestamp', 'Numero Detectado', 'Confianza', 'Archivo'])
+        if not escribir_csv and historial is None:
+            raise ValueError("escribir_csv=False requiere un historial donde registrar las detecciones")
+
+        # Log CSV con escritura en segundo plano (crea el archivo si no existe)
+        self.historial = historial
+        self.registro = RegistroCSVAsincrono(self.csv_log, historial=historial, escribir_csv=escribir_csv)
 
+        inicio = time.perf_counter()
         self._cargar_modelo()
+        self.tiempos_arranque['carga_s'] = round(time.perf_counter() - inicio, 3)
+
+        self.calentar(self.calentamiento)
+        self.listo = True
 
     def _cargar_modelo(self):
-        """Carga el modelo para inferencia local en GPU"""
+        """Carga el modelo del backend para inferencia local"""
         try:
-            print(f"\nCargando modelo {self.model_id} para inferencia local...")
-            from inference import get_model
-
-            # Inicializar modelo con API key (solo descarga, no consume creditos)
-            self.model = get_model(
-                model_id=self.model_id,
-                api_key=self.api_key
-            )
-            print(f"[OK] Modelo cargado en GPU local")
+            print(f"\nCargando modelo {self.model_id} ({type(self.backend).__name__})...")
+            self.backend.cargar()
+            self.model = self.backend
 
         except Exception as e:
             print(f"[ERROR] Error al cargar modelo: {e}")
             raise
 
+    def calentar(self, iteraciones: int = 1, tamano: Tuple[int, int] = (640, 640)):
+        """
+        Ejecuta inferencias de prueba para pagar la inicializacion perezosa antes de servir
+
+        Llama directamente a model.infer (sin cache) para que cada iteracion use el modelo.
+
+        Args:
+            iteraciones: Numero de inferencias de prueba
+            tamano: (alto, ancho) de la imagen de prueba
+        """
+        if iteraciones <= 0:
+            return
+
+        imagen = np.zeros((tamano[0], tamano[1], 3), dtype=np.uint8)
+
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            self.model.infer(imagen, confidence=CONFIANZA_INFERENCIA)
+        self.tiempos_arranque['calentamiento_s'] = round(time.perf_counter() - inicio, 3)
+
+        print(f"[OK] Calentamiento: {iteraciones} inferencias en "
+              f"{self.tiempos_arranque['calentamiento_s']:.3f} s")
+
     def detectar_numeros(
         self,
         imagen: np.ndarray,
@@ -122,144 +234,265 @@ class JerseyAnalyzer:
             raise RuntimeError("Modelo no inicializado")
 
         # Inferencia local (NO consume creditos de API)
-        resultado = self.model.infer(imagen, confidence=confianza_min)
-
-        # Manejar si resultado es lista
-        if isinstance(resultado, list):
-            resultado = resultado[0]
-
-        # Detectar tipo de respuesta
-        tipo_respuesta = type(resultado).__name__
-        print(f"[DEBUG] Tipo de respuesta: {tipo_respuesta}")
-
-        detecciones = []
-
-        # CASO 1: Respuesta VLM (LMMInferenceResponse)
-        if hasattr(resultado, 'response'):
-            print("[INFO] Detectado modelo VLM")
-            texto_respuesta = str(getattr(resultado, 'response', ''))
-            print(f"[INFO] Respuesta del modelo: {texto_respuesta}")
-
-            # Extraer numero del texto usando regex
-            import re
-            numeros = re.findall(r'\b\d+\b', texto_respuesta)
-
-            if numeros:
-                numero_detectado = numeros[0]
-                print(f"[OK] Numero extraido: {numero_detectado}")
-
-                # Crear deteccion con bbox centrado
-                h, w = imagen.shape[:2]
-                detecciones.append({
-                    'numero': numero_detectado,
-                    'confianza': 0.95,  # VLM tiene alta confianza
-                    'bbox': {
-                        'x': w // 2,
-                        'y': h // 2,
-                        'width': int(w * 0.6),
-                        'height': int(h * 0.6)
-                    }
-                })
-            else:
-                print("[ADVERTENCIA] No se pudo extraer numero del texto")
-
-        # CASO 2: Respuesta YOLO estandar
-        elif hasattr(resultado, 'predictions'):
-            print("[INFO] Detectado modelo YOLO")
-            for pred in resultado.predictions:
-                detecciones.append({
-                    'numero': pred.class_name,
-                    'confianza': round(pred.confidence, 3),
-                    'bbox': {
-                        'x': int(pred.x),
-                        'y': int(pred.y),
-                        'width': int(pred.width),
-                        'height': int(pred.height)
-                    }
-                })
-
-        # CASO 3: Tipo desconocido - debug
-        else:
-            print(f"[ERROR] Tipo de respuesta desconocido: {tipo_respuesta}")
-            print(f"[DEBUG] Atributos: {dir(resultado)}")
+        resultado = self._inferir([imagen], min(confianza_min, CONFIANZA_INFERENCIA))[0]
+        detecciones_crudas = self._procesar_respuesta(resultado, imagen)
 
-        # Visualizar detecciones
-        if detecciones:
-            imagen_anotada = self._visualizar_detecciones_opencv(imagen, detecciones)
-        else:
-            imagen_anotada = imagen.copy()
+        imagen_anotada, detecciones = self.filtrar_y_anotar(imagen, detecciones_crudas, confianza_min)
+        return imagen_anotada, detecciones.a_dicts()
+
+    def inferir_crudo(self, imagen: np.ndarray, huella: Optional[str] = None) -> Detecciones:
+        """
+        Ejecuta el modelo con el umbral minimo (CONFIANZA_INFERENCIA) sin anotar ni registrar
+
+        Las detecciones retornadas se pueden refiltrar con filtrar_y_anotar
+        para cualquier umbral >= CONFIANZA_INFERENCIA sin volver a inferir.
+
+        Args:
+            imagen: Imagen en formato numpy array (RGB)
+            huella: Hash de la imagen si ya se calculo (ver huella_imagen)
+        """
+        huellas = [huella] if huella is not None else None
+        return self.inferir_crudo_lote([imagen], huellas)[0]
+
+    def inferir_crudo_lote(
+        self,
+        imagenes: List[np.ndarray],
+        huellas: Optional[List[str]] = None
+    ) -> List[Detecciones]:
+        """
+        Version por lotes de inferir_crudo: una sola llamada al modelo para todas las imagenes
+
+        Args:
+            imagenes: Lista de imagenes RGB
+            huellas: Hashes de las imagenes si ya se calcularon (mismo orden)
+        """
+        if self.model is None:
+            raise RuntimeError("Modelo no inicializado")
+
+        resultados = self._inferir(imagenes, CONFIANZA_INFERENCIA, huellas)
+        return [
+            self._procesar_respuesta(resultado, imagen)
+            for resultado, imagen in zip(resultados, imagenes)
+        ]
+
+    @staticmethod
+    def filtrar_detecciones(
+        detecciones: Union[Detecciones, List[Dict]],
+        confianza_min: float
+    ) -> Detecciones:
+        """Retorna las detecciones con confianza >= confianza_min (filtrado vectorizado)"""
+        if not isinstance(detecciones, Detecciones):
+            detecciones = Detecciones.desde_dicts(detecciones)
+        return detecciones.filtrar(confianza_min)
+
+    def filtrar_y_anotar(
+        self,
+        imagen: np.ndarray,
+        detecciones_crudas: Detecciones,
+        confianza_min: float,
+        registrar: bool = True
+    ) -> Tuple[np.ndarray, Detecciones]:
+        """
+        Aplica el umbral a detecciones ya inferidas y dibuja el resultado
+
+        Args:
+            imagen: Imagen original (RGB)
+            detecciones_crudas: Detecciones de inferir_crudo
+            confianza_min: Umbral minimo de confianza (0.0-1.0)
+            registrar: Si True, agrega las detecciones filtradas al log CSV
+
+        Returns:
+            Tupla de (imagen_anotada, detecciones filtradas)
+        """
+        detecciones = self.filtrar_detecciones(detecciones_crudas, confianza_min)
+        imagen_anotada = self._anotar(imagen, detecciones)
 
         # Guardar en log CSV
-        self._guardar_en_log(detecciones)
+        if registrar:
+            self._guardar_en_log(detecciones)
 
         return imagen_anotada, detecciones
 
-    def _visualizar_detecciones_opencv(self, imagen: np.ndarray, detecciones: List[Dict]) -> np.ndarray:
+    def detectar_numeros_lote(
+        self,
+        imagenes: List[np.ndarray],
+        confianza_min: float = 0.4,
+        tamano_lote: int = 8
+    ) -> List[Tuple[np.ndarray, List[Dict]]]:
         """
-        Dibuja bounding boxes con OpenCV (compatible con VLM y YOLO)
+        Detecta numeros en una lista de imagenes enviandolas al modelo por lotes
+
+        Args:
+            imagenes: Lista de imagenes en formato numpy array (RGB)
+            confianza_min: Umbral minimo de confianza (0.0-1.0)
+            tamano_lote: Numero maximo de imagenes por llamada a model.infer
+
+        Returns:
+            Lista de tuplas (imagen_anotada, lista_detecciones) en el orden de entrada
         """
-        import cv2
+        detecciones_por_imagen = self.inferir_lote(imagenes, confianza_min, tamano_lote)
 
-        img = imagen.copy()
+        resultados = [
+            (self._anotar(imagen, detecciones), detecciones.a_dicts())
+            for imagen, detecciones in zip(imagenes, detecciones_por_imagen)
+        ]
 
-        for det in detecciones:
-            bbox = det['bbox']
-            numero = det['numero']
-            conf = det['confianza']
+        # Una sola escritura al log CSV por llamada
+        self._guardar_en_log(Detecciones.concatenar(detecciones_por_imagen))
 
-            # Calcular coordenadas del rectangulo
-            x1 = int(bbox['x'] - bbox['width'] / 2)
-            y1 = int(bbox['y'] - bbox['height'] / 2)
-            x2 = int(bbox['x'] + bbox['width'] / 2)
-            y2 = int(bbox['y'] + bbox['height'] / 2)
+        return resultados
 
-            # Asegurar que coordenadas esten dentro de la imagen
-            h, w = img.shape[:2]
-            x1, x2 = max(0, x1), min(w, x2)
-            y1, y2 = max(0, y1), min(h, y2)
+    def inferir_lote(
+        self,
+        imagenes: List[np.ndarray],
+        confianza_min: float = 0.4,
+        tamano_lote: int = 8
+    ) -> List[Detecciones]:
+        """
+        Ejecuta solo la inferencia por lotes (sin anotar ni escribir log)
 
-            # Dibujar bounding box verde
-            cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 3)
+        Args:
+            imagenes: Lista de imagenes en formato numpy array (RGB)
+            confianza_min: Umbral minimo de confianza (0.0-1.0)
+            tamano_lote: Numero maximo de imagenes por llamada a model.infer
+
+        Returns:
+            Lista de detecciones por imagen, en el orden de entrada
+        """
+        if self.model is None:
+            raise RuntimeError("Modelo no inicializado")
+        if tamano_lote < 1:
+            raise ValueError("tamano_lote debe ser mayor o igual a 1")
+
+        detecciones_por_imagen = []
+
+        for inicio in range(0, len(imagenes), tamano_lote):
+            lote = imagenes[inicio:inicio + tamano_lote]
+
+            respuestas = self._inferir(lote, min(confianza_min, CONFIANZA_INFERENCIA))
+
+            for imagen, resultado in zip(lote, respuestas):
+                detecciones_por_imagen.append(self.filtrar_detecciones(
+                    self._procesar_respuesta(resultado, imagen),
+                    confianza_min
+                ))
 
-            # Preparar etiqueta
-            label = f"{numero} ({conf:.2f})"
+        return detecciones_por_imagen
 
-            # Calcular tamaño del texto
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 1.2
-            thickness = 2
-            (text_w, text_h), _ = cv2.getTextSize(label, font, font_scale, thickness)
+    def _inferir(
+        self,
+        imagenes: List[np.ndarray],
+        confianza: float,
+        huellas: Optional[List[str]] = None
+    ) -> List:
+        """
+        Ejecuta model.infer consultando primero el cache de resultados
+
+        Solo las imagenes sin acierto en cache se envian al modelo, en una sola llamada.
+        """
+        with self.medidor.etapa('cache'):
+            if huellas is None:
+                huellas = [huella_imagen(imagen) for imagen in imagenes]
+            claves = [clave_cache(huella, self._id_cache, confianza) for huella in huellas]
+            respuestas = [self.cache.obtener(clave) for clave in claves]
+            pendientes = [i for i, respuesta in enumerate(respuestas) if respuesta is None]
+
+        if pendientes:
+            # Las respuestas quedan en coordenadas de la imagen preparada;
+            # _parsear_respuesta las lleva a la imagen original
+            with self.medidor.etapa('preprocesamiento'):
+                preparadas = [
+                    self.preprocesador.preparar(imagenes[i], indice=k)[0]
+                    for k, i in enumerate(pendientes)
+                ]
+
+            with self.medidor.etapa('inferencia'):
+                entrada = preparadas[0] if len(preparadas) == 1 else preparadas
+
+                if self._lock_modelo is None:
+                    nuevas = self.model.infer(entrada, confidence=confianza)
+                else:
+                    with self._lock_modelo:
+                        nuevas = self.model.infer(entrada, confidence=confianza)
+
+            if not isinstance(nuevas, list):
+                nuevas = [nuevas]
+
+            if len(nuevas) != len(pendientes):
+                raise RuntimeError(
+                    f"El modelo retorno {len(nuevas)} respuestas para un lote de {len(pendientes)} imagenes"
+                )
 
-            # Dibujar fondo para el texto
-            cv2.rectangle(img, (x1, y1 - text_h - 10), (x1 + text_w, y1), (0, 255, 0), -1)
+            for i, respuesta in zip(pendientes, nuevas):
+                self.cache.guardar(claves[i], respuesta)
+                respuestas[i] = respuesta
 
-            # Dibujar texto
-            cv2.putText(img, label, (x1, y1 - 5),
-                       font, font_scale, (0, 0, 0), thickness)
+        return respuestas
 
-        return img
+    def _procesar_respuesta(self, resultado, imagen: np.ndarray) -> Detecciones:
+        """Convierte una respuesta del modelo en detecciones (etapa 'parseo')"""
+        with self.medidor.etapa('parseo'):
+            return self._parsear_respuesta(resultado, imagen)
+
+    def _parsear_respuesta(self, resultado, imagen: np.ndarray) -> Detecciones:
+        """
+        Convierte una respuesta del modelo (VLM o YOLO) en detecciones compactas
+
+        Las cajas YOLO vuelven a coordenadas de la imagen original; una respuesta
+        VLM produce una deteccion centrada por cada numero del texto.
+        """
+        h, w = imagen.shape[:2]
+        return normalizar_respuesta(resultado, h, w, self.preprocesador.transformacion(h, w))
+
+    def _anotar(
+        self,
+        imagen: np.ndarray,
+        detecciones: Union[Detecciones, List[Dict]],
+        en_sitio: Optional[bool] = None
+    ) -> np.ndarray:
+        """
+        Retorna la imagen con las detecciones dibujadas
+
+        Por defecto trabaja sobre una copia; con en_sitio=True dibuja sobre la imagen
+        recibida (el llamador debe ser su dueno). Si el renderizador esta desactivado
+        retorna la imagen sin cambios.
+        """
+        with self.medidor.etapa('anotacion'):
+            return self.renderizador.dibujar(imagen, detecciones, en_sitio=en_sitio)
+
+    def _visualizar_detecciones_opencv(
+        self,
+        imagen: np.ndarray,
+        detecciones: Union[Detecciones, List[Dict]]
+    ) -> np.ndarray:
+        """
+        Dibuja bounding boxes con OpenCV (compatible con VLM y YOLO)
+        """
+        return self.renderizador.dibujar(imagen, detecciones, en_sitio=False)
 
     def _visualizar_detecciones(self, imagen: np.ndarray, resultados) -> np.ndarray:
         """Dibuja bounding boxes y etiquetas con supervision (DEPRECATED - usar _visualizar_detecciones_opencv)"""
         try:
             import supervision as sv
-            from inference import InferenceResponseObject
 
             # Convertir resultados a formato supervision
             detections = sv.Detections.from_inference(resultados)
 
-            # Configurar anotadores
-            box_annotator = sv.BoxAnnotator(
-                thickness=3,
-                color=sv.Color.from_hex("#00FF00")
-            )
-
-            label_annotator = sv.LabelAnnotator(
-                text_scale=1.2,
-                text_thickness=2,
-                text_color=sv.Color.WHITE,
-                color=sv.Color.from_hex("#00FF00")
-            )
+            # Configurar anotadores (una sola vez por analizador)
+            if self._anotadores_sv is None:
+                self._anotadores_sv = (
+                    sv.BoxAnnotator(
+                        thickness=3,
+                        color=sv.Color.from_hex("#00FF00")
+                    ),
+                    sv.LabelAnnotator(
+                        text_scale=1.2,
+                        text_thickness=2,
+                        text_color=sv.Color.WHITE,
+                        color=sv.Color.from_hex("#00FF00")
+                    )
+                )
+            box_annotator, label_annotator = self._anotadores_sv
 
             # Generar etiquetas con clase y confianza
             labels = [
@@ -284,73 +517,90 @@ class JerseyAnalyzer:
             print(f"[ADVERTENCIA] Error en visualizacion: {e}")
             return imagen
 
-    def _guardar_en_log(self, detecciones: List[Dict]):
-        """Añade detecciones al archivo CSV de log"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        with open(self.csv_log, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            for det in detecciones:
-                writer.writerow([
-                    timestamp,
-                    det['numero'],
-                    det['confianza'],
-                    'gradio_upload'
-                ])
-
-    def calcular_estadisticas(self, detecciones: List[Dict]) -> Dict:
-        """Calcula estadisticas de las detecciones"""
+    def _guardar_en_log(self, detecciones: Union[Detecciones, List[Dict]], fuente: str = 'gradio_upload'):
+        """Encola las detecciones para el archivo CSV de log (escritura en segundo plano)"""
         if not detecciones:
-            return {
-                'total': 0,
-                'confianza_promedio': 0.0,
-                'confianza_max': 0.0,
-                'confianza_min': 0.0
-            }
-
-        confianzas = [d['confianza'] for d in detecciones]
-
-        return {
-            'total': len(detecciones),
-            'confianza_promedio': round(np.mean(confianzas), 3),
-            'confianza_max': round(max(confianzas), 3),
-            'confianza_min': round(min(confianzas), 3)
-        }
+            return
+        if not isinstance(detecciones, Detecciones):
+            detecciones = Detecciones.desde_dicts(detecciones)
+
+        with self.medidor.etapa('registro'):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            self.registro.agregar([
+                [timestamp, numero, confianza, fuente]
+                for numero, confianza, *_ in detecciones.filas()
+            ])
+
+    def metricas_etapas(self) -> Dict[str, Dict]:
+        """Percentiles rodantes (ms) de cada etapa: cache, inferencia, parseo, anotacion, registro..."""
+        return self.medidor.resumen()
+
+    def exportar_metricas_prometheus(self, ruta: Path = Path("./outputs/metricas.prom")) -> Path:
+        """Escribe las metricas por etapa en formato de texto de Prometheus"""
+        return self.medidor.exportar_prometheus(ruta)
+
+    def cerrar(self):
+        """Libera recursos del analizador y vacia el log pendiente"""
+        self.registro.cerrar()
+        if self.historial is not None:
+            self.historial.cerrar()
+
+    def calcular_estadisticas(self, detecciones: Union[Detecciones, List[Dict]]) -> Dict:
+        """Calcula estadisticas de las detecciones (vectorizado sobre las columnas)"""
+        if not isinstance(detecciones, Detecciones):
+            detecciones = Detecciones.desde_dicts(detecciones)
+        return detecciones.estadisticas()
+
+    def exportar_detecciones(
+        self,
+        detecciones: Union[Detecciones, Iterable[Dict]],
+        filename: str = None,
+        formato: str = 'csv'
+    ) -> str:
+        """
+        Exporta detecciones con columnas planas (numero, confianza, x, y, width, height)
 
-    def exportar_csv(self, detecciones: List[Dict], filename: str = None) -> str:
-        """Exporta detecciones actuales a CSV"""
+        Args:
+            detecciones: Detecciones, lista o iterador de diccionarios (se consume en streaming)
+            filename: Nombre del archivo en output_dir (por defecto con timestamp)
+            formato: csv, jsonl, parquet o arrow (estos dos requieren pyarrow)
+        """
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"detecciones_{timestamp}.csv"
+            # Microsegundos: exportaciones simultaneas de varias sesiones no se pisan
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filename = f"detecciones_{timestamp}.{formato}"
 
         filepath = self.output_dir / filename
-
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['numero', 'confianza', 'bbox'])
-            writer.writeheader()
-            writer.writerows(detecciones)
+        exportar_filas(filas_detecciones(detecciones), filepath, formato=formato)
 
         return str(filepath)
 
-
-def crear_interfaz_gradio(analyzer: JerseyAnalyzer):
-    """Crea interfaz Gradio profesional con todas las funcionalidades"""
-
-    def analizar_imagen(imagen, confianza_min):
-        """Procesa imagen y retorna resultados"""
-        if imagen is None:
-            return None, "No se cargo ninguna imagen", None
-
-        # Convertir a numpy array RGB
-        if isinstance(imagen, Image.Image):
-            imagen = np.array(imagen)
-
-        # Detectar numeros
-        imagen_anotada, detecciones = analyzer.detectar_numeros(
-            imagen,
-            confianza_min=confianza_min
-        )
-
+    def exportar_csv(self, detecciones: Union[Detecciones, Iterable[Dict]], filename: str = None) -> str:
+        """Exporta detecciones actuales a CSV"""
+        return self.exportar_detecciones(detecciones, filename, formato='csv')
+
+
+def crear_interfaz_gradio(
+    analyzer: JerseyAnalyzer,
+    concurrencia: int = 1,
+    lote_max: int = 1,
+    max_cola: Optional[int] = None
+):
+    """
+    Crea interfaz Gradio profesional con todas las funcionalidades
+
+    Args:
+        analyzer: Analizador compartido por todas las sesiones
+        concurrencia: Eventos de analisis ejecutados a la vez (default_concurrency_limit)
+        lote_max: > 1 activa el modo por lotes de Gradio: las solicitudes que
+            llegan juntas se agrupan en una sola llamada al modelo
+        max_cola: Solicitudes en espera antes de rechazar nuevas (None = sin limite)
+    """
+    gr = importar_perezoso('gradio')
+
+    def formatear_resultados(imagen_anotada, detecciones):
+        """Construye las salidas de la interfaz a partir de las detecciones"""
         # Calcular estadisticas
         stats = analyzer.calcular_estadisticas(detecciones)
 
@@ -365,15 +615,102 @@ ESTADISTICAS DE DETECCION:
 
         # Formatear tabla de detecciones
         tabla_detecciones = [
-            [d['numero'], f"{d['confianza']:.3f}"]
-            for d in detecciones
+            [numero, f"{confianza:.3f}"]
+            for numero, confianza, *_ in detecciones.filas()
         ]
 
         return imagen_anotada, texto_stats, tabla_detecciones
 
+    def analizar_imagen(imagen, confianza_min, estado):
+        """Procesa imagen y retorna resultados (reutiliza la inferencia si la imagen no cambio)"""
+        if imagen is None:
+            return None, "No se cargo ninguna imagen", None, None
+
+        # Convertir a numpy array RGB (sin copiar si ya lo es)
+        with analyzer.medidor.etapa('conversion_entrada'):
+            imagen = a_arreglo_rgb(imagen)
+
+            # Solo se infiere si la imagen es distinta a la ultima analizada en esta sesion
+            huella = huella_imagen(imagen)
+        if estado is None or estado['huella'] != huella:
+            estado = {
+                'huella': huella,
+                'crudas': analyzer.inferir_crudo(imagen, huella=huella)
+            }
+
+        imagen_anotada, detecciones = analyzer.filtrar_y_anotar(
+            imagen,
+            estado['crudas'],
+            confianza_min
+        )
+
+        return (*formatear_resultados(imagen_anotada, detecciones), estado)
+
+    def analizar_lote(imagenes, confianzas):
+        """
+        Version por lotes de analizar_imagen (batch=True): recibe y retorna listas
+
+        Gradio ejecuta el lote con el estado de sesion de la primera solicitud,
+        por eso aqui no se lee ni se escribe gr.State: las predicciones crudas de
+        cada solicitud salen en una columna propia (ver actualizar_estado).
+        """
+        salidas = [(None, "No se cargo ninguna imagen", None, None)] * len(imagenes)
+
+        with analyzer.medidor.etapa('conversion_entrada'):
+            validas = [i for i, imagen in enumerate(imagenes) if imagen is not None]
+            arreglos = [a_arreglo_rgb(imagenes[i]) for i in validas]
+            huellas = [huella_imagen(imagen) for imagen in arreglos]
+
+        if arreglos:
+            # Una sola llamada al modelo para todas las solicitudes del lote
+            crudas = analyzer.inferir_crudo_lote(arreglos, huellas)
+            for i, imagen, huella, detecciones_crudas in zip(validas, arreglos, huellas, crudas):
+                imagen_anotada, detecciones = analyzer.filtrar_y_anotar(
+                    imagen,
+                    detecciones_crudas,
+                    confianzas[i]
+                )
+                estado = {
+                    'huella': huella,
+                    'columnas': {c: detecciones_crudas.datos[c].tolist() for c in COLUMNAS}
+                }
+                salidas[i] = (*formatear_resultados(imagen_anotada, detecciones), estado)
+
+        return tuple(list(columna) for columna in zip(*salidas))
+
+    def actualizar_estado(estado_lote):
+        """Guarda en la sesion las predicciones crudas que devolvio analizar_lote (sin inferir)"""
+        if estado_lote is None:
+            return None
+        columnas = estado_lote['columnas']
+        return {
+            'huella': estado_lote['huella'],
+            'crudas': Detecciones.desde_columnas(*(columnas[c] for c in COLUMNAS))
+        }
+
+    def refiltrar(imagen, confianza_min, estado):
+        """Aplica un nuevo umbral a las predicciones guardadas, sin inferir"""
+        if imagen is None or estado is None:
+            return gr.update(), gr.update(), gr.update()
+
+        imagen = a_arreglo_rgb(imagen)
+
+        if estado['huella'] != huella_imagen(imagen):
+            # La imagen cambio: se espera a que el usuario pulse "Analizar"
+            return gr.update(), gr.update(), gr.update()
+
+        imagen_anotada, detecciones = analyzer.filtrar_y_anotar(
+            imagen,
+            estado['crudas'],
+            confianza_min,
+            registrar=False
+        )
+
+        return formatear_resultados(imagen_anotada, detecciones)
+
     def limpiar_todo():
         """Limpia todos los campos"""
-        return None, "", None
+        return None, "", None, None
 
     def exportar_resultados_csv(detecciones_tabla):
         """Exporta tabla actual a CSV"""
@@ -392,6 +729,39 @@ ESTADISTICAS DE DETECCION:
         filepath = analyzer.exportar_csv(detecciones)
         return f"Exportado a: {filepath}"
 
+    # Agregados incrementales del log (estado persistido en outputs/analitica_log.json)
+    analizador_log = AnalizadorLog(analyzer.csv_log)
+
+    def reporte_historial():
+        """Procesa las filas nuevas del log y muestra los agregados"""
+        # Escribir primero las filas que el registro aun tiene en memoria
+        analyzer.registro.vaciar()
+
+        if not analyzer.registro.escribir_csv:
+            # Sin log CSV: conteos por numero desde el historial SQLite
+            por_numero = [
+                [numero, detecciones, f"{confianza:.3f}"]
+                for numero, detecciones, confianza in analyzer.historial.contar_por_numero()
+            ]
+            resumen = f"Filas en el historial: {analyzer.historial.contar()}"
+            return resumen, por_numero, [], []
+
+        nuevas = analizador_log.actualizar()
+        reporte = analizador_log.reporte(limite_cubetas=48)
+
+        resumen = f"Filas en el log: {reporte['filas']} ({nuevas} nuevas en esta actualizacion)"
+        por_numero = [
+            [fila['numero'], fila['detecciones'], f"{fila['confianza_promedio']:.3f}"]
+            for fila in reporte['por_numero']
+        ]
+        histograma = [
+            [f"{b['desde']:.1f}-{b['hasta']:.1f}", b['detecciones']]
+            for b in reporte['histograma_confianza']
+        ]
+        por_tiempo = [[c['cubeta'], c['detecciones']] for c in reporte['por_tiempo']]
+
+        return resumen, por_numero, histograma, por_tiempo
+
     # Crear interfaz con Blocks
     with gr.Blocks(
         title="Basketball Jersey Numbers OCR",
@@ -401,71 +771,135 @@ ESTADISTICAS DE DETECCION:
         gr.Markdown("# Basketball Jersey Numbers OCR")
         gr.Markdown("Deteccion de numeros en camisetas de baloncesto - Inferencia Local GPU")
 
-        with gr.Row():
-            with gr.Column(scale=1):
-                imagen_entrada = gr.Image(
-                    label="Imagen de entrada",
-                    type="numpy",
-                    sources=["upload", "webcam"]
-                )
+        # Predicciones crudas de la ultima imagen analizada en la sesion
+        estado_predicciones = gr.State(None)
+        # Modo por lotes: predicciones crudas de cada solicitud, de camino a estado_predicciones
+        estado_lote = gr.JSON(visible=False)
+
+        with gr.Tab("Analisis"):
+            with gr.Row():
+                with gr.Column(scale=1):
+                    imagen_entrada = gr.Image(
+                        label="Imagen de entrada",
+                        type="numpy",
+                        sources=["upload", "webcam"]
+                    )
+
+                    confianza_slider = gr.Slider(
+                        minimum=0.1,
+                        maximum=0.9,
+                        value=0.4,
+                        step=0.05,
+                        label="Confianza minima"
+                    )
+
+                    with gr.Row():
+                        btn_analizar = gr.Button("Analizar", variant="primary")
+                        btn_limpiar = gr.Button("Limpiar")
+
+                with gr.Column(scale=1):
+                    imagen_salida = gr.Image(
+                        label="Detecciones",
+                        type="numpy"
+                    )
+
+                    texto_stats = gr.Textbox(
+                        label="Estadisticas",
+                        lines=6,
+                        interactive=False
+                    )
+
+            gr.Markdown("### Historial de Detecciones")
+
+            tabla_detecciones = gr.Dataframe(
+                headers=["Numero", "Confianza"],
+                label="Resultados",
+                interactive=False
+            )
 
-                confianza_slider = gr.Slider(
-                    minimum=0.1,
-                    maximum=0.9,
-                    value=0.4,
-                    step=0.05,
-                    label="Confianza minima"
+            with gr.Row():
+                btn_exportar = gr.Button("Exportar a CSV")
+                texto_exportar = gr.Textbox(
+                    label="Estado de exportacion",
+                    interactive=False
                 )
 
-                with gr.Row():
-                    btn_analizar = gr.Button("Analizar", variant="primary")
-                    btn_limpiar = gr.Button("Limpiar")
+        with gr.Tab("Historial"):
+            gr.Markdown("Agregados de jersey_log.csv (solo se leen las filas nuevas en cada actualizacion)")
+            btn_historial = gr.Button("Actualizar reporte", variant="primary")
+            texto_historial = gr.Textbox(label="Resumen", lines=2, interactive=False)
 
-            with gr.Column(scale=1):
-                imagen_salida = gr.Image(
-                    label="Detecciones",
-                    type="numpy"
+            with gr.Row():
+                tabla_por_numero = gr.Dataframe(
+                    headers=["Numero", "Detecciones", "Confianza promedio"],
+                    label="Detecciones por numero",
+                    interactive=False
                 )
-
-                texto_stats = gr.Textbox(
-                    label="Estadisticas",
-                    lines=6,
+                tabla_histograma = gr.Dataframe(
+                    headers=["Confianza", "Detecciones"],
+                    label="Histograma de confianza",
                     interactive=False
                 )
 
-        gr.Markdown("### Historial de Detecciones")
-
-        tabla_detecciones = gr.Dataframe(
-            headers=["Numero", "Confianza"],
-            label="Resultados",
-            interactive=False
-        )
-
-        with gr.Row():
-            btn_exportar = gr.Button("Exportar a CSV")
-            texto_exportar = gr.Textbox(
-                label="Estado de exportacion",
+            tabla_por_tiempo = gr.Dataframe(
+                headers=["Cubeta", "Detecciones"],
+                label=f"Detecciones por cubeta de {analizador_log.minutos_cubeta} min",
                 interactive=False
             )
 
         # Conectar eventos
-        btn_analizar.click(
-            fn=analizar_imagen,
-            inputs=[imagen_entrada, confianza_slider],
-            outputs=[imagen_salida, texto_stats, tabla_detecciones]
+        if lote_max > 1:
+            btn_analizar.click(
+                fn=analizar_lote,
+                inputs=[imagen_entrada, confianza_slider],
+                outputs=[imagen_salida, texto_stats, tabla_detecciones, estado_lote],
+                batch=True,
+                max_batch_size=lote_max,
+                concurrency_limit=concurrencia,
+                concurrency_id="inferencia"
+            ).then(
+                fn=actualizar_estado,
+                inputs=[estado_lote],
+                outputs=[estado_predicciones],
+                concurrency_limit=None
+            )
+        else:
+            btn_analizar.click(
+                fn=analizar_imagen,
+                inputs=[imagen_entrada, confianza_slider, estado_predicciones],
+                outputs=[imagen_salida, texto_stats, tabla_detecciones, estado_predicciones],
+                concurrency_limit=concurrencia,
+                concurrency_id="inferencia"
+            )
+
+        # Re-filtrar, limpiar y exportar no llaman al modelo: sin limite de concurrencia
+        confianza_slider.release(
+            fn=refiltrar,
+            inputs=[imagen_entrada, confianza_slider, estado_predicciones],
+            outputs=[imagen_salida, texto_stats, tabla_detecciones],
+            concurrency_limit=None
         )
 
         btn_limpiar.click(
             fn=limpiar_todo,
-            outputs=[imagen_entrada, texto_stats, tabla_detecciones]
+            outputs=[imagen_entrada, texto_stats, tabla_detecciones, estado_predicciones],
+            concurrency_limit=None
         )
 
         btn_exportar.click(
             fn=exportar_resultados_csv,
             inputs=[tabla_detecciones],
-            outputs=[texto_exportar]
+            outputs=[texto_exportar],
+            concurrency_limit=None
+        )
+
+        btn_historial.click(
+            fn=reporte_historial,
+            outputs=[texto_historial, tabla_por_numero, tabla_histograma, tabla_por_tiempo],
+            concurrency_limit=1
         )
 
+    demo.queue(default_concurrency_limit=concurrencia, max_size=max_cola)
     return demo
 
 
@@ -475,28 +909,87 @@ def main():
     print("BASKETBALL JERSEY NUMBERS OCR - INFERENCIA LOCAL")
     print("=" * 60 + "\n")
 
-    # 1. Verificar GPU
-    if not verificar_gpu():
-        print("\nAbortando: GPU no disponible")
-        return
+    # Logging del pipeline (nivel en JERSEY_LOG_LEVEL, WARNING por defecto)
+    configurar_logging()
 
-    # 2. Instalar dependencias
-    print("\nVerificando dependencias...")
-    instalar_dependencias()
+    # JERSEY_BACKEND = roboflow | onnx | sintetico
+    nombre_backend = os.environ.get('JERSEY_BACKEND', 'roboflow')
 
-    # 3. Solicitar API key
-    api_key = input("\nIngresa tu Roboflow API key: ").strip()
-    if not api_key:
-        print("ERROR: API key requerida")
-        return
+    # 1. Verificar GPU (solo la usa el backend Roboflow; sin GPU se continua en CPU)
+    if nombre_backend == 'roboflow':
+        with registrar_fase('verificar_gpu'):
+            gpu_disponible = verificar_gpu()
+        if not gpu_disponible:
+            print("\n[ADVERTENCIA] GPU no disponible: la inferencia se ejecutara en CPU")
 
-    # 4. Inicializar analizador
+    # 2. Instalar dependencias
+    print("\nVerificando dependencias...")
+    with registrar_fase('dependencias'):
+        instalar_dependencias()
+
+    # 3. Elegir backend
+    backend = None
+    if nombre_backend == 'onnx':
+        backend = BackendOnnxRuntime.desde_cache_roboflow(
+            hilos_intra=int(os.environ.get('JERSEY_HILOS_INTRA', '0')),
+            hilos_inter=int(os.environ.get('JERSEY_HILOS_INTER', '0'))
+        )
+    elif nombre_backend == 'sintetico':
+        backend = BackendSintetico(latencia_s=float(os.environ.get('JERSEY_LATENCIA_SINTETICA', '0')))
+
+    # 4. Solicitar API key (no se necesita si el modelo ya esta en el cache local)
+    # El mismo cache pasa al backend: los artefactos verificados aqui no se vuelven a hashear
+    cache_modelo = CacheArtefactosModelo()
+    api_key = os.environ.get('ROBOFLOW_API_KEY', '').strip()
+    if (backend is None and not api_key
+            and not cache_modelo.verificar_integridad("basketball-jersey-numbers-ocr/7")):
+        api_key = input("\nIngresa tu Roboflow API key: ").strip()
+        if not api_key:
+            print("ERROR: API key requerida")
+            return
+
+    # 5. Inicializar analizador
     print("\nInicializando analizador...")
-    analyzer = JerseyAnalyzer(api_key=api_key)
+    with registrar_fase('cargar_modelo'):
+        # Historial SQLite opcional (JERSEY_HISTORIAL=outputs/historial.sqlite)
+        historial = None
+        if os.environ.get('JERSEY_HISTORIAL'):
+            retencion = os.environ.get('JERSEY_RETENCION_DIAS')
+            historial = HistorialSQLite(
+                Path(os.environ['JERSEY_HISTORIAL']),
+                retencion_dias=float(retencion) if retencion else None
+            )
+
+        # JERSEY_LOG_CSV=0 reemplaza jersey_log.csv por el historial (requiere JERSEY_HISTORIAL)
+        escribir_csv = os.environ.get('JERSEY_LOG_CSV', '1') != '0'
+        if not escribir_csv and historial is None:
+            print("[ADVERTENCIA] JERSEY_LOG_CSV=0 sin JERSEY_HISTORIAL: se mantiene jersey_log.csv")
+            escribir_csv = True
+
+        analyzer = JerseyAnalyzer(
+            api_key=api_key or None,
+            cache_modelo=cache_modelo,
+            backend=backend,
+            historial=historial,
+            escribir_csv=escribir_csv
+        )
+    print(f"[INFO] Carga en frio: {analyzer.tiempos_arranque['carga_s']:.3f} s, "
+          f"calentamiento: {analyzer.tiempos_arranque['calentamiento_s']:.3f} s")
 
-    # 5. Crear y lanzar interfaz Gradio
+    # 6. Crear y lanzar interfaz Gradio
     print("\nLanzando interfaz Gradio...")
-    demo = crear_interfaz_gradio(analyzer)
+    with registrar_fase('crear_interfaz'):
+        # Concurrencia y lotes (JERSEY_CONCURRENCIA, JERSEY_LOTE_MAX, JERSEY_MAX_COLA)
+        max_cola = int(os.environ.get('JERSEY_MAX_COLA', '0'))
+        demo = crear_interfaz_gradio(
+            analyzer,
+            concurrencia=int(os.environ.get('JERSEY_CONCURRENCIA', '1')),
+            lote_max=int(os.environ.get('JERSEY_LOTE_MAX', '1')),
+            max_cola=max_cola or None
+        )
+
+    # Tiempos de arranque (sin contar la espera de la API key) para seguimiento de regresiones
+    reporte_arranque(Path("./outputs/reporte_arranque.json"))
 
     demo.launch(
         share=True,  # Genera URL publica para acceso desde navegador local
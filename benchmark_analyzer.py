@@ -0,0 +1,283 @@
+"""
+Micro-benchmarks reproducibles del pipeline de JerseyAnalyzer
+Usa el backend sintetico con latencia fija: corre en CPU, sin red ni API key
+
+Uso:
+    python benchmark_analyzer.py --salida outputs/benchmark.json
+    python benchmark_analyzer.py --guardar-baseline benchmark_baseline.json
+    python benchmark_analyzer.py --baseline benchmark_baseline.json --tolerancia 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backends import BackendSintetico, Prediccion, RespuestaDeteccion
+from cache_inferencia import CacheInferencia
+from detecciones import Detecciones
+
+
+DIR_MUESTRAS = Path(__file__).resolve().parent / "sample_images"
+
+# (nombre, alto, ancho) de las imagenes sinteticas
+RESOLUCIONES = [
+    ('480p', 480, 640),
+    ('720p', 720, 1280),
+    ('1080p', 1080, 1920)
+]
+
+
+def medir(fn: Callable[[], object], repeticiones: int, calentamiento: int) -> Dict:
+    """Ejecuta fn y retorna percentiles de latencia (ms) y throughput (ops/s)"""
+    for _ in range(calentamiento):
+        fn()
+
+    latencias = np.empty(repeticiones, dtype=np.float64)
+    inicio_total = time.perf_counter()
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        latencias[i] = time.perf_counter() - inicio
+    duracion = time.perf_counter() - inicio_total
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) * 1000
+    return {
+        'repeticiones': repeticiones,
+        'media_ms': round(float(latencias.mean() * 1000), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'ops_por_segundo': round(repeticiones / duracion, 2)
+    }
+
+
+def detecciones_sinteticas(n: int, alto: int, ancho: int, semilla: int = 0) -> Detecciones:
+    """Detecciones aleatorias reproducibles dentro de la imagen"""
+    rng = np.random.default_rng(semilla)
+    return Detecciones.desde_columnas(
+        rng.integers(0, 100, n).astype(str),
+        rng.uniform(0.1, 1.0, n).round(3),
+        rng.integers(0, ancho, n),
+        rng.integers(0, alto, n),
+        rng.integers(20, max(21, ancho // 8), n),
+        rng.integers(20, max(21, alto // 8), n)
+    )
+
+
+class RespuestaVLM:
+    """Respuesta de texto como la de los modelos VLM (LMMInferenceResponse)"""
+
+    def __init__(self, response: str):
+        self.response = response
+
+
+def respuesta_sintetica(n: int, alto: int, ancho: int, semilla: int = 0) -> RespuestaDeteccion:
+    """Respuesta YOLO con n predicciones (mismo formato que los backends)"""
+    return RespuestaDeteccion([
+        Prediccion(numero, confianza, float(x), float(y), float(w), float(h))
+        for numero, confianza, x, y, w, h in detecciones_sinteticas(n, alto, ancho, semilla).filas()
+    ])
+
+
+def cargar_imagenes() -> Dict[str, np.ndarray]:
+    """Imagenes de sample_images/ (RGB) y sinteticas a varias resoluciones"""
+    from arranque import importar_perezoso
+    cv2 = importar_perezoso('cv2')
+
+    imagenes = {}
+    for ruta in sorted(DIR_MUESTRAS.glob('*.jpg')):
+        imagen = cv2.imread(str(ruta), cv2.IMREAD_COLOR)
+        if imagen is not None:
+            imagenes[ruta.stem] = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+    rng = np.random.default_rng(1234)
+    for nombre, alto, ancho in RESOLUCIONES:
+        imagenes[f"sintetica_{nombre}"] = rng.integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+
+    return imagenes
+
+
+def ejecutar_benchmarks(
+    repeticiones: int = 50,
+    calentamiento: int = 5,
+    latencia_modelo_s: float = 0.005,
+    filtro: str = ""
+) -> Dict:
+    """
+    Ejecuta todos los casos y retorna el reporte completo
+
+    Args:
+        repeticiones: Mediciones por caso
+        calentamiento: Ejecuciones descartadas antes de medir
+        latencia_modelo_s: Latencia fija por llamada del modelo sintetico
+        filtro: Solo casos cuyo nombre contenga este texto
+    """
+    from basketball_jersey_analyzer import JerseyAnalyzer
+
+    imagenes = cargar_imagenes()
+    casos = {}
+
+    def caso(nombre: str, fn: Callable[[], object]):
+        if filtro and filtro not in nombre:
+            return
+        casos[nombre] = medir(fn, repeticiones, calentamiento)
+        print(f"  {nombre:<45} p50={casos[nombre]['p50_ms']:9.3f} ms  "
+              f"p99={casos[nombre]['p99_ms']:9.3f} ms  {casos[nombre]['ops_por_segundo']:10.1f} ops/s")
+
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # El analizador escribe outputs/ y jersey_log.csv relativos al directorio actual
+        os.chdir(tmp)
+        try:
+            analyzer = JerseyAnalyzer(
+                backend=BackendSintetico(latencia_s=latencia_modelo_s, detecciones_por_imagen=3),
+                # Sin cache: cada llamada debe llegar al modelo
+                cache=CacheInferencia(max_bytes=0),
+                calentamiento=0
+            )
+
+            print("detectar_numeros")
+            for nombre, imagen in imagenes.items():
+                caso(f"detectar_numeros/{nombre}", lambda imagen=imagen: analyzer.detectar_numeros(imagen))
+
+            print("anotacion")
+            for nombre, alto, ancho in RESOLUCIONES:
+                imagen = imagenes[f"sintetica_{nombre}"]
+                for n in (1, 50):
+                    detecciones = detecciones_sinteticas(n, alto, ancho)
+                    caso(f"anotacion/{nombre}/{n}_det",
+                         lambda imagen=imagen, d=detecciones: analyzer._anotar(imagen, d))
+
+            print("calcular_estadisticas")
+            for n in (10, 100, 1000):
+                dicts = detecciones_sinteticas(n, 1080, 1920).a_dicts()
+                caso(f"calcular_estadisticas/{n}_det", lambda d=dicts: analyzer.calcular_estadisticas(d))
+
+            print("normalizacion")
+            imagen_1080 = imagenes["sintetica_1080p"]
+            for n in (10, 1000, 10000):
+                respuesta = respuesta_sintetica(n, 1080, 1920)
+                caso(f"normalizacion/yolo/{n}_pred",
+                     lambda r=respuesta: analyzer._parsear_respuesta(r, imagen_1080))
+            respuesta_vlm = RespuestaVLM("The jersey numbers are 23 and 7 (player #23 in front)")
+            caso("normalizacion/vlm", lambda: analyzer._parsear_respuesta(respuesta_vlm, imagen_1080))
+
+            print("exportar_csv")
+            for n in (100, 1000):
+                dicts = detecciones_sinteticas(n, 1080, 1920).a_dicts()
+                caso(f"exportar_csv/{n}_det",
+                     lambda d=dicts: analyzer.exportar_csv(d, filename="benchmark.csv"))
+
+            analyzer.cerrar()
+        finally:
+            os.chdir(directorio_original)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'repeticiones': repeticiones,
+            'calentamiento': calentamiento,
+            'latencia_modelo_s': latencia_modelo_s
+        },
+        'casos': casos
+    }
+
+
+def comparar_con_baseline(reporte: Dict, baseline: Dict, tolerancia: float) -> List[Dict]:
+    """
+    Compara el p50 de cada caso contra el baseline
+
+    Returns:
+        Lista de regresiones (casos cuyo p50 crecio mas que la tolerancia)
+    """
+    regresiones = []
+
+    print("\nCOMPARACION CONTRA BASELINE (p50)")
+    for nombre, actual in reporte['casos'].items():
+        anterior = baseline.get('casos', {}).get(nombre)
+        if anterior is None or anterior['p50_ms'] <= 0:
+            print(f"  {nombre:<45} (sin baseline)")
+            continue
+
+        razon = actual['p50_ms'] / anterior['p50_ms']
+        marca = "REGRESION" if razon > 1 + tolerancia else "ok"
+        print(f"  {nombre:<45} {anterior['p50_ms']:9.3f} -> {actual['p50_ms']:9.3f} ms  x{razon:5.2f}  {marca}")
+
+        if razon > 1 + tolerancia:
+            regresiones.append({
+                'caso': nombre,
+                'baseline_p50_ms': anterior['p50_ms'],
+                'actual_p50_ms': actual['p50_ms'],
+                'razon': round(razon, 3)
+            })
+
+    return regresiones
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de JerseyAnalyzer")
+    parser.add_argument('--salida', type=Path, default=Path('./outputs/benchmark.json'),
+                        help="Reporte JSON de esta ejecucion")
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help="Reporte JSON de referencia para detectar regresiones")
+    parser.add_argument('--guardar-baseline', type=Path, default=None,
+                        help="Guardar esta ejecucion como baseline")
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help="Aumento relativo de p50 permitido antes de marcar regresion")
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--latencia-modelo', type=float, default=0.005,
+                        help="Latencia fija del modelo sintetico (s)")
+    parser.add_argument('--filtro', default="", help="Solo casos que contengan este texto")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DEL PIPELINE")
+    print("=" * 70)
+
+    reporte = ejecutar_benchmarks(
+        repeticiones=args.repeticiones,
+        calentamiento=args.calentamiento,
+        latencia_modelo_s=args.latencia_modelo,
+        filtro=args.filtro
+    )
+
+    regresiones = []
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regresiones = comparar_con_baseline(reporte, baseline, args.tolerancia)
+        reporte['comparacion'] = {
+            'baseline': str(args.baseline),
+            'tolerancia': args.tolerancia,
+            'regresiones': regresiones
+        }
+
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    args.salida.write_text(json.dumps(reporte, indent=2), encoding='utf-8')
+    print(f"\nReporte: {args.salida}")
+
+    if args.guardar_baseline is not None:
+        args.guardar_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.guardar_baseline.write_text(json.dumps(reporte, indent=2), encoding='utf-8')
+        print(f"Baseline guardado: {args.guardar_baseline}")
+
+    if regresiones:
+        print(f"\n[ERROR] {len(regresiones)} regresiones sobre la tolerancia de {args.tolerancia:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Cache de resultados de inferencia direccionado por contenido
+Clave: hash de los bytes de la imagen + model_id + confianza
+Nivel en memoria (LRU acotado en bytes) y nivel opcional en disco (LRU por
+mtime, acotado en bytes); las respuestas se guardan como JSON, sin pickle
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from instrumentacion import logger
+from normalizacion import respuesta_a_json
+
+
+def huella_imagen(imagen: np.ndarray) -> str:
+    """Hash del contenido de la imagen (incluye forma y dtype)"""
+    imagen = np.ascontiguousarray(imagen)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{imagen.shape}|{imagen.dtype.str}".encode())
+    h.update(imagen.data)
+    return h.hexdigest()
+
+
+def clave_cache(huella: str, model_id: str, confianza: float) -> str:
+    """Clave de cache para una imagen, modelo y umbral de inferencia"""
+    return hashlib.blake2b(
+        f"{huella}|{model_id}|{confianza:.4f}".encode(),
+        digest_size=20
+    ).hexdigest()
+
+
+class CacheInferencia:
+    """
+    Cache LRU de respuestas del modelo con nivel opcional en disco
+
+    Las respuestas se guardan serializadas en JSON (ver respuesta_a_json), de
+    modo que cada acierto retorna una copia independiente y el tamano en memoria
+    es exacto. Un acierto retorna el diccionario JSON, no el objeto original;
+    normalizar_respuesta lo convierte en las mismas detecciones.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        dir_disco: Optional[Path] = None,
+        max_bytes_disco: int = 1024 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_bytes: Memoria maxima del nivel LRU (0 desactiva el nivel en memoria)
+            dir_disco: Directorio del nivel en disco (None = sin disco),
+                por ejemplo outputs/cache_inferencia
+            max_bytes_disco: Tamano maximo del nivel en disco; al superarlo se borran
+                las entradas usadas hace mas tiempo (mtime)
+        """
+        self.max_bytes = max_bytes
+        self.max_bytes_disco = max_bytes_disco
+        self.dir_disco = Path(dir_disco) if dir_disco is not None else None
+
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+
+        # Indice del nivel en disco: clave -> bytes, de menos a mas reciente
+        self._disco = OrderedDict()
+        self._bytes_disco = 0
+        if self.dir_disco is not None:
+            self.dir_disco.mkdir(parents=True, exist_ok=True)
+            self._indexar_disco()
+            with self._lock:
+                self._podar_disco()
+
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+    def obtener(self, clave: str):
+        """Retorna la respuesta cacheada o None si no existe"""
+        with self._lock:
+            datos = self._memoria.get(clave)
+            if datos is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+                return json.loads(datos)
+
+        datos = self._leer_disco(clave)
+        if datos is not None:
+            try:
+                respuesta = json.loads(datos)
+            except ValueError:
+                respuesta = None
+            if respuesta is not None:
+                with self._lock:
+                    self.aciertos_disco += 1
+                    self._guardar_memoria(clave, datos)
+                return respuesta
+
+        with self._lock:
+            self.fallos += 1
+        return None
+
+    def guardar(self, clave: str, respuesta):
+        """Guarda una respuesta en memoria y en disco (si esta habilitado)"""
+        forma_json = respuesta_a_json(respuesta)
+        if forma_json is None:
+            logger.warning("Respuesta no serializable, no se cachea: %s", type(respuesta).__name__)
+            return
+        try:
+            datos = json.dumps(forma_json, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.warning("Respuesta no serializable, no se cachea: %s", e)
+            return
+
+        with self._lock:
+            self._guardar_memoria(clave, datos)
+        self._escribir_disco(clave, datos)
+
+    def estadisticas(self) -> Dict:
+        """Contadores de aciertos/fallos y ocupacion"""
+        with self._lock:
+            consultas = self.aciertos_memoria + self.aciertos_disco + self.fallos
+            aciertos = self.aciertos_memoria + self.aciertos_disco
+            return {
+                'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(aciertos / consultas, 3) if consultas else 0.0,
+                'entradas_memoria': len(self._memoria),
+                'bytes_memoria': self._bytes_memoria,
+                'entradas_disco': len(self._disco),
+                'bytes_disco': self._bytes_disco
+            }
+
+    def limpiar(self):
+        """Vacia el nivel en memoria (el disco se conserva)"""
+        with self._lock:
+            self._memoria.clear()
+            self._bytes_memoria = 0
+
+    def _guardar_memoria(self, clave: str, datos: bytes):
+        """Inserta en el LRU y expulsa las entradas mas antiguas (llamar con lock)"""
+        if len(datos) > self.max_bytes:
+            return
+
+        anterior = self._memoria.pop(clave, None)
+        if anterior is not None:
+            self._bytes_memoria -= len(anterior)
+
+        self._memoria[clave] = datos
+        self._bytes_memoria += len(datos)
+
+        while self._bytes_memoria > self.max_bytes:
+            _, expulsado = self._memoria.popitem(last=False)
+            self._bytes_memoria -= len(expulsado)
+
+    def _ruta_disco(self, clave: str) -> Path:
+        return self.dir_disco / clave[:2] / f"{clave}.json"
+
+    def _indexar_disco(self):
+        """Construye el indice LRU del disco ordenando las entradas existentes por mtime"""
+        entradas = []
+        for ruta in self.dir_disco.glob('*/*'):
+            try:
+                if ruta.suffix == '.pkl':
+                    # Entradas pickle de versiones anteriores: ya no se leen
+                    ruta.unlink()
+                    continue
+                if ruta.suffix != '.json':
+                    continue
+                info = ruta.stat()
+            except OSError:
+                continue
+            entradas.append((info.st_mtime_ns, ruta.stem, info.st_size))
+
+        for _, clave, tamano in sorted(entradas):
+            self._disco[clave] = tamano
+            self._bytes_disco += tamano
+
+    def _podar_disco(self):
+        """Borra las entradas menos recientes hasta quedar bajo max_bytes_disco (llamar con lock)"""
+        while self._disco and self._bytes_disco > self.max_bytes_disco:
+            clave, tamano = self._disco.popitem(last=False)
+            self._bytes_disco -= tamano
+            try:
+                self._ruta_disco(clave).unlink()
+            except OSError:
+                pass
+
+    def _leer_disco(self, clave: str) -> Optional[bytes]:
+        if self.dir_disco is None:
+            return None
+        ruta = self._ruta_disco(clave)
+        try:
+            datos = ruta.read_bytes()
+            # El mtime marca el ultimo uso: la poda borra primero lo no leido
+            os.utime(ruta)
+        except OSError:
+            return None
+
+        with self._lock:
+            if clave in self._disco:
+                self._disco.move_to_end(clave)
+            else:
+                # Escrita por otro proceso que comparte el directorio
+                self._disco[clave] = len(datos)
+                self._bytes_disco += len(datos)
+        return datos
+
+    def _escribir_disco(self, clave: str, datos: bytes):
+        """Escritura atomica: archivo temporal + rename"""
+        if self.dir_disco is None or len(datos) > self.max_bytes_disco:
+            return
+
+        ruta = self._ruta_disco(clave)
+        try:
+            ruta.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(datos)
+            os.replace(tmp, ruta)
+        except OSError as e:
+            logger.warning("No se pudo escribir cache en disco", extra={'datos': {'ruta': str(ruta), 'error': str(e)}})
+            return
+
+        with self._lock:
+            self._bytes_disco += len(datos) - self._disco.pop(clave, 0)
+            self._disco[clave] = len(datos)
+            self._podar_disco()
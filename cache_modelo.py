@@ -0,0 +1,129 @@
+"""
+Cache local de artefactos del modelo con verificacion de integridad
+Permite cargar el modelo sin red ni API key una vez descargado
+
+Roboflow inference guarda los artefactos en MODEL_CACHE_DIR; este modulo fija
+ese directorio y mantiene un manifiesto SHA-256 de los archivos descargados.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+DIR_CACHE_MODELO = Path("./outputs/model_cache")
+
+
+def _sha256_archivo(ruta: Path, tamano_bloque: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class CacheArtefactosModelo:
+    """Directorio de artefactos del modelo con manifiestos de integridad"""
+
+    def __init__(self, directorio: Optional[Path] = None):
+        """
+        Args:
+            directorio: Raiz del cache (por defecto $MODEL_CACHE_DIR o outputs/model_cache)
+        """
+        if directorio is None:
+            directorio = Path(os.environ.get('MODEL_CACHE_DIR', DIR_CACHE_MODELO))
+        self.directorio = Path(directorio).resolve()
+        self.dir_manifiestos = self.directorio / ".manifiestos"
+        # model_id -> (tamano, mtime_ns) de cada artefacto ya verificado en este proceso
+        self._verificados: Dict[str, Tuple] = {}
+
+    def configurar_entorno(self):
+        """
+        Apunta MODEL_CACHE_DIR de Roboflow inference a este directorio
+
+        Debe llamarse antes de importar `inference`, que lee la variable al cargarse.
+        """
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+        actual = os.environ.get('MODEL_CACHE_DIR')
+        if 'inference' in sys.modules and actual != str(self.directorio):
+            print("[ADVERTENCIA] inference ya fue importado; MODEL_CACHE_DIR no se puede cambiar")
+            return
+
+        os.environ['MODEL_CACHE_DIR'] = str(self.directorio)
+
+    def directorio_modelo(self, model_id: str) -> Path:
+        """Directorio donde inference guarda los artefactos de model_id"""
+        return self.directorio / model_id
+
+    def _ruta_manifiesto(self, model_id: str) -> Path:
+        return self.dir_manifiestos / (model_id.replace('/', '__') + '.json')
+
+    def registrar_manifiesto(self, model_id: str) -> Dict[str, str]:
+        """Calcula y guarda el hash de cada artefacto descargado del modelo"""
+        directorio = self.directorio_modelo(model_id)
+        archivos = {
+            str(ruta.relative_to(directorio)): _sha256_archivo(ruta)
+            for ruta in sorted(directorio.rglob('*'))
+            if ruta.is_file()
+        }
+
+        if not archivos:
+            print(f"[ADVERTENCIA] No hay artefactos en {directorio}; no se registra manifiesto")
+            return archivos
+
+        self.dir_manifiestos.mkdir(parents=True, exist_ok=True)
+        self._ruta_manifiesto(model_id).write_text(
+            json.dumps({
+                'model_id': model_id,
+                'creado': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'archivos': archivos
+            }, indent=2),
+            encoding='utf-8'
+        )
+        return archivos
+
+    def verificar_integridad(self, model_id: str) -> bool:
+        """
+        True si todos los artefactos del manifiesto existen y su hash coincide
+
+        El SHA-256 se calcula una vez por proceso: mientras tamano y mtime de los
+        artefactos no cambien, las verificaciones siguientes solo hacen stat.
+        """
+        try:
+            manifiesto = json.loads(self._ruta_manifiesto(model_id).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+
+        archivos = manifiesto.get('archivos', {})
+        if not archivos:
+            return False
+
+        directorio = self.directorio_modelo(model_id)
+        firma = []
+        for relativa in sorted(archivos):
+            ruta = directorio / relativa
+            try:
+                info = ruta.stat()
+            except OSError:
+                print(f"[ADVERTENCIA] Artefacto ausente o corrupto: {ruta}")
+                return False
+            firma.append((relativa, info.st_size, info.st_mtime_ns))
+        firma = tuple(firma)
+
+        if self._verificados.get(model_id) == firma:
+            return True
+
+        for relativa, sha in archivos.items():
+            ruta = directorio / relativa
+            if _sha256_archivo(ruta) != sha:
+                print(f"[ADVERTENCIA] Artefacto ausente o corrupto: {ruta}")
+                self._verificados.pop(model_id, None)
+                return False
+
+        self._verificados[model_id] = firma
+        return True
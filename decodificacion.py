@@ -0,0 +1,186 @@
+"""
+Decodificacion de imagenes de disco a resolucion reducida
+- Lee solo la cabecera (JPEG/PNG) para conocer las dimensiones
+- Si la imagen es mucho mayor que la entrada del modelo, decodifica JPEG
+  directamente a 1/2, 1/4 u 1/8 (cv2.IMREAD_REDUCED_COLOR_*)
+- Pool de hilos con ventana de lectura anticipada acotada, en orden
+"""
+
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from arranque import importar_perezoso
+from preprocesamiento import Transformacion
+
+
+FACTORES_REDUCCION = (8, 4, 2)
+
+EXTENSIONES_JPEG = {'.jpg', '.jpeg', '.jpe', '.jfif'}
+
+# Marcadores SOF (Start Of Frame) que contienen las dimensiones
+_MARCADORES_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_FIRMA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+class ImagenDecodificada(NamedTuple):
+    """Imagen RGB decodificada y su relacion con la imagen en disco"""
+    ruta: Path
+    imagen: Optional[np.ndarray]
+    transformacion: Optional[Transformacion]
+
+
+def dimensiones_imagen(ruta: Path) -> Optional[Tuple[int, int]]:
+    """(alto, ancho) leidos de la cabecera JPEG o PNG, sin decodificar (None si no se reconoce)"""
+    try:
+        with open(ruta, 'rb') as f:
+            inicio = f.read(2)
+            if inicio == b'\xff\xd8':
+                return _dimensiones_jpeg(f)
+            if inicio + f.read(6) == _FIRMA_PNG:
+                # IHDR: longitud (4) + tipo (4) + ancho (4) + alto (4)
+                cabecera = f.read(16)
+                if len(cabecera) == 16 and cabecera[4:8] == b'IHDR':
+                    ancho, alto = struct.unpack('>II', cabecera[8:16])
+                    return alto, ancho
+    except OSError:
+        pass
+    return None
+
+
+def _dimensiones_jpeg(f) -> Optional[Tuple[int, int]]:
+    """Recorre los segmentos JPEG hasta el primer SOF"""
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue
+
+        # Bytes de relleno 0xFF entre segmentos
+        marcador = f.read(1)
+        while marcador == b'\xff':
+            marcador = f.read(1)
+        if not marcador:
+            return None
+        codigo = marcador[0]
+
+        # Marcadores sin longitud
+        if codigo in (0x01, 0xD8) or 0xD0 <= codigo <= 0xD7:
+            continue
+        if codigo == 0xD9:
+            return None
+
+        longitud_bytes = f.read(2)
+        if len(longitud_bytes) < 2:
+            return None
+        longitud = struct.unpack('>H', longitud_bytes)[0]
+
+        if codigo in _MARCADORES_SOF:
+            datos = f.read(5)
+            if len(datos) < 5:
+                return None
+            alto, ancho = struct.unpack('>HH', datos[1:5])
+            return alto, ancho
+
+        f.seek(longitud - 2, 1)
+
+
+def factor_reduccion(alto: int, ancho: int, lado_objetivo: int) -> int:
+    """Mayor factor 8/4/2 que deja el lado mayor en al menos lado_objetivo (1 = sin reducir)"""
+    lado = max(alto, ancho)
+    for factor in FACTORES_REDUCCION:
+        if lado // factor >= lado_objetivo:
+            return factor
+    return 1
+
+
+def decodificar_reducida(ruta: Path, lado_objetivo: Optional[int] = 640) -> ImagenDecodificada:
+    """
+    Decodifica una imagen a RGB, reducida si es JPEG y mucho mayor que lado_objetivo
+
+    Args:
+        ruta: Archivo de imagen
+        lado_objetivo: Lado de entrada del modelo (None = siempre resolucion completa)
+
+    Returns:
+        ImagenDecodificada (imagen None si no se pudo leer); la transformacion
+        lleva cajas de la imagen decodificada a pixeles del archivo original
+    """
+    cv2 = importar_perezoso('cv2')
+    ruta = Path(ruta)
+
+    factor = 1
+    dimensiones = None
+    if lado_objetivo is not None and ruta.suffix.lower() in EXTENSIONES_JPEG:
+        dimensiones = dimensiones_imagen(ruta)
+        if dimensiones is not None:
+            factor = factor_reduccion(*dimensiones, lado_objetivo)
+
+    modo = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }[factor]
+
+    imagen = cv2.imread(str(ruta), modo)
+    if imagen is None:
+        return ImagenDecodificada(ruta, None, None)
+    imagen = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+    alto, ancho = imagen.shape[:2]
+    if factor == 1:
+        return ImagenDecodificada(ruta, imagen, Transformacion(alto, ancho, alto, ancho))
+
+    alto_original, ancho_original = dimensiones
+    if (alto > ancho) != (alto_original > ancho_original):
+        # Orientacion EXIF aplicada al decodificar
+        alto_original, ancho_original = ancho_original, alto_original
+
+    return ImagenDecodificada(
+        ruta,
+        imagen,
+        Transformacion(alto_original, ancho_original, alto, ancho, escala=1.0 / factor)
+    )
+
+
+class DecodificadorPrefetch:
+    """
+    Decodifica en un pool de hilos con a lo sumo `ventana` imagenes por adelantado
+
+    OpenCV libera el GIL durante la decodificacion, por lo que los hilos
+    decodifican en paralelo. Las imagenes se entregan en el orden de las rutas.
+    """
+
+    def __init__(self, lado_objetivo: Optional[int] = 640, hilos: int = 4, ventana: int = 16):
+        """
+        Args:
+            lado_objetivo: Lado de entrada del modelo (None = resolucion completa)
+            hilos: Hilos de decodificacion
+            ventana: Imagenes decodificadas o en curso como maximo
+        """
+        self.lado_objetivo = lado_objetivo
+        self.hilos = hilos
+        self.ventana = max(ventana, 1)
+
+    def iterar(self, rutas: Iterable[Path]) -> Iterator[ImagenDecodificada]:
+        """Decodifica las rutas y las entrega en orden"""
+        with ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="decodificacion") as pool:
+            en_vuelo = deque()
+            try:
+                for ruta in rutas:
+                    if len(en_vuelo) >= self.ventana:
+                        yield en_vuelo.popleft().result()
+                    en_vuelo.append(pool.submit(decodificar_reducida, ruta, self.lado_objetivo))
+
+                while en_vuelo:
+                    yield en_vuelo.popleft().result()
+            finally:
+                for futuro in en_vuelo:
+                    futuro.cancel()
@@ -0,0 +1,169 @@
+"""
+Representacion compacta de detecciones en columnas (arreglo estructurado de NumPy)
+Filtrado, estadisticas y exportacion vectorizados, con conversion al formato
+de diccionarios que usa la interfaz ({'numero', 'confianza', 'bbox': {...}})
+"""
+
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+
+DTYPE_DETECCION = np.dtype([
+    ('numero', 'U8'),
+    ('confianza', 'f4'),
+    ('x', 'i4'),
+    ('y', 'i4'),
+    ('width', 'i4'),
+    ('height', 'i4')
+])
+
+COLUMNAS = list(DTYPE_DETECCION.names)
+
+
+class Detecciones:
+    """Conjunto de detecciones de una imagen almacenado como arreglo estructurado"""
+
+    __slots__ = ('datos',)
+
+    def __init__(self, datos: np.ndarray = None):
+        """
+        Args:
+            datos: Arreglo con dtype DTYPE_DETECCION (None = vacio)
+        """
+        if datos is None:
+            datos = np.empty(0, dtype=DTYPE_DETECCION)
+        self.datos = datos
+
+    @classmethod
+    def desde_columnas(
+        cls,
+        numeros: Sequence,
+        confianzas: Sequence[float],
+        x: Sequence[float],
+        y: Sequence[float],
+        width: Sequence[float],
+        height: Sequence[float]
+    ) -> 'Detecciones':
+        """Construye desde columnas (listas o arreglos) de igual longitud"""
+        datos = np.empty(len(confianzas), dtype=DTYPE_DETECCION)
+        datos['numero'] = numeros
+        datos['confianza'] = confianzas
+        datos['x'] = x
+        datos['y'] = y
+        datos['width'] = width
+        datos['height'] = height
+        return cls(datos)
+
+    @classmethod
+    def desde_dicts(cls, detecciones: Iterable[Dict]) -> 'Detecciones':
+        """Convierte desde el formato de diccionarios de la interfaz"""
+        filas = [
+            (
+                det['numero'],
+                det['confianza'],
+                det.get('bbox', {}).get('x', 0),
+                det.get('bbox', {}).get('y', 0),
+                det.get('bbox', {}).get('width', 0),
+                det.get('bbox', {}).get('height', 0)
+            )
+            for det in detecciones
+        ]
+        return cls(np.array(filas, dtype=DTYPE_DETECCION))
+
+    @classmethod
+    def concatenar(cls, grupos: Iterable['Detecciones']) -> 'Detecciones':
+        """Une varios conjuntos en uno solo"""
+        arreglos = [grupo.datos for grupo in grupos]
+        if not arreglos:
+            return cls()
+        return cls(np.concatenate(arreglos))
+
+    def __len__(self) -> int:
+        return len(self.datos)
+
+    def __bool__(self) -> bool:
+        return len(self.datos) > 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Itera en formato de diccionarios (compatibilidad con codigo existente)"""
+        return iter(self.a_dicts())
+
+    def __getitem__(self, indice) -> 'Detecciones':
+        """Seleccion por mascara, slice o indices; siempre retorna Detecciones"""
+        seleccion = self.datos[indice]
+        if seleccion.ndim == 0:
+            seleccion = seleccion.reshape(1)
+        return Detecciones(seleccion)
+
+    def __repr__(self) -> str:
+        return f"Detecciones({len(self)})"
+
+    @property
+    def numeros(self) -> np.ndarray:
+        return self.datos['numero']
+
+    @property
+    def confianzas(self) -> np.ndarray:
+        return self.datos['confianza']
+
+    def filtrar(self, confianza_min: float) -> 'Detecciones':
+        """Detecciones con confianza >= confianza_min"""
+        # Tolerancia para que el redondeo de float32 no excluya el valor del umbral
+        return Detecciones(self.datos[self.datos['confianza'] >= np.float32(confianza_min) - 1e-6])
+
+    def estadisticas(self) -> Dict:
+        """Total y confianza promedio/maxima/minima"""
+        if len(self.datos) == 0:
+            return {
+                'total': 0,
+                'confianza_promedio': 0.0,
+                'confianza_max': 0.0,
+                'confianza_min': 0.0
+            }
+
+        confianzas = self.datos['confianza'].astype(np.float64)
+        return {
+            'total': int(len(confianzas)),
+            'confianza_promedio': round(float(confianzas.mean()), 3),
+            'confianza_max': round(float(confianzas.max()), 3),
+            'confianza_min': round(float(confianzas.min()), 3)
+        }
+
+    def esquinas(self) -> np.ndarray:
+        """Cajas como (N, 4) int32: x1, y1, x2, y2 (sin recortar)"""
+        d = self.datos
+        mitad_w = d['width'] / 2
+        mitad_h = d['height'] / 2
+        return np.column_stack([
+            d['x'] - mitad_w,
+            d['y'] - mitad_h,
+            d['x'] + mitad_w,
+            d['y'] + mitad_h
+        ]).astype(np.int32)
+
+    def filas(self) -> List[tuple]:
+        """Filas planas (numero, confianza, x, y, width, height) para exportar"""
+        confianzas = np.round(self.datos['confianza'].astype(np.float64), 3).tolist()
+        return [
+            (numero, confianza, x, y, w, h)
+            for numero, confianza, x, y, w, h in zip(
+                self.datos['numero'].tolist(),
+                confianzas,
+                self.datos['x'].tolist(),
+                self.datos['y'].tolist(),
+                self.datos['width'].tolist(),
+                self.datos['height'].tolist()
+            )
+        ]
+
+    def a_dicts(self) -> List[Dict]:
+        """Convierte al formato de diccionarios de la interfaz"""
+        return [
+            {
+                'numero': numero,
+                'confianza': confianza,
+                'bbox': {'x': x, 'y': y, 'width': w, 'height': h}
+            }
+            for numero, confianza, x, y, w, h in self.filas()
+        ]
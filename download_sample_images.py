@@ -1,90 +1,322 @@
 """
 Script para descargar imagenes de muestra del dataset
-Extrae URLs del archivo JSONL y descarga 10 imagenes para prueba
+Extrae URLs del archivo JSONL y las descarga en paralelo:
+- Sesion HTTP con pool de conexiones y concurrencia acotada
+- Escritura en streaming (archivo .part + rename)
+- Reintentos con backoff exponencial
+- Manifiesto con el hash de cada archivo: una ejecucion interrumpida
+  continua donde quedo y omite las imagenes ya descargadas
+
+Uso:
+    python download_sample_images.py
+    python download_sample_images.py --max-imagenes 0 --hilos 16
+    python download_sample_images.py --url-base http://localhost:8000
 """
 
+import argparse
+import hashlib
 import json
-import requests
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 
+import requests
+from requests.adapters import HTTPAdapter
 
-def extraer_urls_imagenes(jsonl_path: str, max_imagenes: int = 10) -> List[tuple]:
-    """
-    Extrae URLs de imagenes del archivo JSONL
+from anotaciones import LectorAnotaciones
 
-    Args:
-        jsonl_path: Ruta al archivo JSONL
-        max_imagenes: Numero maximo de imagenes a extraer
 
-    Returns:
-        Lista de tuplas (url, numero_etiqueta)
-    """
-    urls = []
+NOMBRE_MANIFIESTO = "manifest.jsonl"
 
-    with open(jsonl_path, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f):
-            if i >= max_imagenes:
-                break
-
-            data = json.loads(line)
+# Respuestas que vale la pena reintentar
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
 
-            # Extraer URL de imagen
-            for msg in data.get('messages', []):
-                if isinstance(msg.get('content'), list):
-                    for item in msg['content']:
-                        if item.get('type') == 'image_url':
-                            url = item['image_url']['url']
+TAMANO_BLOQUE = 64 * 1024
 
-                            # Extraer numero de la respuesta del asistente
-                            numero = None
-                            for msg2 in data['messages']:
-                                if msg2.get('role') == 'assistant':
-                                    numero = msg2.get('content', 'unknown')
-                                    break
 
-                            urls.append((url, numero))
-
-    return urls
+def extraer_urls_imagenes(
+    jsonl_path: str,
+    max_imagenes: Optional[int] = 10,
+    por_numero: Optional[int] = None,
+    semilla: int = 0
+) -> List[tuple]:
+    """
+    Extrae URLs de imagenes del archivo JSONL (a traves del indice persistido)
 
+    Args:
+        jsonl_path: Ruta al archivo JSONL
+        max_imagenes: Numero maximo de imagenes a extraer (None = todas)
+        por_numero: Si se indica, muestreo estratificado con hasta N imagenes por numero
+        semilla: Semilla del muestreo
 
-def descargar_imagen(url: str, output_path: Path) -> bool:
+    Returns:
+        Lista de tuplas (url, numero_etiqueta)
+    """
+    lector = LectorAnotaciones(Path(jsonl_path))
+
+    if por_numero is not None:
+        indices = lector.muestreo_estratificado(por_numero, semilla)
+    else:
+        indices = range(len(lector))
+    if max_imagenes is not None:
+        indices = indices[:max_imagenes]
+
+    return [(anotacion.url, anotacion.numero) for anotacion in lector.anotaciones(indices)]
+
+
+def crear_sesion(conexiones: int = 8) -> requests.Session:
+    """Sesion con un pool de `conexiones` conexiones reutilizables por host"""
+    sesion = requests.Session()
+    # Los reintentos se hacen en descargar_imagen, que tambien cubre cortes a mitad del cuerpo
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=0)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    return sesion
+
+
+def cambiar_base(url: str, url_base: Optional[str]) -> str:
+    """Reemplaza esquema y host de la URL por los de url_base (ej. un espejo local)"""
+    if not url_base:
+        return url
+    base = urlsplit(url_base)
+    partes = urlsplit(url)
+    ruta = base.path.rstrip('/') + partes.path
+    return urlunsplit((base.scheme, base.netloc, ruta, partes.query, ''))
+
+
+def hash_archivo(ruta: Path) -> str:
+    """SHA-256 del archivo leido por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def descargar_imagen(
+    url: str,
+    output_path: Path,
+    sesion: Optional[requests.Session] = None,
+    timeout: float = 10,
+    reintentos: int = 3,
+    backoff_s: float = 0.5
+) -> Optional[Tuple[str, int]]:
     """
-    Descarga una imagen desde URL
+    Descarga una imagen desde URL escribiendo en streaming
+
+    El cuerpo se escribe en `output_path.part` y se renombra al terminar, de modo
+    que nunca queda una imagen truncada con el nombre final.
 
     Args:
         url: URL de la imagen
         output_path: Ruta donde guardar la imagen
+        sesion: Sesion HTTP compartida (por defecto una nueva)
+        timeout: Timeout de conexion y de lectura (s)
+        reintentos: Reintentos ante errores de red o respuestas 429/5xx
+        backoff_s: Espera base; se duplica en cada reintento
 
     Returns:
-        True si se descargo correctamente
+        (sha256, bytes) si se descargo correctamente, None si no
     """
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+    sesion = sesion or requests
+    temporal = output_path.with_name(output_path.name + '.part')
+
+    for intento in range(reintentos + 1):
+        espera = backoff_s * (2 ** intento) * (0.5 + random.random())
+        try:
+            with sesion.get(url, timeout=timeout, stream=True) as response:
+                if response.status_code in ESTADOS_REINTENTABLES and intento < reintentos:
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        espera = max(espera, float(retry_after))
+                    raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                response.raise_for_status()
+
+                h = hashlib.sha256()
+                total = 0
+                with open(temporal, 'wb') as f:
+                    for bloque in response.iter_content(TAMANO_BLOQUE):
+                        f.write(bloque)
+                        h.update(bloque)
+                        total += len(bloque)
+
+            os.replace(temporal, output_path)
+            return h.hexdigest(), total
+
+        except (requests.RequestException, OSError) as e:
+            estado = getattr(getattr(e, 'response', None), 'status_code', None)
+            definitivo = estado is not None and estado not in ESTADOS_REINTENTABLES
+            if definitivo or intento == reintentos:
+                print(f"[ERROR] No se pudo descargar {url}: {e}")
+                break
+            time.sleep(espera)
+
+    temporal.unlink(missing_ok=True)
+    return None
 
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
 
-        return True
+class DescargadorImagenes:
+    """
+    Descarga un conjunto de imagenes con concurrencia acotada y manifiesto de reanudacion
 
-    except Exception as e:
-        print(f"[ERROR] No se pudo descargar {url}: {e}")
-        return False
+    El manifiesto (manifest.jsonl en el directorio de salida) agrega una linea
+    por archivo completado con su URL, hash y tamano. Un archivo se omite si
+    existe, proviene de la misma URL y su hash coincide con el del manifiesto.
+    """
+
+    def __init__(
+        self,
+        directorio: Path,
+        sesion: Optional[requests.Session] = None,
+        hilos: int = 8,
+        timeout: float = 10,
+        reintentos: int = 3,
+        backoff_s: float = 0.5,
+        url_base: Optional[str] = None
+    ):
+        """
+        Args:
+            directorio: Directorio de salida
+            sesion: Sesion HTTP (por defecto una con pool de `hilos` conexiones)
+            hilos: Descargas simultaneas
+            timeout: Timeout por solicitud (s)
+            reintentos: Reintentos por imagen
+            backoff_s: Espera base entre reintentos (s)
+            url_base: Servidor alternativo (esquema://host[:puerto]) que reemplaza al de cada URL
+        """
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.sesion = sesion or crear_sesion(hilos)
+        self.hilos = hilos
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.backoff_s = backoff_s
+        self.url_base = url_base
+
+        self.ruta_manifiesto = self.directorio / NOMBRE_MANIFIESTO
+        self._lock_manifiesto = threading.Lock()
+        self.manifiesto = self._cargar_manifiesto()
+
+    def descargar(self, tareas: List[Tuple[str, str]]) -> Dict:
+        """
+        Descarga las tareas [(url, nombre_archivo)]
+
+        Returns:
+            Resumen con descargadas, omitidas, fallidas, bytes y duracion
+        """
+        inicio = time.perf_counter()
+        resumen = {'descargadas': 0, 'omitidas': 0, 'fallidas': 0, 'bytes': 0}
+
+        pendientes = []
+        for url, nombre in tareas:
+            if self._ya_descargada(url, nombre):
+                resumen['omitidas'] += 1
+            else:
+                pendientes.append((url, nombre))
+
+        if resumen['omitidas']:
+            print(f"[INFO] {resumen['omitidas']} imagenes ya descargadas (hash verificado)")
+
+        with ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="descarga") as pool:
+            futuros = {
+                pool.submit(self._descargar_una, url, nombre): nombre
+                for url, nombre in pendientes
+            }
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                nombre = futuros[futuro]
+                resultado = futuro.result()
+                if resultado is None:
+                    resumen['fallidas'] += 1
+                    print(f"[{i}/{len(pendientes)}] [ERROR] {nombre}")
+                else:
+                    resumen['descargadas'] += 1
+                    resumen['bytes'] += resultado
+                    print(f"[{i}/{len(pendientes)}] [OK] {nombre} ({resultado / 1024:.1f} KB)")
+
+        resumen['duracion_s'] = round(time.perf_counter() - inicio, 3)
+        return resumen
+
+    def cerrar(self):
+        self.sesion.close()
+
+    def _descargar_una(self, url: str, nombre: str) -> Optional[int]:
+        """Descarga una imagen y la registra en el manifiesto; retorna los bytes escritos"""
+        resultado = descargar_imagen(
+            cambiar_base(url, self.url_base),
+            self.directorio / nombre,
+            sesion=self.sesion,
+            timeout=self.timeout,
+            reintentos=self.reintentos,
+            backoff_s=self.backoff_s
+        )
+        if resultado is None:
+            return None
+
+        sha256, total = resultado
+        self._registrar(nombre, {'archivo': nombre, 'url': url, 'sha256': sha256, 'bytes': total})
+        return total
+
+    def _ya_descargada(self, url: str, nombre: str) -> bool:
+        entrada = self.manifiesto.get(nombre)
+        ruta = self.directorio / nombre
+        # Mismo nombre con otra URL (otro muestreo del dataset): se vuelve a descargar
+        if entrada is None or entrada.get('url') != url or not ruta.exists():
+            return False
+        # Comparar el tamano primero evita leer archivos que claramente cambiaron
+        return ruta.stat().st_size == entrada['bytes'] and hash_archivo(ruta) == entrada['sha256']
+
+    def _registrar(self, nombre: str, entrada: Dict):
+        """Agrega una linea al manifiesto (append: un corte no pierde las anteriores)"""
+        with self._lock_manifiesto:
+            self.manifiesto[nombre] = entrada
+            with open(self.ruta_manifiesto, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada) + '\n')
+
+    def _cargar_manifiesto(self) -> Dict[str, Dict]:
+        """Entradas del manifiesto por archivo (la ultima linea de cada archivo manda)"""
+        manifiesto = {}
+        if not self.ruta_manifiesto.exists():
+            return manifiesto
+
+        with open(self.ruta_manifiesto, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    entrada = json.loads(linea)
+                    manifiesto[entrada['archivo']] = entrada
+                except (ValueError, KeyError):
+                    # Linea incompleta de una ejecucion interrumpida
+                    continue
+        return manifiesto
 
 
 def main():
     """Funcion principal"""
+    parser = argparse.ArgumentParser(description="Descarga imagenes del dataset de Roboflow")
+    parser.add_argument('--jsonl', type=Path,
+                        default=Path("../basketball-jersey-numbers-ocr.v7i.openai") / "_annotations.train.jsonl",
+                        help="Archivo de anotaciones JSONL")
+    parser.add_argument('--salida', type=Path, default=Path("./sample_images"))
+    parser.add_argument('--max-imagenes', type=int, default=10, help="0 = todas")
+    parser.add_argument('--por-numero', type=int, default=None,
+                        help="Subconjunto balanceado: hasta N imagenes por numero")
+    parser.add_argument('--hilos', type=int, default=8, help="Descargas simultaneas")
+    parser.add_argument('--reintentos', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--url-base', default=None,
+                        help="Servidor alternativo que reemplaza al de las URLs (ej. http://localhost:8000)")
+    args = parser.parse_args()
+
     print("=" * 70)
     print("DESCARGA DE IMAGENES DE MUESTRA")
     print("=" * 70)
 
-    # Rutas
-    dataset_dir = Path("../basketball-jersey-numbers-ocr.v7i.openai")
-    jsonl_file = dataset_dir / "_annotations.train.jsonl"
-
-    output_dir = Path("./sample_images")
-    output_dir.mkdir(exist_ok=True)
+    jsonl_file = args.jsonl
+    output_dir = args.salida
 
     # Verificar que existe el archivo
     if not jsonl_file.exists():
@@ -93,30 +325,41 @@ def main():
         return
 
     print(f"\nExtrayendo URLs de: {jsonl_file}")
-    urls = extraer_urls_imagenes(str(jsonl_file), max_imagenes=10)
+    urls = extraer_urls_imagenes(
+        str(jsonl_file),
+        max_imagenes=args.max_imagenes or None,
+        por_numero=args.por_numero
+    )
 
     print(f"[OK] Se encontraron {len(urls)} imagenes")
     print(f"\nDescargando imagenes a: {output_dir.absolute()}")
     print("-" * 70)
 
-    # Descargar imagenes
-    exitosas = 0
-
-    for i, (url, numero) in enumerate(urls, 1):
-        filename = f"jersey_{numero}_{i:02d}.jpg"
-        output_path = output_dir / filename
-
-        print(f"[{i}/{len(urls)}] Descargando: {filename} (Numero: {numero})")
-
-        if descargar_imagen(url, output_path):
-            exitosas += 1
-            print(f"         [OK] Guardado en {output_path}")
+    tareas = [
+        (url, f"jersey_{numero}_{i:02d}.jpg")
+        for i, (url, numero) in enumerate(urls, 1)
+    ]
+
+    descargador = DescargadorImagenes(
+        output_dir,
+        hilos=args.hilos,
+        timeout=args.timeout,
+        reintentos=args.reintentos,
+        url_base=args.url_base
+    )
+    try:
+        resumen = descargador.descargar(tareas)
+    finally:
+        descargador.cerrar()
 
     # Resumen
     print("\n" + "=" * 70)
     print(f"DESCARGA COMPLETADA")
     print("=" * 70)
-    print(f"Imagenes descargadas: {exitosas}/{len(urls)}")
+    print(f"Imagenes descargadas: {resumen['descargadas']}/{len(urls)}")
+    print(f"Ya presentes: {resumen['omitidas']}")
+    print(f"Fallidas: {resumen['fallidas']}")
+    print(f"Duracion: {resumen['duracion_s']:.2f} s ({resumen['bytes'] / 1e6:.1f} MB)")
     print(f"Ubicacion: {output_dir.absolute()}")
     print("\nAhora puedes usar estas imagenes para probar la interfaz Gradio")
     print("=" * 70)
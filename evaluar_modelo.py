@@ -0,0 +1,416 @@
+"""
+Evaluacion de exactitud y rendimiento contra datos etiquetados
+- Etiquetas desde el nombre del archivo (jersey_28.jpg, jersey_28_03.jpg -> "28")
+  o desde el JSONL de anotaciones (respuesta del asistente)
+- Inferencia en paralelo con un pool de hilos, sin cache de resultados
+- Exactitud exacta por numero, percentiles de latencia y throughput en un solo reporte
+- Comparacion de dos configuraciones (umbral, backend, tamano de entrada)
+
+Uso:
+    python evaluar_modelo.py --directorio sample_images
+    python evaluar_modelo.py --jsonl _annotations.valid.jsonl --por-numero 10 --hilos 8
+    python evaluar_modelo.py --directorio sample_images --comparar "umbral=0.6,tam_entrada=480"
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from anotaciones import LectorAnotaciones
+from arranque import importar_perezoso
+from backends import agregar_argumentos_backend, backend_desde_argumentos
+from basketball_jersey_analyzer import CONFIANZA_INFERENCIA
+from cache_inferencia import CacheInferencia
+from detecciones import Detecciones
+from exportacion import EscritorDetecciones
+from instrumentacion import configurar_logging
+from preprocesamiento import MODOS, Preprocesador
+
+
+# jersey_<numero>.jpg o jersey_<numero>_<indice>.jpg (nombres de download_sample_images.py)
+PATRON_ETIQUETA = re.compile(r'^jersey_(\d+)(?:_\d+)?$')
+
+COLUMNAS_PREDICCIONES = ['config', 'muestra', 'etiqueta', 'prediccion', 'confianza', 'latencia_ms']
+
+# Claves que se pueden cambiar con --comparar y su tipo
+CLAVES_CONFIG = {'umbral': float, 'backend': str, 'tam_entrada': int, 'modo': str}
+
+
+class Muestra(NamedTuple):
+    """Imagen RGB con su numero verdadero"""
+    id: str
+    etiqueta: str
+    imagen: np.ndarray
+
+
+def etiqueta_desde_nombre(ruta: Path) -> Optional[str]:
+    """Numero codificado en el nombre del archivo (None si no sigue el patron)"""
+    coincidencia = PATRON_ETIQUETA.match(Path(ruta).stem)
+    return coincidencia.group(1) if coincidencia else None
+
+
+def cargar_directorio(directorio: Path, hilos: int = 4) -> List[Muestra]:
+    """Imagenes del directorio cuyo nombre tiene etiqueta"""
+    from procesar_directorio import decodificar_imagen, listar_imagenes
+
+    todas = listar_imagenes(directorio)
+    rutas = [r for r in todas if etiqueta_desde_nombre(r) is not None]
+    omitidas = len(todas) - len(rutas)
+    if omitidas:
+        print(f"[INFO] {omitidas} imagenes sin etiqueta en el nombre (se omiten)")
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        imagenes = list(pool.map(decodificar_imagen, rutas))
+
+    return [
+        Muestra(ruta.name, etiqueta_desde_nombre(ruta), imagen)
+        for ruta, imagen in zip(rutas, imagenes)
+        if imagen is not None
+    ]
+
+
+def cargar_jsonl(
+    ruta: Path,
+    por_numero: Optional[int] = None,
+    max_imagenes: Optional[int] = None,
+    semilla: int = 0,
+    hilos: int = 8,
+    url_base: Optional[str] = None
+) -> List[Muestra]:
+    """
+    Descarga a memoria las imagenes del JSONL de anotaciones (o un muestreo balanceado)
+
+    Args:
+        ruta: Archivo _annotations.*.jsonl
+        por_numero: Hasta N imagenes por numero (None = todas)
+        max_imagenes: Limite total
+        semilla: Semilla del muestreo
+        hilos: Descargas simultaneas
+        url_base: Servidor alternativo para las URLs (ver download_sample_images.py)
+    """
+    from download_sample_images import cambiar_base, crear_sesion
+
+    cv2 = importar_perezoso('cv2')
+    lector = LectorAnotaciones(ruta)
+
+    if por_numero is not None:
+        indices = lector.muestreo_estratificado(por_numero, semilla)
+    else:
+        indices = list(range(len(lector)))
+    if max_imagenes is not None:
+        indices = indices[:max_imagenes]
+
+    anotaciones = [a for a in lector.anotaciones(indices) if a.numero is not None]
+    sesion = crear_sesion(hilos)
+
+    def descargar(anotacion) -> Optional[np.ndarray]:
+        try:
+            respuesta = sesion.get(cambiar_base(anotacion.url, url_base), timeout=10)
+            respuesta.raise_for_status()
+        except Exception as e:
+            print(f"[ERROR] No se pudo descargar {anotacion.url}: {e}")
+            return None
+        imagen = cv2.imdecode(np.frombuffer(respuesta.content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return None if imagen is None else cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+    try:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            imagenes = list(pool.map(descargar, anotaciones))
+    finally:
+        sesion.close()
+
+    return [
+        Muestra(f"{ruta.name}:{a.indice}", str(a.numero).strip(), imagen)
+        for a, imagen in zip(anotaciones, imagenes)
+        if imagen is not None
+    ]
+
+
+def inferir_muestras(analyzer, muestras: List[Muestra], hilos: int) -> Tuple[List[Detecciones], List[float], float]:
+    """
+    Inferencia cruda de todas las muestras en paralelo
+
+    Returns:
+        (detecciones por muestra, latencia por muestra en s, duracion total en s)
+    """
+    def inferir(muestra: Muestra):
+        inicio = time.perf_counter()
+        detecciones = analyzer.inferir_crudo(muestra.imagen)
+        return detecciones, time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="evaluacion") as pool:
+        resultados = list(pool.map(inferir, muestras))
+    duracion = time.perf_counter() - inicio
+
+    return [r[0] for r in resultados], [r[1] for r in resultados], duracion
+
+
+def prediccion(detecciones: Detecciones, umbral: float) -> Tuple[Optional[str], float]:
+    """Numero de mayor confianza sobre el umbral (None si no hay)"""
+    filtradas = detecciones.filtrar(umbral)
+    if not filtradas:
+        return None, 0.0
+    mejor = int(np.argmax(filtradas.datos['confianza']))
+    return str(filtradas.datos['numero'][mejor]), round(float(filtradas.datos['confianza'][mejor]), 3)
+
+
+def resumir(
+    muestras: List[Muestra],
+    predicciones: List[Tuple[Optional[str], float]],
+    latencias: List[float],
+    duracion: float
+) -> Dict:
+    """Exactitud global y por numero, latencias y throughput"""
+    por_numero: Dict[str, List[int]] = {}
+    aciertos = sin_deteccion = 0
+    for muestra, (numero, _) in zip(muestras, predicciones):
+        acierto = numero == muestra.etiqueta
+        aciertos += acierto
+        sin_deteccion += numero is None
+        conteo = por_numero.setdefault(muestra.etiqueta, [0, 0])
+        conteo[0] += 1
+        conteo[1] += acierto
+
+    total = len(muestras)
+    latencias_ms = np.asarray(latencias, dtype=np.float64) * 1000 if latencias else np.zeros(1)
+    p50, p95, p99 = np.percentile(latencias_ms, [50, 95, 99])
+
+    return {
+        'muestras': total,
+        'aciertos': aciertos,
+        'exactitud': round(aciertos / total, 4) if total else 0.0,
+        'sin_deteccion': sin_deteccion,
+        'por_numero': {
+            numero: {'muestras': n, 'aciertos': a, 'exactitud': round(a / n, 4)}
+            for numero, (n, a) in sorted(por_numero.items(), key=lambda item: (len(item[0]), item[0]))
+        },
+        'latencia': {
+            'media_ms': round(float(latencias_ms.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3)
+        },
+        'duracion_s': round(duracion, 3),
+        'imagenes_por_segundo': round(total / duracion, 2) if duracion > 0 else 0.0
+    }
+
+
+def validar_umbral(umbral: float):
+    """El modelo infiere a CONFIANZA_INFERENCIA: un umbral menor no tendria efecto"""
+    if not CONFIANZA_INFERENCIA <= umbral <= 1.0:
+        raise ValueError(f"umbral debe estar entre {CONFIANZA_INFERENCIA} y 1 (recibido {umbral})")
+
+
+def parsear_config(texto: str, base: Dict) -> Dict:
+    """'umbral=0.6,tam_entrada=480' aplicado sobre la configuracion base"""
+    config = dict(base)
+    for par in filter(None, (p.strip() for p in texto.split(','))):
+        clave, _, valor = par.partition('=')
+        clave = clave.strip().replace('-', '_')
+        if clave not in CLAVES_CONFIG:
+            raise ValueError(f"Clave de configuracion desconocida: {clave} (opciones: {list(CLAVES_CONFIG)})")
+        config[clave] = CLAVES_CONFIG[clave](valor.strip())
+    validar_umbral(config['umbral'])
+    if config['modo'] not in MODOS:
+        raise ValueError(f"Modo de preprocesamiento desconocido: {config['modo']} (opciones: {MODOS})")
+    return config
+
+
+def crear_analizador(args, config: Dict):
+    """JerseyAnalyzer para una configuracion, sin cache para medir cada inferencia"""
+    from basketball_jersey_analyzer import JerseyAnalyzer
+
+    opciones = argparse.Namespace(**vars(args))
+    opciones.backend = config['backend']
+    return JerseyAnalyzer(
+        api_key=args.api_key or None,
+        model_id=args.model_id,
+        backend=backend_desde_argumentos(opciones),
+        cache=CacheInferencia(max_bytes=0),
+        preprocesador=Preprocesador(config['tam_entrada'], config['modo'])
+    )
+
+
+def evaluar_configuraciones(args, configs: List[Dict], muestras: List[Muestra], escritor=None) -> List[Dict]:
+    """
+    Evalua cada configuracion sobre las mismas muestras
+
+    Configuraciones que solo difieren en el umbral reutilizan la misma
+    inferencia (el modelo siempre infiere al umbral minimo).
+
+    Con un backend que no es seguro entre hilos las llamadas al modelo se
+    serializan de todos modos: se evalua con un solo hilo para que la latencia
+    por imagen no incluya la espera por el lock del modelo.
+    """
+    inferencias = {}
+    reportes = []
+
+    for config in configs:
+        clave = (config['backend'], config['tam_entrada'], config['modo'])
+        if clave not in inferencias:
+            analyzer = crear_analizador(args, config)
+            hilos = args.hilos if analyzer.backend.seguro_entre_hilos else 1
+            if hilos < args.hilos:
+                print(f"[INFO] Backend {config['backend']} no es seguro entre hilos: se evalua con 1 hilo")
+            try:
+                inferencias[clave] = (*inferir_muestras(analyzer, muestras, hilos), hilos)
+            finally:
+                analyzer.cerrar()
+        detecciones, latencias, duracion, hilos = inferencias[clave]
+
+        predicciones = [prediccion(d, config['umbral']) for d in detecciones]
+        reporte = {
+            'config': config,
+            'hilos': hilos,
+            'confianza_inferencia': CONFIANZA_INFERENCIA,
+            **resumir(muestras, predicciones, latencias, duracion)
+        }
+        reportes.append(reporte)
+
+        if escritor is not None:
+            escritor.escribir(
+                (config['nombre'], m.id, m.etiqueta, numero, confianza, round(latencia * 1000, 3))
+                for m, (numero, confianza), latencia in zip(muestras, predicciones, latencias)
+            )
+
+    return reportes
+
+
+def formatear_reportes(reportes: List[Dict]) -> List[str]:
+    """Tabla de resultados (una columna por configuracion)"""
+    ancho = 14
+    nombres = [r['config']['nombre'] for r in reportes]
+    lineas = [f"{'':<22}" + "".join(f"{n:>{ancho}}" for n in nombres)]
+
+    filas = [
+        ('Muestras', lambda r: f"{r['muestras']}"),
+        ('Umbral', lambda r: f"{r['config']['umbral']:.2f}"),
+        ('Hilos', lambda r: f"{r['hilos']}"),
+        ('Exactitud', lambda r: f"{r['exactitud']:.2%}"),
+        ('Sin deteccion', lambda r: f"{r['sin_deteccion']}"),
+        ('Latencia p50 (ms)', lambda r: f"{r['latencia']['p50_ms']:.2f}"),
+        ('Latencia p95 (ms)', lambda r: f"{r['latencia']['p95_ms']:.2f}"),
+        ('Latencia p99 (ms)', lambda r: f"{r['latencia']['p99_ms']:.2f}"),
+        ('Imagenes/s', lambda r: f"{r['imagenes_por_segundo']:.2f}")
+    ]
+    for titulo, valor in filas:
+        lineas.append(f"{titulo:<22}" + "".join(f"{valor(r):>{ancho}}" for r in reportes))
+
+    lineas += ["", "EXACTITUD POR NUMERO"]
+    numeros = list(reportes[0]['por_numero'])
+    for numero in numeros:
+        celdas = []
+        for r in reportes:
+            fila = r['por_numero'][numero]
+            celdas.append(f"{fila['aciertos']}/{fila['muestras']} {fila['exactitud']:.0%}")
+        lineas.append(f"  {numero:<20}" + "".join(f"{c:>{ancho}}" for c in celdas))
+
+    if len(reportes) == 2:
+        a, b = reportes
+        lineas += [
+            "",
+            f"Diferencia ({b['config']['nombre']} - {a['config']['nombre']}): "
+            f"exactitud {100 * (b['exactitud'] - a['exactitud']):+.2f} pp, "
+            f"p50 {b['latencia']['p50_ms'] - a['latencia']['p50_ms']:+.2f} ms, "
+            f"throughput {b['imagenes_por_segundo'] - a['imagenes_por_segundo']:+.2f} imagenes/s"
+        ]
+
+    return lineas
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Evalua exactitud y rendimiento contra datos etiquetados")
+    fuente = parser.add_mutually_exclusive_group(required=True)
+    fuente.add_argument('--directorio', type=Path, help="Imagenes jersey_<numero>[_<i>].jpg")
+    fuente.add_argument('--jsonl', type=Path, help="Anotaciones _annotations.*.jsonl de Roboflow")
+    parser.add_argument('--por-numero', type=int, default=None, help="Con --jsonl: hasta N imagenes por numero")
+    parser.add_argument('--max-imagenes', type=int, default=None)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--url-base', default=None, help="Con --jsonl: servidor alternativo de las imagenes")
+    parser.add_argument('--api-key', default=os.environ.get('ROBOFLOW_API_KEY', ''),
+                        help="Roboflow API key (por defecto $ROBOFLOW_API_KEY; opcional si el modelo esta en cache)")
+    parser.add_argument('--model-id', default="basketball-jersey-numbers-ocr/7")
+    parser.add_argument('--umbral', type=float, default=0.4,
+                        help=f"Confianza minima ({CONFIANZA_INFERENCIA}-1; el modelo infiere a {CONFIANZA_INFERENCIA})")
+    parser.add_argument('--tam-entrada', type=int, default=640, help="Lado de entrada del preprocesamiento")
+    parser.add_argument('--modo', choices=MODOS, default='reducir', help="Modo de preprocesamiento")
+    parser.add_argument('--hilos', type=int, default=4,
+                        help="Inferencias simultaneas (1 si el backend no es seguro entre hilos)")
+    parser.add_argument('--comparar', default=None,
+                        help='Segunda configuracion, ej. "umbral=0.6,tam_entrada=480,backend=onnx"')
+    parser.add_argument('--salida', type=Path, default=Path('./outputs/evaluacion.json'),
+                        help="Reporte JSON")
+    parser.add_argument('--predicciones', type=Path, default=None,
+                        help="Prediccion por imagen (.csv, .jsonl, .parquet o .arrow)")
+    agregar_argumentos_backend(parser)
+    args = parser.parse_args()
+
+    configurar_logging()
+
+    base = {
+        'nombre': 'A',
+        'umbral': args.umbral,
+        'backend': args.backend,
+        'tam_entrada': args.tam_entrada,
+        'modo': args.modo
+    }
+    try:
+        validar_umbral(args.umbral)
+    except ValueError as e:
+        parser.error(str(e))
+
+    configs = [base]
+    if args.comparar:
+        try:
+            configs.append(dict(parsear_config(args.comparar, base), nombre='B'))
+        except ValueError as e:
+            parser.error(str(e))
+
+    print("=" * 70)
+    print("EVALUACION DEL MODELO")
+    print("=" * 70)
+
+    if args.directorio is not None:
+        muestras = cargar_directorio(args.directorio)
+        if args.max_imagenes is not None:
+            muestras = muestras[:args.max_imagenes]
+    else:
+        muestras = cargar_jsonl(
+            args.jsonl, args.por_numero, args.max_imagenes, args.semilla, url_base=args.url_base
+        )
+
+    if not muestras:
+        print("[ERROR] No hay imagenes etiquetadas para evaluar")
+        return
+
+    print(f"[INFO] {len(muestras)} imagenes etiquetadas, {len(configs)} configuraciones, {args.hilos} hilos")
+
+    escritor = None
+    if args.predicciones is not None:
+        escritor = EscritorDetecciones(args.predicciones, COLUMNAS_PREDICCIONES)
+    try:
+        reportes = evaluar_configuraciones(args, configs, muestras, escritor)
+    finally:
+        if escritor is not None:
+            escritor.cerrar()
+
+    print("\n" + "\n".join(formatear_reportes(reportes)))
+
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    args.salida.write_text(json.dumps({'reportes': reportes}, indent=2), encoding='utf-8')
+    print(f"\nReporte: {args.salida}")
+    if args.predicciones is not None:
+        print(f"Predicciones: {args.predicciones}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Exportacion de detecciones en streaming
+- Columnas planas (numero, confianza, x, y, width, height), sin el repr de bbox
+- Formatos: CSV, JSONL y columnares Parquet / Arrow IPC (requieren pyarrow)
+- Las filas se escriben a medida que llegan; los formatos columnares
+  se escriben por bloques de `tamano_bloque` filas
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from detecciones import COLUMNAS, Detecciones
+
+
+FORMATOS = ('csv', 'jsonl', 'parquet', 'arrow')
+
+_EXTENSIONES = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow'
+}
+
+# Tipos de las columnas conocidas en los formatos columnares (el resto se infiere)
+_TIPOS_ARROW = {
+    'numero': 'string',
+    'confianza': 'float32',
+    'x': 'int32',
+    'y': 'int32',
+    'width': 'int32',
+    'height': 'int32',
+    'archivo': 'string',
+    'frame': 'int64',
+    'tiempo_s': 'float64'
+}
+
+
+def formato_desde_ruta(ruta: Path) -> str:
+    """Formato segun la extension del archivo (csv si no se reconoce)"""
+    return _EXTENSIONES.get(Path(ruta).suffix.lower(), 'csv')
+
+
+def filas_detecciones(
+    detecciones: Union[Detecciones, Iterable[Dict]],
+    prefijo: Sequence = ()
+) -> Iterable[tuple]:
+    """
+    Filas planas (*prefijo, numero, confianza, x, y, width, height)
+
+    Acepta Detecciones o diccionarios {'numero', 'confianza', 'bbox': {...}},
+    estos ultimos sin construir una lista intermedia.
+    """
+    prefijo = tuple(prefijo)
+    if isinstance(detecciones, Detecciones):
+        for fila in detecciones.filas():
+            yield prefijo + fila
+        return
+
+    for det in detecciones:
+        bbox = det.get('bbox') or {}
+        yield prefijo + (
+            det['numero'],
+            round(float(det['confianza']), 3),
+            bbox.get('x', 0),
+            bbox.get('y', 0),
+            bbox.get('width', 0),
+            bbox.get('height', 0)
+        )
+
+
+class EscritorDetecciones:
+    """
+    Escritor incremental de filas de detecciones
+
+    Uso:
+        with EscritorDetecciones(Path("resultados.parquet"), ['archivo'] + COLUMNAS) as escritor:
+            escritor.escribir(filas)
+    """
+
+    def __init__(
+        self,
+        ruta: Path,
+        columnas: Sequence[str] = COLUMNAS,
+        formato: Optional[str] = None,
+        tamano_bloque: int = 10000
+    ):
+        """
+        Args:
+            ruta: Archivo de salida
+            columnas: Nombres de las columnas, en el orden de las filas
+            formato: csv, jsonl, parquet o arrow (por defecto segun la extension)
+            tamano_bloque: Filas por bloque en los formatos columnares
+        """
+        self.ruta = Path(ruta)
+        self.columnas = list(columnas)
+        self.formato = formato or formato_desde_ruta(self.ruta)
+        self.tamano_bloque = tamano_bloque
+        self.filas_escritas = 0
+
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {self.formato} (opciones: {FORMATOS})")
+
+        self._pa = None
+        self._esquema = None
+        self._escritor_columnar = None
+        self._bloque: List[Sequence] = []
+
+        if self.formato in ('parquet', 'arrow'):
+            try:
+                import pyarrow
+            except ImportError:
+                raise ImportError(
+                    f"El formato {self.formato} requiere pyarrow (pip install pyarrow)"
+                ) from None
+            self._pa = pyarrow
+
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        if self.formato in ('csv', 'jsonl'):
+            self._archivo = open(self.ruta, 'w', newline='', encoding='utf-8')
+            if self.formato == 'csv':
+                self._csv = csv.writer(self._archivo)
+                self._csv.writerow(self.columnas)
+
+    def escribir(self, filas: Iterable[Sequence]):
+        """Escribe filas (cualquier iterable, se consume una sola vez)"""
+        if self.formato == 'csv':
+            for fila in filas:
+                self._csv.writerow(fila)
+                self.filas_escritas += 1
+
+        elif self.formato == 'jsonl':
+            columnas = self.columnas
+            escribir = self._archivo.write
+            for fila in filas:
+                escribir(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False))
+                escribir('\n')
+                self.filas_escritas += 1
+
+        else:
+            for fila in filas:
+                self._bloque.append(fila)
+                if len(self._bloque) >= self.tamano_bloque:
+                    self._vaciar_bloque()
+
+    def cerrar(self):
+        """Escribe el ultimo bloque y cierra el archivo"""
+        if self.formato in ('csv', 'jsonl'):
+            if not self._archivo.closed:
+                self._archivo.close()
+            return
+
+        if self._bloque or self._escritor_columnar is None:
+            self._vaciar_bloque()
+        if self._escritor_columnar is not None:
+            self._escritor_columnar.close()
+            self._escritor_columnar = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def _vaciar_bloque(self):
+        """Convierte el bloque pendiente en un RecordBatch y lo escribe"""
+        pa = self._pa
+        columnas_datos = list(zip(*self._bloque)) if self._bloque else [()] * len(self.columnas)
+
+        if self._esquema is None:
+            arreglos = []
+            for nombre, datos in zip(self.columnas, columnas_datos):
+                # Columnas desconocidas: tipo inferido del primer bloque (string si esta vacio)
+                tipo = _TIPOS_ARROW.get(nombre) or (None if datos else 'string')
+                arreglos.append(pa.array(datos, type=tipo))
+            lote = pa.RecordBatch.from_arrays(arreglos, names=self.columnas)
+            self._esquema = lote.schema
+            self._escritor_columnar = self._abrir_columnar()
+        else:
+            lote = pa.RecordBatch.from_arrays(
+                [pa.array(datos, type=campo.type) for datos, campo in zip(columnas_datos, self._esquema)],
+                schema=self._esquema
+            )
+
+        self._escritor_columnar.write_batch(lote)
+        self.filas_escritas += len(self._bloque)
+        self._bloque = []
+
+    def _abrir_columnar(self):
+        if self.formato == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(str(self.ruta), self._esquema)
+
+        import pyarrow.ipc as ipc
+        return ipc.new_file(str(self.ruta), self._esquema)
+
+
+def exportar_filas(
+    filas: Iterable[Sequence],
+    ruta: Path,
+    columnas: Sequence[str] = COLUMNAS,
+    formato: Optional[str] = None,
+    tamano_bloque: int = 10000
+) -> int:
+    """
+    Escribe un iterable de filas sin materializarlo
+
+    Returns:
+        Filas escritas
+    """
+    with EscritorDetecciones(ruta, columnas, formato, tamano_bloque) as escritor:
+        escritor.escribir(filas)
+    return escritor.filas_escritas
@@ -3,6 +3,10 @@ Fix para manejar respuestas VLM del modelo basketball-jersey-numbers-ocr/7
 Detecta el tipo de respuesta y extrae predicciones correctamente
 """
 
+from instrumentacion import logger
+from normalizacion import normalizar_respuesta
+
+
 def detectar_numeros_fixed(self, imagen, confianza_min=0.4):
     """
     Version corregida que maneja tanto YOLO como VLM responses
@@ -17,57 +21,12 @@ def detectar_numeros_fixed(self, imagen, confianza_min=0.4):
     if isinstance(resultado, list):
         resultado = resultado[0]
 
-    # Verificar tipo de respuesta
-    tipo_respuesta = type(resultado).__name__
-    print(f"[DEBUG] Tipo de respuesta: {tipo_respuesta}")
-
-    detecciones = []
-
-    # CASO 1: Respuesta VLM/LMM
-    if hasattr(resultado, 'response'):
-        # Para modelos VLM que retornan texto
-        texto_respuesta = getattr(resultado, 'response', '')
-        print(f"[INFO] Respuesta VLM: {texto_respuesta}")
-
-        # Extraer numero del texto
-        import re
-        numeros = re.findall(r'\d+', texto_respuesta)
-
-        if numeros:
-            # Crear deteccion mock con el numero extraido
-            detecciones.append({
-                'numero': numeros[0],
-                'confianza': 0.95,  # Confianza alta por defecto para VLM
-                'bbox': {
-                    'x': imagen.shape[1] // 2,
-                    'y': imagen.shape[0] // 2,
-                    'width': imagen.shape[1] // 2,
-                    'height': imagen.shape[0] // 2
-                }
-            })
-
-    # CASO 2: Respuesta YOLO estandar
-    elif hasattr(resultado, 'predictions'):
-        for pred in resultado.predictions:
-            detecciones.append({
-                'numero': pred.class_name,
-                'confianza': round(pred.confidence, 3),
-                'bbox': {
-                    'x': int(pred.x),
-                    'y': int(pred.y),
-                    'width': int(pred.width),
-                    'height': int(pred.height)
-                }
-            })
-
-    # CASO 3: Otro tipo de respuesta
-    else:
-        print(f"[ERROR] Tipo de respuesta desconocido: {tipo_respuesta}")
-        print(f"[DEBUG] Atributos disponibles: {dir(resultado)}")
-
-        # Intentar extraer cualquier prediccion
-        if hasattr(resultado, 'dict'):
-            print(f"[DEBUG] Contenido: {resultado.dict()}")
+    # Mismo normalizador que JerseyAnalyzer (despacho por tipo en cache;
+    # una deteccion por cada numero de una respuesta VLM). La caja VLM es la
+    # del analizador: centrada y de FRACCION_CAJA_VLM (0.6) del ancho y alto
+    detecciones = normalizar_respuesta(resultado, imagen.shape[0], imagen.shape[1]).a_dicts()
+    if not detecciones:
+        logger.info("Sin detecciones en la respuesta", extra={'datos': {'tipo': type(resultado).__name__}})
 
     # Visualizar (simplificado sin supervision para VLM)
     if detecciones:
@@ -0,0 +1,321 @@
+"""
+Historial de detecciones en SQLite (alternativa indexada a jersey_log.csv)
+- Inserciones por lotes dentro de una transaccion
+- Indices por timestamp y por (numero, timestamp)
+- Retencion por antiguedad con poda periodica
+- Migracion incremental desde jersey_log.csv
+
+Uso:
+    python historial_sqlite.py importar jersey_log.csv
+    python historial_sqlite.py contar --numero 23 --desde "2026-10-18 00:00:00"
+    python historial_sqlite.py podar --dias 180
+"""
+
+import argparse
+import csv
+import io
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from instrumentacion import logger
+
+
+RUTA_HISTORIAL = Path("./outputs/historial.sqlite")
+
+# Mismo formato que la columna Timestamp del log CSV (ordenable como texto)
+FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS detecciones (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    numero TEXT NOT NULL,
+    confianza REAL NOT NULL,
+    fuente TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detecciones_timestamp ON detecciones (timestamp);
+CREATE INDEX IF NOT EXISTS idx_detecciones_numero_timestamp ON detecciones (numero, timestamp);
+CREATE TABLE IF NOT EXISTS importaciones (
+    ruta TEXT PRIMARY KEY,
+    offset_bytes INTEGER NOT NULL,
+    filas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rangos_csv (
+    ruta TEXT NOT NULL,
+    desde INTEGER NOT NULL,
+    hasta INTEGER NOT NULL,
+    PRIMARY KEY (ruta, desde)
+);
+"""
+
+
+class HistorialSQLite:
+    """Almacen de detecciones en SQLite, seguro entre hilos"""
+
+    def __init__(
+        self,
+        ruta: Path = RUTA_HISTORIAL,
+        retencion_dias: Optional[float] = None,
+        intervalo_poda_s: float = 3600.0
+    ):
+        """
+        Args:
+            ruta: Archivo de la base de datos
+            retencion_dias: Antiguedad maxima de las filas (None = conservar todo)
+            intervalo_poda_s: Tiempo minimo entre podas automaticas al insertar
+        """
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.retencion_dias = retencion_dias
+        self.intervalo_poda_s = intervalo_poda_s
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(_ESQUEMA)
+        self._ultima_poda = 0.0
+
+        if self.retencion_dias is not None:
+            self.podar()
+
+    def agregar(self, filas: Sequence[Sequence], rango_csv: Optional[Tuple[str, int, int]] = None):
+        """
+        Inserta filas [timestamp, numero, confianza, fuente] en una sola transaccion
+
+        Mismo formato de fila que RegistroCSVAsincrono.agregar.
+
+        Args:
+            filas: Filas a insertar
+            rango_csv: (ruta, desde, hasta) bytes del log CSV donde se escribieron
+                las mismas filas; importar_csv los omite para no duplicarlas
+        """
+        if not filas:
+            return
+
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT INTO detecciones (timestamp, numero, confianza, fuente) VALUES (?, ?, ?, ?)",
+                ((str(f[0]), str(f[1]), float(f[2]), f[3] if len(f) > 3 else None) for f in filas)
+            )
+            if rango_csv is not None:
+                self._registrar_rango(*rango_csv)
+
+        if (self.retencion_dias is not None
+                and time.monotonic() - self._ultima_poda >= self.intervalo_poda_s):
+            self.podar()
+
+    def podar(self, antes_de: Optional[str] = None) -> int:
+        """
+        Elimina filas anteriores a `antes_de` (por defecto, fuera de la retencion)
+
+        Returns:
+            Filas eliminadas
+        """
+        if antes_de is None:
+            if self.retencion_dias is None:
+                return 0
+            antes_de = (datetime.now() - timedelta(days=self.retencion_dias)).strftime(FORMATO_TIMESTAMP)
+
+        with self._lock, self._conexion:
+            eliminadas = self._conexion.execute(
+                "DELETE FROM detecciones WHERE timestamp < ?", (antes_de,)
+            ).rowcount
+        self._ultima_poda = time.monotonic()
+
+        if eliminadas:
+            logger.info("Historial podado", extra={'datos': {'eliminadas': eliminadas, 'antes_de': antes_de}})
+        return eliminadas
+
+    def contar(
+        self,
+        numero: Optional[str] = None,
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None
+    ) -> int:
+        """Detecciones (de un numero, si se indica) en el rango [desde, hasta)"""
+        condiciones, parametros = self._filtros(numero, desde, hasta)
+        with self._lock:
+            return self._conexion.execute(
+                f"SELECT COUNT(*) FROM detecciones{condiciones}", parametros
+            ).fetchone()[0]
+
+    def contar_por_numero(
+        self,
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> List[tuple]:
+        """[(numero, detecciones, confianza_promedio)] ordenado por detecciones"""
+        condiciones, parametros = self._filtros(None, desde, hasta)
+        consulta = (
+            f"SELECT numero, COUNT(*), ROUND(AVG(confianza), 3) FROM detecciones{condiciones} "
+            "GROUP BY numero ORDER BY COUNT(*) DESC, numero"
+        )
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+
+        with self._lock:
+            return self._conexion.execute(consulta, parametros).fetchall()
+
+    def importar_csv(self, ruta_csv: Path, tamano_lote: int = 10000) -> int:
+        """
+        Importa jersey_log.csv en lotes transaccionales
+
+        Guarda el offset importado de cada archivo: volver a importar solo agrega
+        las filas nuevas (si el archivo se trunco, se importa desde el principio).
+        Las filas que RegistroCSVAsincrono escribio a la vez en el CSV y en este
+        historial se omiten.
+
+        Returns:
+            Filas importadas en esta llamada
+        """
+        ruta_csv = Path(ruta_csv)
+        clave = str(ruta_csv.resolve())
+
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT offset_bytes, filas FROM importaciones WHERE ruta = ?", (clave,)
+            ).fetchone()
+        offset, filas_previas = fila if fila is not None else (0, 0)
+        if offset > ruta_csv.stat().st_size:
+            # Archivo truncado o reemplazado: los rangos registrados ya no aplican
+            offset, filas_previas = 0, 0
+            with self._lock, self._conexion:
+                self._conexion.execute("DELETE FROM rangos_csv WHERE ruta = ?", (clave,))
+
+        # Rangos escritos en paralelo al CSV y al historial (ya estan en la base)
+        with self._lock:
+            rangos = self._conexion.execute(
+                "SELECT desde, hasta FROM rangos_csv WHERE ruta = ? AND hasta > ? ORDER BY desde",
+                (clave, offset)
+            ).fetchall()
+        indice_rango = 0
+
+        importadas = 0
+        with open(ruta_csv, 'rb') as f:
+            f.seek(offset)
+            lote = []
+            for linea in f:
+                # Una linea sin salto final puede estar a medio escribir
+                if not linea.endswith(b'\n'):
+                    break
+                inicio_linea = offset
+                offset += len(linea)
+
+                while indice_rango < len(rangos) and rangos[indice_rango][1] <= inicio_linea:
+                    indice_rango += 1
+                if indice_rango < len(rangos) and rangos[indice_rango][0] <= inicio_linea:
+                    continue
+
+                campos = next(csv.reader(io.StringIO(linea.decode('utf-8'))), None)
+                if not campos or campos[0] == 'Timestamp' or len(campos) < 3:
+                    continue
+                try:
+                    float(campos[2])
+                except ValueError:
+                    continue
+                lote.append(campos)
+
+                if len(lote) >= tamano_lote:
+                    importadas += self._importar_lote(clave, lote, offset, filas_previas + importadas)
+                    lote = []
+
+            importadas += self._importar_lote(clave, lote, offset, filas_previas + importadas)
+
+        return importadas
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+    def _importar_lote(self, clave: str, lote: List[List[str]], offset: int, filas_previas: int) -> int:
+        """Inserta un lote y avanza el offset en la misma transaccion"""
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT INTO detecciones (timestamp, numero, confianza, fuente) VALUES (?, ?, ?, ?)",
+                ((c[0], c[1], float(c[2]), c[3] if len(c) > 3 else None) for c in lote)
+            )
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO importaciones (ruta, offset_bytes, filas) VALUES (?, ?, ?)",
+                (clave, offset, filas_previas + len(lote))
+            )
+        return len(lote)
+
+    def _registrar_rango(self, ruta: str, desde: int, hasta: int):
+        """Agrega [desde, hasta) a los rangos del CSV, extendiendo el anterior si es contiguo"""
+        extendido = self._conexion.execute(
+            "UPDATE rangos_csv SET hasta = ? WHERE ruta = ? AND hasta = ?", (hasta, ruta, desde)
+        ).rowcount
+        if not extendido:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO rangos_csv (ruta, desde, hasta) VALUES (?, ?, ?)",
+                (ruta, desde, hasta)
+            )
+
+    @staticmethod
+    def _filtros(numero: Optional[str], desde: Optional[str], hasta: Optional[str]):
+        condiciones, parametros = [], []
+        if numero is not None:
+            condiciones.append("numero = ?")
+            parametros.append(str(numero))
+        if desde is not None:
+            condiciones.append("timestamp >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("timestamp < ?")
+            parametros.append(hasta)
+        texto = (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+        return texto, parametros
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Historial de detecciones en SQLite")
+    parser.add_argument('--base', type=Path, default=RUTA_HISTORIAL, help="Archivo SQLite")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_importar = sub.add_parser('importar', help="Importar (o continuar importando) un log CSV")
+    p_importar.add_argument('csv', type=Path, nargs='?', default=Path('./jersey_log.csv'))
+
+    p_contar = sub.add_parser('contar', help="Contar detecciones")
+    p_contar.add_argument('--numero', default=None, help="Solo este numero (si no, ranking por numero)")
+    p_contar.add_argument('--desde', default=None, help='"YYYY-MM-DD HH:MM:SS" (inclusive)')
+    p_contar.add_argument('--hasta', default=None, help='"YYYY-MM-DD HH:MM:SS" (exclusivo)')
+    p_contar.add_argument('--limite', type=int, default=20)
+
+    p_podar = sub.add_parser('podar', help="Eliminar filas antiguas")
+    p_podar.add_argument('--dias', type=float, required=True, help="Conservar solo los ultimos N dias")
+
+    args = parser.parse_args()
+    historial = HistorialSQLite(args.base)
+
+    try:
+        if args.comando == 'importar':
+            inicio = time.perf_counter()
+            filas = historial.importar_csv(args.csv)
+            print(f"[OK] {filas} filas importadas de {args.csv} en {time.perf_counter() - inicio:.2f} s")
+
+        elif args.comando == 'contar':
+            if args.numero is not None:
+                print(historial.contar(args.numero, args.desde, args.hasta))
+            else:
+                for numero, detecciones, confianza in historial.contar_por_numero(
+                    args.desde, args.hasta, args.limite
+                ):
+                    print(f"{numero:>6}  {detecciones:>10}  {confianza:.3f}")
+
+        elif args.comando == 'podar':
+            historial.retencion_dias = args.dias
+            print(f"[OK] {historial.podar()} filas eliminadas")
+    finally:
+        historial.cerrar()
+
+
+if __name__ == "__main__":
+    main()
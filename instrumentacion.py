@@ -0,0 +1,203 @@
+"""
+Instrumentacion del pipeline de deteccion
+- Logging estructurado por niveles (desactivado por defecto en la ruta critica)
+- Temporizadores por etapa con histogramas rodantes p50/p95/p99
+- Exportacion en formato de texto de Prometheus
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+
+NOMBRE_LOGGER = "jersey"
+
+logger = logging.getLogger(NOMBRE_LOGGER)
+logger.addHandler(logging.NullHandler())
+
+
+class FormateadorEstructurado(logging.Formatter):
+    """Una linea JSON por registro; los campos de `extra={'datos': {...}}` se incluyen tal cual"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            'ts': round(record.created, 3),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage()
+        }
+        datos = getattr(record, 'datos', None)
+        if datos:
+            registro.update(datos)
+        if record.exc_info:
+            registro['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+def configurar_logging(nivel: Optional[str] = None, estructurado: bool = True):
+    """
+    Activa la salida del logger del proyecto
+
+    Args:
+        nivel: DEBUG, INFO, WARNING... (por defecto $JERSEY_LOG_LEVEL o WARNING)
+        estructurado: JSON por linea (True) o texto plano (False)
+    """
+    nivel = (nivel or os.environ.get('JERSEY_LOG_LEVEL', 'WARNING')).upper()
+
+    handler = logging.StreamHandler()
+    if estructurado:
+        handler.setFormatter(FormateadorEstructurado())
+    else:
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+
+    for existente in list(logger.handlers):
+        if not isinstance(existente, logging.NullHandler):
+            logger.removeHandler(existente)
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+
+
+class HistogramaRodante:
+    """Ventana circular de las ultimas `capacidad` muestras con percentiles"""
+
+    def __init__(self, capacidad: int = 2048):
+        self._muestras = np.zeros(capacidad, dtype=np.float64)
+        self._capacidad = capacidad
+        self._posicion = 0
+        self._llenas = 0
+        self.total = 0
+        self.suma = 0.0
+
+    def registrar(self, valor: float):
+        self._muestras[self._posicion] = valor
+        self._posicion = (self._posicion + 1) % self._capacidad
+        self._llenas = min(self._llenas + 1, self._capacidad)
+        self.total += 1
+        self.suma += valor
+
+    def percentiles(self, cuantiles=(50, 95, 99)) -> Dict[int, float]:
+        """Percentiles sobre la ventana actual (0.0 si no hay muestras)"""
+        if self._llenas == 0:
+            return {q: 0.0 for q in cuantiles}
+        valores = np.percentile(self._muestras[:self._llenas], cuantiles)
+        return {q: float(v) for q, v in zip(cuantiles, valores)}
+
+
+class _Cronometro:
+    """Context manager devuelto por MedidorEtapas.etapa"""
+
+    __slots__ = ('_medidor', '_nombre', '_inicio')
+
+    def __init__(self, medidor: 'MedidorEtapas', nombre: str):
+        self._medidor = medidor
+        self._nombre = nombre
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._medidor.registrar(self._nombre, time.perf_counter() - self._inicio)
+        return False
+
+
+class _CronometroNulo:
+    """Cronometro sin costo cuando la medicion esta desactivada"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_CRONOMETRO_NULO = _CronometroNulo()
+
+
+class MedidorEtapas:
+    """Tiempos por etapa (s) con histogramas rodantes, seguro entre hilos"""
+
+    def __init__(self, capacidad: int = 2048, activo: bool = True):
+        """
+        Args:
+            capacidad: Muestras recientes conservadas por etapa
+            activo: False desactiva la medicion (etapa() no hace nada)
+        """
+        self.capacidad = capacidad
+        self.activo = activo
+        self._histogramas: Dict[str, HistogramaRodante] = {}
+        self._lock = threading.Lock()
+
+    def etapa(self, nombre: str):
+        """Uso: `with medidor.etapa('inferencia'): ...`"""
+        if not self.activo:
+            return _CRONOMETRO_NULO
+        return _Cronometro(self, nombre)
+
+    def registrar(self, nombre: str, segundos: float):
+        with self._lock:
+            histograma = self._histogramas.get(nombre)
+            if histograma is None:
+                histograma = self._histogramas[nombre] = HistogramaRodante(self.capacidad)
+            histograma.registrar(segundos)
+
+    def resumen(self) -> Dict[str, Dict]:
+        """{etapa: {n, media_ms, p50_ms, p95_ms, p99_ms}}"""
+        with self._lock:
+            resumen = {}
+            for nombre, histograma in self._histogramas.items():
+                p = histograma.percentiles()
+                resumen[nombre] = {
+                    'n': histograma.total,
+                    'media_ms': round(histograma.suma / histograma.total * 1000, 3),
+                    'p50_ms': round(p[50] * 1000, 3),
+                    'p95_ms': round(p[95] * 1000, 3),
+                    'p99_ms': round(p[99] * 1000, 3)
+                }
+            return resumen
+
+    def reiniciar(self):
+        with self._lock:
+            self._histogramas.clear()
+
+    def texto_prometheus(self, prefijo: str = "jersey") -> str:
+        """Metricas en formato de exposicion de texto de Prometheus (tipo summary)"""
+        nombre = f"{prefijo}_etapa_segundos"
+        lineas = [
+            f"# HELP {nombre} Duracion de cada etapa del pipeline de deteccion",
+            f"# TYPE {nombre} summary"
+        ]
+
+        with self._lock:
+            for etapa, histograma in sorted(self._histogramas.items()):
+                p = histograma.percentiles()
+                for q in (50, 95, 99):
+                    lineas.append(f'{nombre}{{etapa="{etapa}",quantile="{q / 100}"}} {p[q]:.6f}')
+                lineas.append(f'{nombre}_sum{{etapa="{etapa}"}} {histograma.suma:.6f}')
+                lineas.append(f'{nombre}_count{{etapa="{etapa}"}} {histograma.total}')
+
+        return "\n".join(lineas) + "\n"
+
+    def exportar_prometheus(self, ruta: Path, prefijo: str = "jersey") -> Path:
+        """
+        Escribe las metricas para el textfile collector de node_exporter
+
+        La escritura es atomica (archivo temporal + rename) para que el
+        recolector nunca lea un archivo a medio escribir.
+        """
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.texto_prometheus(prefijo))
+        os.replace(tmp, ruta)
+        return ruta
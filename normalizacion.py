@@ -0,0 +1,184 @@
+"""
+Normalizacion de respuestas del modelo a detecciones compactas
+- El manejador se resuelve una vez por tipo de respuesta y queda en cache
+- Respuestas YOLO (objetos con .predictions o JSON de la API HTTP) van
+  columna por columna al arreglo estructurado, sin diccionarios intermedios
+- Respuestas VLM (.response): se extraen todos los numeros del texto con
+  patrones precompilados
+"""
+
+import logging
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from detecciones import DTYPE_DETECCION, Detecciones
+from instrumentacion import logger
+from preprocesamiento import Transformacion
+
+
+# Numeros aislados en el texto del VLM ("#23", "23.", "numero 23")
+PATRON_NUMERO = re.compile(r'\b\d+\b')
+
+# Confianza asignada a los numeros leidos por un VLM (no reporta puntajes)
+CONFIANZA_VLM = 0.95
+
+# Fraccion de la imagen que ocupa la caja centrada de una deteccion VLM
+FRACCION_CAJA_VLM = 0.6
+
+Manejador = Callable[[object, int, int, Optional[Transformacion]], Detecciones]
+
+
+def numeros_en_texto(texto: str) -> List[str]:
+    """Todos los numeros del texto, sin repetir y en orden de aparicion"""
+    return list(dict.fromkeys(PATRON_NUMERO.findall(texto)))
+
+
+def desde_predicciones(predicciones) -> Detecciones:
+    """Lista de predicciones (class_name, confidence, x, y, width, height) -> Detecciones"""
+    datos = np.empty(len(predicciones), dtype=DTYPE_DETECCION)
+    if len(datos):
+        datos['numero'] = [p.class_name for p in predicciones]
+        datos['confianza'] = [p.confidence for p in predicciones]
+        datos['x'] = [p.x for p in predicciones]
+        datos['y'] = [p.y for p in predicciones]
+        datos['width'] = [p.width for p in predicciones]
+        datos['height'] = [p.height for p in predicciones]
+    return Detecciones(datos)
+
+
+def desde_predicciones_json(predicciones: List[Dict]) -> Detecciones:
+    """Predicciones en JSON de la API HTTP ('class' o 'class_name') -> Detecciones"""
+    datos = np.empty(len(predicciones), dtype=DTYPE_DETECCION)
+    if len(datos):
+        datos['numero'] = [p.get('class_name', p.get('class')) for p in predicciones]
+        datos['confianza'] = [p['confidence'] for p in predicciones]
+        datos['x'] = [p['x'] for p in predicciones]
+        datos['y'] = [p['y'] for p in predicciones]
+        datos['width'] = [p['width'] for p in predicciones]
+        datos['height'] = [p['height'] for p in predicciones]
+    return Detecciones(datos)
+
+
+def desde_texto_vlm(texto: str, alto: int, ancho: int) -> Detecciones:
+    """Una deteccion por numero del texto, con caja centrada (el VLM no localiza)"""
+    numeros = numeros_en_texto(texto)
+    if not numeros:
+        logger.debug("No se pudo extraer numero del texto")
+        return Detecciones()
+
+    n = len(numeros)
+    return Detecciones.desde_columnas(
+        numeros,
+        [CONFIANZA_VLM] * n,
+        [ancho // 2] * n,
+        [alto // 2] * n,
+        [int(ancho * FRACCION_CAJA_VLM)] * n,
+        [int(alto * FRACCION_CAJA_VLM)] * n
+    )
+
+
+def respuesta_a_json(resultado) -> Optional[Dict]:
+    """
+    Forma JSON de una respuesta del modelo (None si el tipo no se reconoce)
+
+    El diccionario resultante vuelve a normalizarse igual que la respuesta
+    original (ver _manejar_dict); lo usa el cache de inferencia.
+    """
+    if isinstance(resultado, dict):
+        return resultado
+    if hasattr(resultado, 'response'):
+        return {'response': str(resultado.response)}
+    if hasattr(resultado, 'predictions'):
+        return {'predictions': [
+            {
+                'class_name': str(p.class_name),
+                'confidence': float(p.confidence),
+                'x': float(p.x),
+                'y': float(p.y),
+                'width': float(p.width),
+                'height': float(p.height)
+            }
+            for p in resultado.predictions
+        ]}
+    return None
+
+
+def _manejar_vlm(resultado, alto: int, ancho: int, transformacion: Optional[Transformacion]) -> Detecciones:
+    texto = str(getattr(resultado, 'response', ''))
+    logger.debug("Respuesta VLM: %s", texto)
+    return desde_texto_vlm(texto, alto, ancho)
+
+
+def _manejar_yolo(resultado, alto: int, ancho: int, transformacion: Optional[Transformacion]) -> Detecciones:
+    detecciones = desde_predicciones(resultado.predictions)
+    # Cajas en coordenadas de la imagen enviada al modelo -> imagen original
+    return transformacion.a_original(detecciones) if transformacion is not None else detecciones
+
+
+def _manejar_dict(resultado: Dict, alto: int, ancho: int, transformacion: Optional[Transformacion]) -> Detecciones:
+    # Las claves varian entre respuestas: se revisan en cada llamada
+    if 'predictions' in resultado:
+        detecciones = desde_predicciones_json(resultado['predictions'])
+        return transformacion.a_original(detecciones) if transformacion is not None else detecciones
+    if 'response' in resultado:
+        return desde_texto_vlm(str(resultado['response']), alto, ancho)
+    logger.error("Respuesta JSON sin predicciones: claves %s", sorted(resultado))
+    return Detecciones()
+
+
+def _manejar_desconocido(resultado, alto: int, ancho: int, transformacion: Optional[Transformacion]) -> Detecciones:
+    logger.error("Tipo de respuesta desconocido: %s", type(resultado).__name__)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Atributos de la respuesta", extra={'datos': {'atributos': dir(resultado)}})
+    return Detecciones()
+
+
+class NormalizadorRespuestas:
+    """Convierte respuestas del modelo en Detecciones con despacho por tipo en cache"""
+
+    def __init__(self):
+        self._despacho: Dict[type, Manejador] = {dict: _manejar_dict}
+
+    def normalizar(
+        self,
+        resultado,
+        alto: int,
+        ancho: int,
+        transformacion: Optional[Transformacion] = None
+    ) -> Detecciones:
+        """
+        Args:
+            resultado: Respuesta del modelo para una imagen
+            alto, ancho: Dimensiones de la imagen original
+            transformacion: Relacion imagen original -> entrada del modelo (cajas YOLO)
+        """
+        tipo = type(resultado)
+        manejador = self._despacho.get(tipo)
+        if manejador is None:
+            manejador = self._despacho[tipo] = self._resolver(resultado)
+        return manejador(resultado, alto, ancho, transformacion)
+
+    @staticmethod
+    def _resolver(resultado) -> Manejador:
+        """Elige el manejador inspeccionando la primera respuesta de cada tipo"""
+        logger.debug("Tipo de respuesta: %s", type(resultado).__name__)
+        if hasattr(resultado, 'response'):
+            return _manejar_vlm
+        if hasattr(resultado, 'predictions'):
+            return _manejar_yolo
+        return _manejar_desconocido
+
+
+_NORMALIZADOR = NormalizadorRespuestas()
+
+
+def normalizar_respuesta(
+    resultado,
+    alto: int,
+    ancho: int,
+    transformacion: Optional[Transformacion] = None
+) -> Detecciones:
+    """Normaliza con el despacho compartido del proceso"""
+    return _NORMALIZADOR.normalizar(resultado, alto, ancho, transformacion)
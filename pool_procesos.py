@@ -0,0 +1,313 @@
+"""
+Pool de procesos trabajadores, cada uno con su propia replica del modelo
+- Las imagenes llegan a los trabajadores por bloques de multiprocessing.shared_memory
+  (una copia al bloque, sin serializar los pixeles)
+- Cada trabajador agrupa en lotes las tareas disponibles
+- Los resultados se entregan en el orden de envio
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+from detecciones import Detecciones
+from instrumentacion import logger
+from preprocesamiento import a_arreglo_rgb
+
+
+# Tamano inicial de cada bloque compartido (un frame 1080p RGB); crece si hace falta
+BYTES_RANURA = 1920 * 1080 * 3
+
+
+def _vista_imagen(segmentos: Dict[int, shared_memory.SharedMemory], ranura: int, nombre: str, forma, dtype):
+    """Arreglo sobre el bloque compartido de la ranura (se reabre si el bloque cambio)"""
+    shm = segmentos.get(ranura)
+    if shm is None or shm.name != nombre:
+        if shm is not None:
+            try:
+                shm.close()
+            except BufferError:
+                # Aun hay vistas vivas del bloque anterior: se libera con el recolector
+                pass
+        shm = segmentos[ranura] = shared_memory.SharedMemory(name=nombre)
+    return np.ndarray(forma, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _procesar_tareas(analyzer, segmentos, lote, resultados):
+    """Infiere un lote de tareas y publica un resultado por tarea"""
+    try:
+        imagenes = []
+        for _, ranura, nombre, forma, dtype, _, bgr in lote:
+            imagen = _vista_imagen(segmentos, ranura, nombre, forma, dtype)
+            imagenes.append(a_arreglo_rgb(imagen, bgr=bgr))
+
+        crudas = analyzer.inferir_crudo_lote(imagenes)
+        del imagenes
+
+        for (id_tarea, *_, confianza_min, _), detecciones in zip(lote, crudas):
+            resultados.put(('ok', id_tarea, analyzer.filtrar_detecciones(detecciones, confianza_min).datos))
+    except Exception as e:
+        for id_tarea, *_ in lote:
+            resultados.put(('error', id_tarea, f"{type(e).__name__}: {e}"))
+
+
+def _trabajador(fabrica: Callable, opciones: Dict, tareas, resultados, tamano_lote: int):
+    """Bucle de un proceso trabajador"""
+    try:
+        analyzer = fabrica(**opciones)
+    except Exception as e:
+        resultados.put(('error_carga', os.getpid(), f"{type(e).__name__}: {e}"))
+        return
+    resultados.put(('listo', os.getpid(), None))
+
+    segmentos: Dict[int, shared_memory.SharedMemory] = {}
+    activo = True
+    while activo:
+        tarea = tareas.get()
+        if tarea is None:
+            break
+
+        # Agrupar las tareas ya disponibles sin esperar a que lleguen mas
+        lote = [tarea]
+        while len(lote) < tamano_lote:
+            try:
+                tarea = tareas.get_nowait()
+            except queue.Empty:
+                break
+            if tarea is None:
+                activo = False
+                break
+            lote.append(tarea)
+
+        _procesar_tareas(analyzer, segmentos, lote, resultados)
+
+    for shm in segmentos.values():
+        try:
+            shm.close()
+        except BufferError:
+            pass
+    analyzer.cerrar()
+
+
+class PoolProcesos:
+    """
+    N procesos con una replica del analizador cada uno
+
+    Uso:
+        with PoolProcesos(4, opciones={'backend': BackendOnnxRuntime.desde_cache_roboflow(hilos_intra=2)}) as pool:
+            for detecciones in pool.mapear(frames, confianza_min=0.4, bgr=True):
+                ...
+
+    Con backends que usan varios hilos (ONNX Runtime) conviene repartir los
+    nucleos: hilos_intra ~= nucleos / procesos.
+    """
+
+    def __init__(
+        self,
+        procesos: Optional[int] = None,
+        fabrica: Optional[Callable] = None,
+        opciones: Optional[Dict] = None,
+        ranuras: Optional[int] = None,
+        tamano_lote: int = 4,
+        bytes_ranura: int = BYTES_RANURA,
+        metodo_inicio: str = 'spawn',
+        timeout_carga_s: float = 600.0
+    ):
+        """
+        Args:
+            procesos: Numero de trabajadores (por defecto os.cpu_count())
+            fabrica: Callable importable que crea el analizador en cada trabajador
+                (por defecto JerseyAnalyzer)
+            opciones: Argumentos de la fabrica; deben poder serializarse con pickle
+                (un backend sin cargar, model_id, api_key...)
+            ranuras: Imagenes en vuelo como maximo (por defecto 2 por trabajador)
+            tamano_lote: Tareas que un trabajador agrupa por llamada al modelo
+            bytes_ranura: Tamano inicial de cada bloque de memoria compartida
+            metodo_inicio: 'spawn' (por defecto, seguro con hilos y GPU) o 'fork'
+            timeout_carga_s: Espera maxima para que todos los trabajadores carguen el modelo
+        """
+        if fabrica is None:
+            from basketball_jersey_analyzer import JerseyAnalyzer
+            fabrica = JerseyAnalyzer
+
+        self.procesos = procesos or os.cpu_count() or 1
+        ranuras = ranuras or 2 * self.procesos
+
+        contexto = multiprocessing.get_context(metodo_inicio)
+        self._tareas = contexto.Queue()
+        self._resultados = contexto.Queue()
+
+        self._ranuras = [
+            shared_memory.SharedMemory(create=True, size=bytes_ranura)
+            for _ in range(ranuras)
+        ]
+        self._libres = queue.Queue()
+        for i in range(ranuras):
+            self._libres.put(i)
+
+        self._ids = itertools.count()
+        self._pendientes: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._listos = 0
+        self._error_carga = None
+        self._evento_carga = threading.Event()
+        self._fallo_trabajador = None
+        self._cerrado = False
+
+        self._trabajadores = [
+            contexto.Process(
+                target=_trabajador,
+                args=(fabrica, opciones or {}, self._tareas, self._resultados, tamano_lote),
+                name=f"analizador-{i}",
+                daemon=True
+            )
+            for i in range(self.procesos)
+        ]
+        for proceso in self._trabajadores:
+            proceso.start()
+
+        self._colector = threading.Thread(target=self._recolectar, name="pool-resultados", daemon=True)
+        self._colector.start()
+
+        if not self._evento_carga.wait(timeout_carga_s) or self._error_carga is not None:
+            error = self._error_carga or f"los trabajadores no cargaron en {timeout_carga_s} s"
+            self.cerrar()
+            raise RuntimeError(f"No se pudo iniciar el pool: {error}")
+
+    def enviar(self, imagen: np.ndarray, confianza_min: float = 0.4, bgr: bool = False) -> Future:
+        """
+        Copia la imagen a un bloque compartido libre y la encola
+
+        Bloquea si todas las ranuras estan en vuelo.
+
+        Args:
+            imagen: Imagen HxWx3 uint8
+            confianza_min: Umbral minimo de confianza (0.0-1.0)
+            bgr: True si la imagen viene en BGR (OpenCV); el trabajador la invierte
+
+        Returns:
+            Future que resuelve a Detecciones
+        """
+        if self._cerrado:
+            raise RuntimeError("El pool ya fue cerrado")
+        if self._fallo_trabajador is not None:
+            raise RuntimeError(self._fallo_trabajador)
+
+        imagen = np.asarray(imagen)
+        ranura = self._libres.get()
+        shm = self._ranuras[ranura]
+        if imagen.nbytes > shm.size:
+            # La ranura esta libre: ningun trabajador usa el bloque anterior
+            shm.close()
+            shm.unlink()
+            shm = self._ranuras[ranura] = shared_memory.SharedMemory(create=True, size=imagen.nbytes)
+
+        np.ndarray(imagen.shape, dtype=imagen.dtype, buffer=shm.buf)[...] = imagen
+
+        futuro = Future()
+        id_tarea = next(self._ids)
+        with self._lock:
+            self._pendientes[id_tarea] = (futuro, ranura)
+        self._tareas.put((id_tarea, ranura, shm.name, imagen.shape, imagen.dtype.str, confianza_min, bgr))
+        return futuro
+
+    def mapear(
+        self,
+        imagenes: Iterable[np.ndarray],
+        confianza_min: float = 0.4,
+        bgr: bool = False
+    ) -> Iterator[Detecciones]:
+        """Procesa un flujo de imagenes y entrega las detecciones en el orden de entrada"""
+        en_vuelo = deque()
+        for imagen in imagenes:
+            en_vuelo.append(self.enviar(imagen, confianza_min, bgr))
+            while en_vuelo and en_vuelo[0].done():
+                yield en_vuelo.popleft().result()
+
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+    def cerrar(self, timeout: float = 10.0):
+        """Detiene los trabajadores y libera la memoria compartida"""
+        if self._cerrado:
+            return
+        self._cerrado = True
+
+        for _ in self._trabajadores:
+            self._tareas.put(None)
+        for proceso in self._trabajadores:
+            proceso.join(timeout)
+            if proceso.is_alive():
+                proceso.terminate()
+                proceso.join()
+
+        self._resultados.put(None)
+        self._colector.join(timeout)
+        self._fallar_pendientes("El pool fue cerrado")
+
+        for shm in self._ranuras:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def _recolectar(self):
+        """Hilo que recibe resultados, libera ranuras y resuelve los Future"""
+        while True:
+            try:
+                mensaje = self._resultados.get(timeout=1.0)
+            except queue.Empty:
+                if (not self._cerrado and self._fallo_trabajador is None
+                        and any(not p.is_alive() for p in self._trabajadores)):
+                    self._fallo_trabajador = "Un proceso trabajador termino inesperadamente"
+                    if self._listos < len(self._trabajadores):
+                        self._error_carga = self._fallo_trabajador
+                    self._fallar_pendientes(self._fallo_trabajador)
+                    self._evento_carga.set()
+                continue
+
+            if mensaje is None:
+                return
+
+            tipo, id_tarea, datos = mensaje
+            if tipo == 'listo':
+                self._listos += 1
+                if self._listos == len(self._trabajadores):
+                    self._evento_carga.set()
+                continue
+            if tipo == 'error_carga':
+                logger.error("El trabajador %s no pudo cargar el modelo: %s", id_tarea, datos)
+                self._error_carga = datos
+                self._evento_carga.set()
+                continue
+
+            with self._lock:
+                futuro, ranura = self._pendientes.pop(id_tarea)
+            self._libres.put(ranura)
+
+            if tipo == 'ok':
+                futuro.set_result(Detecciones(datos))
+            else:
+                futuro.set_exception(RuntimeError(datos))
+
+    def _fallar_pendientes(self, motivo: str):
+        with self._lock:
+            pendientes = list(self._pendientes.values())
+            self._pendientes.clear()
+        for futuro, ranura in pendientes:
+            self._libres.put(ranura)
+            if not futuro.done():
+                futuro.set_exception(RuntimeError(motivo))
@@ -0,0 +1,205 @@
+"""
+Etapa de preprocesamiento canonica antes del modelo
+- Conversion a arreglo RGB uint8 sin copias cuando la entrada ya es compatible
+- Reduccion (o letterbox) al tamano de entrada del modelo sobre buffers
+  preasignados por hilo, reutilizados entre llamadas
+- Transformacion inversa para llevar las cajas a coordenadas de la imagen original
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from arranque import importar_perezoso
+from detecciones import Detecciones
+
+
+MODOS = ('reducir', 'letterbox', 'ninguno')
+
+
+def a_arreglo_rgb(imagen, bgr: bool = False) -> np.ndarray:
+    """
+    Convierte PIL.Image o numpy array a HxWx3 uint8 RGB
+
+    Un arreglo uint8 RGB se retorna sin copiar (np.asarray). Se convierten
+    escala de grises, RGBA, BGR (bgr=True), flotantes en [0, 1] y uint16.
+    """
+    arreglo = np.asarray(imagen)
+
+    if arreglo.dtype != np.uint8:
+        if np.issubdtype(arreglo.dtype, np.floating):
+            arreglo = (np.clip(arreglo, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+        elif arreglo.dtype == np.uint16:
+            arreglo = (arreglo >> 8).astype(np.uint8)
+        elif arreglo.dtype == np.bool_:
+            arreglo = arreglo.astype(np.uint8) * 255
+        else:
+            arreglo = np.clip(arreglo, 0, 255).astype(np.uint8)
+
+    if arreglo.ndim == 2:
+        return np.repeat(arreglo[:, :, None], 3, axis=2)
+    if arreglo.ndim != 3 or arreglo.shape[2] not in (1, 3, 4):
+        raise ValueError(f"Forma de imagen no soportada: {arreglo.shape}")
+
+    if arreglo.shape[2] == 1:
+        return np.repeat(arreglo, 3, axis=2)
+
+    if bgr:
+        cv2 = importar_perezoso('cv2')
+        codigo = cv2.COLOR_BGRA2RGB if arreglo.shape[2] == 4 else cv2.COLOR_BGR2RGB
+        return cv2.cvtColor(arreglo, codigo)
+
+    if arreglo.shape[2] == 4:
+        return arreglo[:, :, :3]
+    return arreglo
+
+
+@dataclass(frozen=True)
+class Transformacion:
+    """Relacion entre la imagen original y la imagen enviada al modelo"""
+
+    alto_original: int
+    ancho_original: int
+    alto_escalado: int
+    ancho_escalado: int
+    escala: float = 1.0
+    pad_x: int = 0
+    pad_y: int = 0
+
+    @property
+    def es_identidad(self) -> bool:
+        return self.escala == 1.0 and self.pad_x == 0 and self.pad_y == 0
+
+    def a_original(self, detecciones: Detecciones) -> Detecciones:
+        """Lleva las cajas (centro, ancho, alto) a coordenadas de la imagen original"""
+        if self.es_identidad or not detecciones:
+            return detecciones
+
+        datos = detecciones.datos.copy()
+        x = (datos['x'] - self.pad_x) / self.escala
+        y = (datos['y'] - self.pad_y) / self.escala
+        datos['x'] = np.clip(np.rint(x), 0, self.ancho_original)
+        datos['y'] = np.clip(np.rint(y), 0, self.alto_original)
+        datos['width'] = np.rint(datos['width'] / self.escala)
+        datos['height'] = np.rint(datos['height'] / self.escala)
+        return Detecciones(datos)
+
+
+class Preprocesador:
+    """
+    Prepara imagenes para el modelo
+
+    Modos:
+        reducir: escala la imagen (sin deformar) hasta que el lado mayor sea
+            tam_entrada; las imagenes mas chicas pasan sin cambios
+        letterbox: igual que reducir y ademas rellena hasta tam_entrada x tam_entrada
+        ninguno: solo normaliza a RGB uint8
+
+    Las imagenes retornadas por preparar() viven en buffers del hilo llamador:
+    son validas hasta la siguiente llamada con el mismo `indice` en ese hilo.
+    """
+
+    def __init__(self, tam_entrada: int = 640, modo: str = 'reducir', color_relleno: int = 114):
+        """
+        Args:
+            tam_entrada: Lado de la entrada del modelo
+            modo: 'reducir', 'letterbox' o 'ninguno'
+            color_relleno: Valor de los pixeles de relleno en modo letterbox
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de preprocesamiento desconocido: {modo} (opciones: {MODOS})")
+
+        self.tam_entrada = tam_entrada
+        self.modo = modo
+        self.color_relleno = color_relleno
+        self._local = threading.local()
+
+    @property
+    def firma(self) -> str:
+        """Identifica la configuracion (forma parte de la clave del cache de resultados)"""
+        if self.modo == 'ninguno':
+            return 'ninguno'
+        return f"{self.modo}:{self.tam_entrada}"
+
+    def transformacion(self, alto: int, ancho: int) -> Transformacion:
+        """Transformacion para una imagen de alto x ancho (solo depende de la forma)"""
+        if self.modo == 'ninguno':
+            return Transformacion(alto, ancho, alto, ancho)
+
+        escala = min(1.0, self.tam_entrada / max(alto, ancho))
+        if escala < 1.0:
+            alto_escalado = max(1, int(round(alto * escala)))
+            ancho_escalado = max(1, int(round(ancho * escala)))
+        else:
+            alto_escalado, ancho_escalado = alto, ancho
+
+        if self.modo == 'letterbox':
+            pad_x = (max(self.tam_entrada, ancho_escalado) - ancho_escalado) // 2
+            pad_y = (max(self.tam_entrada, alto_escalado) - alto_escalado) // 2
+        else:
+            pad_x = pad_y = 0
+
+        return Transformacion(alto, ancho, alto_escalado, ancho_escalado, escala, pad_x, pad_y)
+
+    def preparar(self, imagen, indice: int = 0, bgr: bool = False) -> Tuple[np.ndarray, Transformacion]:
+        """
+        Normaliza y lleva la imagen al tamano de entrada del modelo
+
+        Args:
+            imagen: numpy array o PIL.Image
+            indice: Posicion en el lote (cada posicion tiene su propio buffer)
+            bgr: True si la imagen viene en BGR
+
+        Returns:
+            Tupla (imagen_para_el_modelo, transformacion)
+        """
+        imagen = a_arreglo_rgb(imagen, bgr=bgr)
+        alto, ancho = imagen.shape[:2]
+        transformacion = self.transformacion(alto, ancho)
+
+        if transformacion.es_identidad:
+            return imagen, transformacion
+
+        cv2 = importar_perezoso('cv2')
+        forma_escalada = (transformacion.alto_escalado, transformacion.ancho_escalado, 3)
+
+        if self.modo == 'reducir':
+            destino = self._buffer('escalado', indice, forma_escalada)
+            cv2.resize(imagen, (forma_escalada[1], forma_escalada[0]), dst=destino,
+                       interpolation=cv2.INTER_AREA)
+            return destino, transformacion
+
+        # Letterbox: lienzo fijo con relleno y la imagen escalada centrada
+        lado_y = max(self.tam_entrada, forma_escalada[0])
+        lado_x = max(self.tam_entrada, forma_escalada[1])
+        lienzo = self._buffer('lienzo', indice, (lado_y, lado_x, 3))
+        lienzo.fill(self.color_relleno)
+
+        region = lienzo[
+            transformacion.pad_y:transformacion.pad_y + forma_escalada[0],
+            transformacion.pad_x:transformacion.pad_x + forma_escalada[1]
+        ]
+        if transformacion.escala < 1.0:
+            escalada = self._buffer('escalado', indice, forma_escalada)
+            cv2.resize(imagen, (forma_escalada[1], forma_escalada[0]), dst=escalada,
+                       interpolation=cv2.INTER_AREA)
+            region[...] = escalada
+        else:
+            region[...] = imagen
+
+        return lienzo, transformacion
+
+    def _buffer(self, nombre: str, indice: int, forma: Tuple[int, int, int]) -> np.ndarray:
+        """Vista contigua de `forma` sobre un buffer del hilo que solo crece"""
+        buffers: Dict[Tuple[str, int], np.ndarray] = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+
+        necesarios = forma[0] * forma[1] * forma[2]
+        plano = buffers.get((nombre, indice))
+        if plano is None or plano.size < necesarios:
+            plano = buffers[(nombre, indice)] = np.empty(necesarios, dtype=np.uint8)
+
+        return plano[:necesarios].reshape(forma)
@@ -0,0 +1,323 @@
+"""
+Procesamiento headless de un directorio de imagenes
+Pipeline por etapas: decodificacion (pool) -> inferencia (lotes) -> anotacion/escritura (pool)
+Las etapas se comunican con colas acotadas para limitar la memoria usada
+Los JPEG mucho mayores que la entrada del modelo se decodifican a resolucion reducida
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from backends import agregar_argumentos_backend, backend_desde_argumentos
+from basketball_jersey_analyzer import JerseyAnalyzer
+from decodificacion import DecodificadorPrefetch
+from exportacion import EscritorDetecciones
+from instrumentacion import configurar_logging, logger
+
+
+EXTENSIONES_IMAGEN = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+COLUMNAS_RESULTADOS = ['archivo', 'numero', 'confianza', 'x', 'y', 'width', 'height']
+
+# Marca de fin de flujo entre etapas
+_FIN = object()
+
+
+def listar_imagenes(directorio: Path) -> List[Path]:
+    """Lista las imagenes del directorio en orden alfabetico"""
+    return sorted(
+        p for p in directorio.iterdir()
+        if p.is_file() and p.suffix.lower() in EXTENSIONES_IMAGEN
+    )
+
+
+def decodificar_imagen(ruta: Path) -> Optional[np.ndarray]:
+    """Lee una imagen de disco y la retorna en RGB (None si no se puede leer)"""
+    imagen = cv2.imread(str(ruta), cv2.IMREAD_COLOR)
+    if imagen is None:
+        return None
+    return cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+
+class PipelineDirectorio:
+    """Pipeline de tres etapas para procesar directorios sin interfaz grafica"""
+
+    def __init__(
+        self,
+        analyzer: JerseyAnalyzer,
+        confianza_min: float = 0.4,
+        tamano_lote: int = 8,
+        hilos_decodificacion: int = 4,
+        hilos_escritura: int = 2,
+        tamano_cola: int = 32,
+        dir_anotadas: Optional[Path] = None,
+        decodificacion_reducida: bool = True
+    ):
+        """
+        Args:
+            analyzer: Analizador ya inicializado
+            confianza_min: Umbral minimo de confianza (0.0-1.0)
+            tamano_lote: Imagenes por llamada al modelo
+            hilos_decodificacion: Hilos de la etapa de decodificacion
+            hilos_escritura: Hilos de la etapa de anotacion/escritura
+            tamano_cola: Capacidad maxima de cada cola entre etapas
+            dir_anotadas: Directorio para guardar imagenes anotadas (None = no guardar)
+            decodificacion_reducida: Decodificar JPEG grandes a 1/2, 1/4 u 1/8 cuando
+                siguen siendo mayores que la entrada del modelo (las coordenadas del
+                CSV siempre son del archivo original)
+        """
+        self.analyzer = analyzer
+        self.confianza_min = confianza_min
+        self.tamano_lote = tamano_lote
+        self.hilos_decodificacion = hilos_decodificacion
+        self.hilos_escritura = hilos_escritura
+        self.tamano_cola = tamano_cola
+        self.dir_anotadas = dir_anotadas
+        self.decodificacion_reducida = decodificacion_reducida
+
+        self._errores = []
+        self._contadores = {'procesadas': 0, 'fallidas': 0, 'detecciones': 0}
+        self._lock_resultados = threading.Lock()
+
+    def procesar(self, rutas: List[Path], archivo_resultados: Path) -> Dict:
+        """
+        Procesa las imagenes y escribe un unico archivo de resultados CSV
+
+        Returns:
+            Resumen con imagenes procesadas, fallidas, detecciones y throughput
+        """
+        if self.dir_anotadas is not None:
+            self.dir_anotadas.mkdir(parents=True, exist_ok=True)
+        archivo_resultados.parent.mkdir(parents=True, exist_ok=True)
+
+        cola_decodificadas = queue.Queue(maxsize=self.tamano_cola)
+        cola_inferidas = queue.Queue(maxsize=self.tamano_cola)
+
+        self._errores = []
+        self._contadores = {'procesadas': 0, 'fallidas': 0, 'detecciones': 0}
+
+        inicio = time.perf_counter()
+
+        # Formato segun la extension: .csv, .jsonl, .parquet o .arrow
+        with EscritorDetecciones(archivo_resultados, COLUMNAS_RESULTADOS) as writer:
+            decodificacion = threading.Thread(
+                target=self._etapa_decodificacion,
+                args=(rutas, cola_decodificadas),
+                daemon=True
+            )
+            inferencia = threading.Thread(
+                target=self._etapa_inferencia,
+                args=(cola_decodificadas, cola_inferidas),
+                daemon=True
+            )
+            escritores = [
+                threading.Thread(
+                    target=self._etapa_escritura,
+                    args=(cola_inferidas, writer),
+                    daemon=True
+                )
+                for _ in range(self.hilos_escritura)
+            ]
+
+            for hilo in [decodificacion, inferencia] + escritores:
+                hilo.start()
+
+            decodificacion.join()
+            cola_decodificadas.put(_FIN)
+
+            inferencia.join()
+            for hilo in escritores:
+                hilo.join()
+
+        duracion = time.perf_counter() - inicio
+
+        if self._errores:
+            raise self._errores[0]
+
+        procesadas = self._contadores['procesadas']
+        return {
+            'procesadas': procesadas,
+            'fallidas': self._contadores['fallidas'],
+            'detecciones': self._contadores['detecciones'],
+            'duracion_s': round(duracion, 3),
+            'imagenes_por_segundo': round(procesadas / duracion, 2) if duracion > 0 else 0.0
+        }
+
+    def _etapa_decodificacion(self, rutas: List[Path], cola_salida: queue.Queue):
+        """Decodifica imagenes de disco en un pool de hilos con lectura anticipada acotada"""
+        preprocesador = self.analyzer.preprocesador
+        lado_objetivo = None
+        if self.decodificacion_reducida and preprocesador.modo != 'ninguno':
+            lado_objetivo = preprocesador.tam_entrada
+
+        decodificador = DecodificadorPrefetch(
+            lado_objetivo=lado_objetivo,
+            hilos=self.hilos_decodificacion,
+            ventana=self.tamano_cola
+        )
+
+        for ruta, imagen, transformacion in decodificador.iterar(rutas):
+            if self._errores:
+                return
+
+            if imagen is None:
+                logger.warning("No se pudo decodificar la imagen", extra={'datos': {'ruta': str(ruta)}})
+                with self._lock_resultados:
+                    self._contadores['fallidas'] += 1
+                continue
+
+            cola_salida.put((ruta, imagen, transformacion))
+
+    def _etapa_inferencia(self, cola_entrada: queue.Queue, cola_salida: queue.Queue):
+        """Agrupa imagenes decodificadas en lotes y ejecuta el modelo"""
+        terminado = False
+
+        try:
+            while not terminado:
+                # Bloquear hasta tener al menos un elemento, luego completar el lote sin esperar
+                elemento = cola_entrada.get()
+                if elemento is _FIN:
+                    break
+                lote = [elemento]
+
+                while len(lote) < self.tamano_lote:
+                    try:
+                        elemento = cola_entrada.get_nowait()
+                    except queue.Empty:
+                        break
+                    if elemento is _FIN:
+                        terminado = True
+                        break
+                    lote.append(elemento)
+
+                imagenes = [imagen for _, imagen, _ in lote]
+                detecciones_por_imagen = self.analyzer.inferir_lote(
+                    imagenes,
+                    confianza_min=self.confianza_min,
+                    tamano_lote=self.tamano_lote
+                )
+
+                for (ruta, imagen, transformacion), detecciones in zip(lote, detecciones_por_imagen):
+                    cola_salida.put((ruta, imagen, transformacion, detecciones))
+
+        except Exception as e:
+            self._errores.append(e)
+            # Vaciar la entrada hasta el fin para desbloquear a los decodificadores
+            if not terminado:
+                while cola_entrada.get() is not _FIN:
+                    pass
+
+        finally:
+            for _ in range(self.hilos_escritura):
+                cola_salida.put(_FIN)
+
+    def _etapa_escritura(self, cola_entrada: queue.Queue, writer):
+        """Anota imagenes (opcional) y escribe filas en el archivo de resultados"""
+        while True:
+            elemento = cola_entrada.get()
+            if elemento is _FIN:
+                return
+
+            ruta, imagen, transformacion, detecciones = elemento
+
+            try:
+                if self.dir_anotadas is not None:
+                    # La imagen decodificada pertenece al pipeline: se dibuja sin copiar
+                    imagen_anotada = self.analyzer._anotar(imagen, detecciones, en_sitio=True)
+                    cv2.imwrite(
+                        str(self.dir_anotadas / ruta.name),
+                        cv2.cvtColor(imagen_anotada, cv2.COLOR_RGB2BGR)
+                    )
+
+                # Coordenadas en pixeles del archivo original
+                filas = [(ruta.name, *fila) for fila in transformacion.a_original(detecciones).filas()]
+
+                with self._lock_resultados:
+                    writer.escribir(filas)
+                    self._contadores['procesadas'] += 1
+                    self._contadores['detecciones'] += len(filas)
+
+            except Exception as e:
+                self._errores.append(e)
+                # Vaciar la entrada hasta el fin para desbloquear a la etapa de inferencia
+                while cola_entrada.get() is not _FIN:
+                    pass
+                return
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Procesa un directorio de imagenes sin interfaz grafica"
+    )
+    parser.add_argument('directorio', type=Path, help="Directorio con imagenes (ej. sample_images/)")
+    parser.add_argument('--salida', type=Path, default=Path('./outputs/resultados_directorio.csv'),
+                        help="Archivo de resultados (.csv, .jsonl, .parquet o .arrow)")
+    parser.add_argument('--api-key', default=os.environ.get('ROBOFLOW_API_KEY', ''),
+                        help="Roboflow API key (por defecto $ROBOFLOW_API_KEY; opcional si el modelo esta en cache)")
+    parser.add_argument('--model-id', default="basketball-jersey-numbers-ocr/7")
+    parser.add_argument('--confianza', type=float, default=0.4, help="Confianza minima")
+    parser.add_argument('--lote', type=int, default=8, help="Imagenes por llamada al modelo")
+    parser.add_argument('--hilos-decodificacion', type=int, default=4)
+    parser.add_argument('--hilos-escritura', type=int, default=2)
+    parser.add_argument('--tamano-cola', type=int, default=32, help="Capacidad de las colas entre etapas")
+    parser.add_argument('--anotadas', type=Path, default=None,
+                        help="Directorio donde guardar imagenes anotadas (opcional)")
+    parser.add_argument('--metricas', type=Path, default=None,
+                        help="Archivo de metricas por etapa en formato Prometheus (opcional)")
+    parser.add_argument('--decodificacion-completa', action='store_true',
+                        help="Decodificar siempre a resolucion completa (sin IMREAD_REDUCED)")
+    agregar_argumentos_backend(parser)
+    args = parser.parse_args()
+
+    configurar_logging()
+
+    if not args.directorio.is_dir():
+        parser.error(f"No existe el directorio: {args.directorio}")
+
+    rutas = listar_imagenes(args.directorio)
+    print(f"[INFO] {len(rutas)} imagenes encontradas en {args.directorio}")
+
+    analyzer = JerseyAnalyzer(
+        api_key=args.api_key or None,
+        model_id=args.model_id,
+        backend=backend_desde_argumentos(args)
+    )
+
+    pipeline = PipelineDirectorio(
+        analyzer,
+        confianza_min=args.confianza,
+        tamano_lote=args.lote,
+        hilos_decodificacion=args.hilos_decodificacion,
+        hilos_escritura=args.hilos_escritura,
+        tamano_cola=args.tamano_cola,
+        dir_anotadas=args.anotadas,
+        decodificacion_reducida=not args.decodificacion_completa
+    )
+    resumen = pipeline.procesar(rutas, args.salida)
+
+    print("=" * 60)
+    print("PROCESAMIENTO COMPLETADO")
+    print("=" * 60)
+    print(f"Imagenes procesadas: {resumen['procesadas']}")
+    print(f"Imagenes fallidas: {resumen['fallidas']}")
+    print(f"Detecciones: {resumen['detecciones']}")
+    print(f"Duracion: {resumen['duracion_s']:.2f} s")
+    print(f"Throughput: {resumen['imagenes_por_segundo']:.2f} imagenes/s")
+    print(f"Resultados: {args.salida}")
+    print("=" * 60)
+
+    if args.metricas is not None:
+        print(f"Metricas por etapa: {analyzer.exportar_metricas_prometheus(args.metricas)}")
+
+
+if __name__ == "__main__":
+    main()
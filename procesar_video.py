@@ -0,0 +1,358 @@
+"""
+Procesamiento de video y flujos de frames con JerseyAnalyzer
+Decodifica por adelantado en un hilo de fondo, aplica salto de frames configurable
+y opcionalmente escribe un video anotado
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from backends import agregar_argumentos_backend, backend_desde_argumentos
+from basketball_jersey_analyzer import JerseyAnalyzer
+from detecciones import Detecciones
+from exportacion import EscritorDetecciones
+from instrumentacion import configurar_logging
+from pool_procesos import PoolProcesos
+from renderizador import RenderizadorDetecciones
+
+
+# Marca de fin de flujo del lector
+_FIN = object()
+
+
+class LectorFramesAsincrono:
+    """
+    Lee frames de un video (archivo, URL o camara) en un hilo de fondo
+
+    Los frames que se saltan solo se avanzan con grab() (sin decodificar),
+    y los frames seleccionados se dejan en una cola acotada de lectura anticipada.
+    """
+
+    def __init__(self, fuente: Union[str, int], paso: int = 1, tamano_buffer: int = 16):
+        """
+        Args:
+            fuente: Ruta de video, URL de stream o indice de camara
+            paso: Procesar 1 de cada `paso` frames
+            tamano_buffer: Frames decodificados que se leen por adelantado
+        """
+        if paso < 1:
+            raise ValueError("paso debe ser mayor o igual a 1")
+
+        self.captura = cv2.VideoCapture(fuente)
+        if not self.captura.isOpened():
+            raise RuntimeError(f"No se pudo abrir la fuente de video: {fuente}")
+
+        self.paso = paso
+        self.fps = self.captura.get(cv2.CAP_PROP_FPS) or 30.0
+        self.ancho = int(self.captura.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.alto = int(self.captura.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.total_frames = int(self.captura.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self._cola = queue.Queue(maxsize=tamano_buffer)
+        self._detener = threading.Event()
+        self._error = None
+        self._hilo = threading.Thread(target=self._leer, daemon=True)
+        self._hilo.start()
+
+    def _leer(self):
+        """Bucle del hilo lector"""
+        indice = 0
+        try:
+            while not self._detener.is_set():
+                if not self.captura.grab():
+                    break
+
+                if indice % self.paso == 0:
+                    ok, frame = self.captura.retrieve()
+                    if not ok:
+                        break
+                    self._poner((indice, frame))
+
+                indice += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            self.captura.release()
+            self._poner(_FIN)
+
+    def _poner(self, elemento):
+        """Encola respetando la senal de detencion"""
+        while not self._detener.is_set():
+            try:
+                self._cola.put(elemento, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Itera (indice_frame, frame_bgr) en orden"""
+        while True:
+            elemento = self._cola.get()
+            if elemento is _FIN:
+                break
+            yield elemento
+
+        if self._error is not None:
+            raise self._error
+
+    def cerrar(self):
+        """Detiene el hilo lector y libera la captura"""
+        self._detener.set()
+        self._hilo.join(timeout=5)
+
+
+def procesar_flujo_frames(
+    analyzer: JerseyAnalyzer,
+    frames: Iterable[Tuple[int, np.ndarray]],
+    confianza_min: float = 0.4,
+    tamano_lote: int = 8,
+    frames_rgb: bool = False
+) -> Iterator[Tuple[int, np.ndarray, Detecciones]]:
+    """
+    Ejecuta el analizador sobre un flujo de frames, agrupando en lotes
+
+    Args:
+        analyzer: Analizador ya inicializado
+        frames: Iterable de (indice_frame, frame)
+        confianza_min: Umbral minimo de confianza (0.0-1.0)
+        tamano_lote: Frames por llamada al modelo
+        frames_rgb: True si los frames ya vienen en RGB (por defecto BGR como OpenCV)
+
+    Yields:
+        Tuplas (indice_frame, frame_original, detecciones) en el orden de entrada
+    """
+    lote = []
+
+    def _procesar_lote():
+        imagenes = [
+            frame if frames_rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            for _, frame in lote
+        ]
+        detecciones_por_frame = analyzer.inferir_lote(
+            imagenes,
+            confianza_min=confianza_min,
+            tamano_lote=tamano_lote
+        )
+        return [
+            (indice, frame, detecciones)
+            for (indice, frame), detecciones in zip(lote, detecciones_por_frame)
+        ]
+
+    for indice, frame in frames:
+        lote.append((indice, frame))
+        if len(lote) >= tamano_lote:
+            yield from _procesar_lote()
+            lote = []
+
+    if lote:
+        yield from _procesar_lote()
+
+
+def procesar_flujo_frames_pool(
+    pool: PoolProcesos,
+    frames: Iterable[Tuple[int, np.ndarray]],
+    confianza_min: float = 0.4,
+    frames_rgb: bool = False
+) -> Iterator[Tuple[int, np.ndarray, Detecciones]]:
+    """
+    Igual que procesar_flujo_frames, repartiendo los frames entre los procesos del pool
+
+    La conversion BGR -> RGB se hace en los trabajadores.
+
+    Yields:
+        Tuplas (indice_frame, frame_original, detecciones) en el orden de entrada
+    """
+    en_vuelo = deque()
+    for indice, frame in frames:
+        en_vuelo.append((indice, frame, pool.enviar(frame, confianza_min, bgr=not frames_rgb)))
+        while en_vuelo and en_vuelo[0][2].done():
+            indice_listo, frame_listo, futuro = en_vuelo.popleft()
+            yield indice_listo, frame_listo, futuro.result()
+
+    while en_vuelo:
+        indice_listo, frame_listo, futuro = en_vuelo.popleft()
+        yield indice_listo, frame_listo, futuro.result()
+
+
+def procesar_video(
+    analyzer: Optional[JerseyAnalyzer],
+    fuente: Union[str, int],
+    ruta_salida: Optional[Path] = None,
+    ruta_resultados: Optional[Path] = None,
+    paso: int = 1,
+    confianza_min: float = 0.4,
+    tamano_lote: int = 8,
+    tamano_buffer: int = 16,
+    max_frames: Optional[int] = None,
+    pool: Optional[PoolProcesos] = None
+) -> Dict:
+    """
+    Procesa un video completo
+
+    Args:
+        analyzer: Analizador ya inicializado (puede ser None si se usa pool)
+        fuente: Ruta de video, URL de stream o indice de camara
+        ruta_salida: Video anotado de salida (None = no escribir)
+        ruta_resultados: CSV con una fila por deteccion (None = no escribir)
+        paso: Procesar 1 de cada `paso` frames
+        confianza_min: Umbral minimo de confianza (0.0-1.0)
+        tamano_lote: Frames por llamada al modelo
+        tamano_buffer: Frames decodificados por adelantado
+        max_frames: Limite de frames procesados (util para streams infinitos)
+        pool: Pool de procesos para la inferencia (en lugar del analizador local)
+
+    Returns:
+        Resumen con frames procesados, detecciones y throughput
+    """
+    lector = LectorFramesAsincrono(fuente, paso=paso, tamano_buffer=tamano_buffer)
+
+    escritor_video = None
+    if ruta_salida is not None:
+        ruta_salida.parent.mkdir(parents=True, exist_ok=True)
+        escritor_video = cv2.VideoWriter(
+            str(ruta_salida),
+            cv2.VideoWriter_fourcc(*'mp4v'),
+            lector.fps / paso,
+            (lector.ancho, lector.alto)
+        )
+
+    writer = None
+    if ruta_resultados is not None:
+        # Formato segun la extension: .csv, .jsonl, .parquet o .arrow
+        writer = EscritorDetecciones(
+            ruta_resultados, ['frame', 'tiempo_s', 'numero', 'confianza', 'x', 'y', 'width', 'height']
+        )
+
+    frames = lector
+    if max_frames is not None:
+        frames = (f for i, f in zip(range(max_frames), lector))
+
+    if pool is not None:
+        resultados = procesar_flujo_frames_pool(pool, frames, confianza_min=confianza_min)
+        renderizador = RenderizadorDetecciones()
+    else:
+        resultados = procesar_flujo_frames(
+            analyzer, frames, confianza_min=confianza_min, tamano_lote=tamano_lote
+        )
+        renderizador = None
+
+    procesados = 0
+    total_detecciones = 0
+    inicio = time.perf_counter()
+
+    try:
+        for indice, frame, detecciones in resultados:
+            procesados += 1
+            total_detecciones += len(detecciones)
+
+            if escritor_video is not None:
+                # Los colores de anotacion son simetricos en RGB/BGR: se dibuja sobre
+                # el frame BGR, sin copiar porque el frame ya no se reutiliza
+                if renderizador is not None:
+                    anotado = renderizador.dibujar(frame, detecciones, en_sitio=True)
+                else:
+                    anotado = analyzer._anotar(frame, detecciones, en_sitio=True)
+                escritor_video.write(anotado)
+
+            if writer is not None:
+                tiempo = round(indice / lector.fps, 3)
+                writer.escribir((indice, tiempo, *fila) for fila in detecciones.filas())
+    finally:
+        lector.cerrar()
+        if escritor_video is not None:
+            escritor_video.release()
+        if writer is not None:
+            writer.cerrar()
+
+    duracion = time.perf_counter() - inicio
+
+    return {
+        'frames_procesados': procesados,
+        'detecciones': total_detecciones,
+        'duracion_s': round(duracion, 3),
+        'frames_por_segundo': round(procesados / duracion, 2) if duracion > 0 else 0.0
+    }
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Detecta numeros de camiseta en video")
+    parser.add_argument('fuente', help="Archivo de video, URL de stream o indice de camara")
+    parser.add_argument('--salida', type=Path, default=None, help="Video anotado de salida (.mp4)")
+    parser.add_argument('--resultados', type=Path, default=Path('./outputs/resultados_video.csv'),
+                        help="Detecciones por frame (.csv, .jsonl, .parquet o .arrow)")
+    parser.add_argument('--api-key', default=os.environ.get('ROBOFLOW_API_KEY', ''),
+                        help="Roboflow API key (por defecto $ROBOFLOW_API_KEY; opcional si el modelo esta en cache)")
+    parser.add_argument('--model-id', default="basketball-jersey-numbers-ocr/7")
+    parser.add_argument('--paso', type=int, default=1, help="Procesar 1 de cada N frames")
+    parser.add_argument('--confianza', type=float, default=0.4, help="Confianza minima")
+    parser.add_argument('--lote', type=int, default=8, help="Frames por llamada al modelo")
+    parser.add_argument('--buffer', type=int, default=16, help="Frames leidos por adelantado")
+    parser.add_argument('--max-frames', type=int, default=None, help="Limite de frames procesados")
+    parser.add_argument('--metricas', type=Path, default=None,
+                        help="Archivo de metricas por etapa en formato Prometheus (opcional)")
+    parser.add_argument('--procesos', type=int, default=0,
+                        help="Procesos trabajadores con su propia replica del modelo (0 = un solo proceso)")
+    agregar_argumentos_backend(parser)
+    args = parser.parse_args()
+
+    configurar_logging()
+
+    fuente = int(args.fuente) if args.fuente.isdigit() else args.fuente
+
+    opciones_analyzer = {
+        'api_key': args.api_key or None,
+        'model_id': args.model_id,
+        'backend': backend_desde_argumentos(args)
+    }
+
+    analyzer = None
+    pool = None
+    if args.procesos > 0:
+        pool = PoolProcesos(args.procesos, opciones=opciones_analyzer, tamano_lote=args.lote)
+    else:
+        analyzer = JerseyAnalyzer(**opciones_analyzer)
+
+    try:
+        resumen = procesar_video(
+            analyzer,
+            fuente,
+            ruta_salida=args.salida,
+            ruta_resultados=args.resultados,
+            paso=args.paso,
+            confianza_min=args.confianza,
+            tamano_lote=args.lote,
+            tamano_buffer=args.buffer,
+            max_frames=args.max_frames,
+            pool=pool
+        )
+    finally:
+        if pool is not None:
+            pool.cerrar()
+
+    print("=" * 60)
+    print("VIDEO PROCESADO")
+    print("=" * 60)
+    print(f"Frames procesados: {resumen['frames_procesados']}")
+    print(f"Detecciones: {resumen['detecciones']}")
+    print(f"Throughput: {resumen['frames_por_segundo']:.2f} frames/s")
+    if args.salida is not None:
+        print(f"Video anotado: {args.salida}")
+    print(f"Resultados: {args.resultados}")
+    print("=" * 60)
+
+    if args.metricas is not None and analyzer is not None:
+        print(f"Metricas por etapa: {analyzer.exportar_metricas_prometheus(args.metricas)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Registro de detecciones con escritura en segundo plano
+Acumula filas en memoria y las escribe al CSV desde un hilo dedicado
+(y opcionalmente al historial SQLite)
+"""
+
+import atexit
+import csv
+import threading
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+from instrumentacion import logger
+
+
+COLUMNAS_LOG = ['Timestamp', 'Numero Detectado', 'Confianza', 'Archivo']
+
+
+class RegistroCSVAsincrono:
+    """
+    Escritor de log CSV con buffer en memoria y vaciado en segundo plano
+
+    Las filas se vacian cuando el buffer alcanza `max_filas` o cuando pasan
+    `intervalo_s` segundos desde el ultimo vaciado. Al cerrar (o al salir del
+    proceso) siempre se escriben las filas pendientes.
+    """
+
+    def __init__(
+        self,
+        ruta: Path,
+        max_filas: int = 256,
+        intervalo_s: float = 2.0,
+        historial=None,
+        escribir_csv: bool = True
+    ):
+        """
+        Args:
+            ruta: Archivo CSV de log
+            max_filas: Filas pendientes que fuerzan un vaciado inmediato
+            intervalo_s: Tiempo maximo que una fila puede esperar en memoria
+            historial: HistorialSQLite que recibe cada lote de filas (opcional)
+            escribir_csv: False deja solo el historial (en lugar del CSV)
+        """
+        self.ruta = Path(ruta)
+        self.max_filas = max_filas
+        self.intervalo_s = intervalo_s
+        self.historial = historial
+        self.escribir_csv = escribir_csv
+
+        self._pendientes = []
+        self._condicion = threading.Condition()
+        self._lock_escritura = threading.Lock()
+        self._cerrado = False
+
+        # Inicializar CSV si no existe
+        if self.escribir_csv and not self.ruta.exists():
+            with open(self.ruta, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(COLUMNAS_LOG)
+
+        self._hilo = threading.Thread(target=self._bucle, name="registro-csv", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def agregar(self, filas: Sequence[Sequence]):
+        """Encola filas para escritura (no bloquea en disco)"""
+        if not filas:
+            return
+
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El registro ya fue cerrado")
+            self._pendientes.extend(filas)
+            if len(self._pendientes) >= self.max_filas:
+                self._condicion.notify()
+
+    def vaciar(self):
+        """Escribe de inmediato las filas pendientes desde el hilo que llama"""
+        self._vaciar_en_orden()
+
+    def cerrar(self):
+        """Detiene el hilo de fondo garantizando el vaciado final"""
+        with self._condicion:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._condicion.notify()
+
+        self._hilo.join()
+
+    def _tomar_pendientes(self) -> List:
+        """Extrae el buffer actual (llamar con la condicion adquirida)"""
+        filas = self._pendientes
+        self._pendientes = []
+        return filas
+
+    def _bucle(self):
+        """Vacia el buffer por tamano o por tiempo hasta que se cierre el registro"""
+        while True:
+            with self._condicion:
+                limite = time.monotonic() + self.intervalo_s
+                while not self._cerrado and len(self._pendientes) < self.max_filas:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+
+                terminar = self._cerrado
+
+            self._vaciar_en_orden()
+
+            if terminar:
+                return
+
+    def _vaciar_en_orden(self):
+        """
+        Toma y escribe el buffer sin soltar el lock de escritura
+
+        Asi un vaciado manual y el hilo de fondo no pueden intercalar sus lotes:
+        el CSV y el historial quedan en el orden en que se encolaron las filas.
+        """
+        with self._lock_escritura:
+            with self._condicion:
+                filas = self._tomar_pendientes()
+            self._escribir(filas)
+
+    def _escribir(self, filas: List):
+        """
+        Un solo open/append/close por lote de filas (y una transaccion en el historial)
+
+        Llamar con _lock_escritura adquirido.
+        """
+        if not filas:
+            return
+
+        rango_csv = None
+        if self.escribir_csv:
+            try:
+                with open(self.ruta, 'a', newline='', encoding='utf-8') as f:
+                    desde = f.tell()
+                    csv.writer(f).writerows(filas)
+                    f.flush()
+                    # Bytes del CSV que tambien van al historial (importar_csv los omite)
+                    rango_csv = (str(self.ruta.resolve()), desde, f.tell())
+            except OSError as e:
+                logger.error(
+                    "No se pudieron escribir filas en el log CSV",
+                    extra={'datos': {'ruta': str(self.ruta), 'filas': len(filas), 'error': str(e)}}
+                )
+
+        if self.historial is not None:
+            try:
+                self.historial.agregar(filas, rango_csv=rango_csv)
+            except Exception as e:
+                logger.error(
+                    "No se pudieron escribir filas en el historial",
+                    extra={'datos': {'filas': len(filas), 'error': str(e)}}
+                )
@@ -0,0 +1,122 @@
+"""
+Renderizador reutilizable de detecciones con OpenCV
+- Modo en sitio (sin copiar la imagen) cuando el llamador lo permite
+- Metricas de etiquetas cacheadas (el conjunto de textos posibles es pequeno)
+- Coordenadas de cajas calculadas y recortadas de forma vectorizada
+- Modo desactivado para ejecuciones sin salida visual
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from arranque import importar_perezoso
+from detecciones import Detecciones
+
+
+class RenderizadorDetecciones:
+    """Dibuja cajas y etiquetas de numeros sobre imagenes RGB o BGR"""
+
+    # Limite de etiquetas distintas en cache (numeros x confianzas con 2 decimales)
+    MAX_ETIQUETAS_CACHE = 16384
+
+    def __init__(
+        self,
+        en_sitio: bool = False,
+        desactivado: bool = False,
+        color: Tuple[int, int, int] = (0, 255, 0),
+        color_texto: Tuple[int, int, int] = (0, 0, 0),
+        grosor: int = 3,
+        escala_fuente: float = 1.2,
+        grosor_fuente: int = 2
+    ):
+        """
+        Args:
+            en_sitio: Dibujar sobre la imagen recibida en lugar de una copia
+            desactivado: No dibujar nada (retorna la imagen recibida)
+            color: Color de cajas y fondo de etiqueta
+            color_texto: Color del texto de la etiqueta
+            grosor: Grosor de la caja
+            escala_fuente: Escala de la fuente Hershey Simplex
+            grosor_fuente: Grosor del texto
+        """
+        self.en_sitio = en_sitio
+        self.desactivado = desactivado
+        self.color = color
+        self.color_texto = color_texto
+        self.grosor = grosor
+        self.escala_fuente = escala_fuente
+        self.grosor_fuente = grosor_fuente
+
+        self._metricas: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def metricas_etiqueta(self, etiqueta: str) -> Tuple[int, int]:
+        """(ancho, alto) del texto, calculado una sola vez por etiqueta"""
+        metricas = self._metricas.get(etiqueta)
+        if metricas is not None:
+            return metricas
+
+        cv2 = importar_perezoso('cv2')
+        (ancho, alto), _ = cv2.getTextSize(
+            etiqueta, cv2.FONT_HERSHEY_SIMPLEX, self.escala_fuente, self.grosor_fuente
+        )
+
+        with self._lock:
+            if len(self._metricas) >= self.MAX_ETIQUETAS_CACHE:
+                self._metricas.clear()
+            self._metricas[etiqueta] = (ancho, alto)
+
+        return ancho, alto
+
+    def dibujar(
+        self,
+        imagen: np.ndarray,
+        detecciones: Union[Detecciones, List[Dict]],
+        en_sitio: Optional[bool] = None
+    ) -> np.ndarray:
+        """
+        Dibuja las detecciones
+
+        Args:
+            imagen: Imagen sobre la que dibujar
+            detecciones: Detecciones (compactas o en formato de diccionarios)
+            en_sitio: Sobrescribe el modo en sitio de la instancia para esta llamada
+
+        Returns:
+            Imagen anotada (la misma imagen si en_sitio o desactivado)
+        """
+        if self.desactivado:
+            return imagen
+
+        en_sitio = self.en_sitio if en_sitio is None else en_sitio
+        img = imagen if en_sitio else imagen.copy()
+
+        if not isinstance(detecciones, Detecciones):
+            detecciones = Detecciones.desde_dicts(detecciones)
+        if not detecciones:
+            return img
+
+        cv2 = importar_perezoso('cv2')
+
+        # Coordenadas de todas las cajas, recortadas a la imagen, en una sola operacion
+        h, w = img.shape[:2]
+        esquinas = detecciones.esquinas()
+        np.clip(esquinas[:, 0::2], 0, w, out=esquinas[:, 0::2])
+        np.clip(esquinas[:, 1::2], 0, h, out=esquinas[:, 1::2])
+
+        confianzas = detecciones.confianzas.tolist()
+
+        for (x1, y1, x2, y2), numero, conf in zip(esquinas.tolist(), detecciones.numeros.tolist(), confianzas):
+            # Dibujar bounding box
+            cv2.rectangle(img, (x1, y1), (x2, y2), self.color, self.grosor)
+
+            # Etiqueta con fondo
+            etiqueta = f"{numero} ({conf:.2f})"
+            text_w, text_h = self.metricas_etiqueta(etiqueta)
+            cv2.rectangle(img, (x1, y1 - text_h - 10), (x1 + text_w, y1), self.color, -1)
+            cv2.putText(img, etiqueta, (x1, y1 - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, self.escala_fuente, self.color_texto, self.grosor_fuente)
+
+        return img
@@ -0,0 +1,406 @@
+"""
+Servicio HTTP de inferencia para clientes automaticos (sin interfaz grafica)
+- POST /detectar: imagen (bytes JPEG/PNG) o lote JSON de imagenes en base64
+- Planificador de micro-lotes: agrupa solicitudes concurrentes en una sola
+  llamada al modelo, acotado por tamano maximo de lote y espera maxima
+- Contrapresion: 503 cuando la cola esta llena
+- GET /metricas (Prometheus) y GET /salud
+
+Uso:
+    python servicio_http.py --puerto 8080 --lote-max 8 --espera-ms 10
+    curl --data-binary @sample_images/jersey_1.jpg -H "Content-Type: image/jpeg" \\
+        "http://localhost:8080/detectar?confianza=0.4"
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from arranque import importar_perezoso
+from backends import agregar_argumentos_backend, backend_desde_argumentos
+from basketball_jersey_analyzer import JerseyAnalyzer
+from detecciones import Detecciones
+from instrumentacion import configurar_logging, logger
+
+
+# Tamano maximo del cuerpo de una solicitud
+MAX_BYTES_SOLICITUD = 32 * 1024 * 1024
+
+
+class ColaLlena(Exception):
+    """La cola del planificador no tiene espacio para la solicitud"""
+
+
+class SolicitudDemasiadoGrande(ValueError):
+    """La solicitud tiene mas imagenes de las que caben en la cola (nunca se aceptaria)"""
+
+
+class PlanificadorLotes:
+    """
+    Agrupa solicitudes concurrentes en lotes para JerseyAnalyzer
+
+    Un hilo despachador toma la solicitud mas antigua y espera hasta
+    `espera_max_s` a que lleguen mas, sin pasar de `lote_max` imagenes.
+    Cada solicitud recibe un Future con sus detecciones filtradas.
+    """
+
+    def __init__(
+        self,
+        analyzer: JerseyAnalyzer,
+        lote_max: int = 8,
+        espera_max_s: float = 0.01,
+        tamano_cola: int = 64,
+        fuente_log: str = 'http'
+    ):
+        """
+        Args:
+            analyzer: Analizador con el modelo cargado
+            lote_max: Imagenes maximas por llamada al modelo
+            espera_max_s: Tiempo maximo que la primera solicitud espera a completar el lote
+            tamano_cola: Imagenes en espera antes de rechazar nuevas solicitudes
+            fuente_log: Valor de la columna `fuente` en jersey_log.csv
+        """
+        self.analyzer = analyzer
+        self.lote_max = lote_max
+        self.espera_max_s = espera_max_s
+        self.tamano_cola = tamano_cola
+        self.fuente_log = fuente_log
+
+        self._cola = deque()
+        self._condicion = threading.Condition()
+        self._activo = True
+
+        self.encoladas = 0
+        self.rechazadas = 0
+        self.lotes = 0
+        self.imagenes_procesadas = 0
+        self.max_profundidad = 0
+
+        self._hilo = threading.Thread(target=self._bucle, name="planificador-lotes", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, imagenes: List[np.ndarray], confianza_min: float = 0.4) -> List[Future]:
+        """
+        Encola imagenes RGB; todas o ninguna (ColaLlena si no caben)
+
+        Returns:
+            Un Future por imagen, que resuelve a Detecciones
+        """
+        futuros = [Future() for _ in imagenes]
+
+        with self._condicion:
+            if not self._activo:
+                raise RuntimeError("Planificador cerrado")
+            if len(imagenes) > self.tamano_cola:
+                raise SolicitudDemasiadoGrande(
+                    f"{len(imagenes)} imagenes superan la capacidad de la cola ({self.tamano_cola})"
+                )
+            if len(self._cola) + len(imagenes) > self.tamano_cola:
+                self.rechazadas += len(imagenes)
+                raise ColaLlena(f"Cola llena ({len(self._cola)}/{self.tamano_cola})")
+
+            ahora = time.perf_counter()
+            for imagen, futuro in zip(imagenes, futuros):
+                self._cola.append((imagen, confianza_min, futuro, ahora))
+            self.encoladas += len(imagenes)
+            self.max_profundidad = max(self.max_profundidad, len(self._cola))
+            self._condicion.notify()
+
+        return futuros
+
+    def detectar(self, imagenes: List[np.ndarray], confianza_min: float = 0.4) -> List[Detecciones]:
+        """Envia y espera los resultados en el orden recibido"""
+        return [futuro.result() for futuro in self.enviar(imagenes, confianza_min)]
+
+    def profundidad(self) -> int:
+        """Imagenes esperando en la cola"""
+        with self._condicion:
+            return len(self._cola)
+
+    def estadisticas(self) -> Dict:
+        """Contadores de la cola y de los lotes despachados"""
+        with self._condicion:
+            return {
+                'profundidad': len(self._cola),
+                'max_profundidad': self.max_profundidad,
+                'capacidad': self.tamano_cola,
+                'encoladas': self.encoladas,
+                'rechazadas': self.rechazadas,
+                'lotes': self.lotes,
+                'imagenes_procesadas': self.imagenes_procesadas,
+                'tamano_lote_promedio': round(self.imagenes_procesadas / self.lotes, 3) if self.lotes else 0.0
+            }
+
+    def texto_prometheus(self, prefijo: str = "jersey") -> str:
+        """Metricas de la cola en formato de texto de Prometheus"""
+        stats = self.estadisticas()
+        metricas = [
+            ('cola_profundidad', 'gauge', "Imagenes esperando lote", stats['profundidad']),
+            ('cola_capacidad', 'gauge', "Capacidad de la cola", stats['capacidad']),
+            ('cola_max_profundidad', 'gauge', "Profundidad maxima observada", stats['max_profundidad']),
+            ('cola_encoladas_total', 'counter', "Imagenes aceptadas", stats['encoladas']),
+            ('cola_rechazadas_total', 'counter', "Imagenes rechazadas por cola llena", stats['rechazadas']),
+            ('lotes_total', 'counter', "Lotes enviados al modelo", stats['lotes']),
+            ('lote_imagenes_total', 'counter', "Imagenes enviadas al modelo en lotes", stats['imagenes_procesadas'])
+        ]
+
+        lineas = []
+        for nombre, tipo, ayuda, valor in metricas:
+            lineas.append(f"# HELP {prefijo}_{nombre} {ayuda}")
+            lineas.append(f"# TYPE {prefijo}_{nombre} {tipo}")
+            lineas.append(f"{prefijo}_{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def cerrar(self, timeout: float = 5.0):
+        """Procesa lo pendiente y detiene el despachador"""
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify_all()
+        self._hilo.join(timeout)
+
+    def _tomar_lote(self) -> list:
+        """Espera la primera solicitud y completa el lote hasta lote_max o la espera maxima"""
+        with self._condicion:
+            while not self._cola and self._activo:
+                self._condicion.wait()
+            if not self._cola:
+                return []
+
+            # La espera cuenta desde que llego la solicitud mas antigua
+            limite = self._cola[0][3] + self.espera_max_s
+            while len(self._cola) < self.lote_max and self._activo:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                self._condicion.wait(restante)
+
+            return [self._cola.popleft() for _ in range(min(self.lote_max, len(self._cola)))]
+
+    def _bucle(self):
+        while True:
+            lote = self._tomar_lote()
+            if not lote:
+                return
+
+            self.analyzer.medidor.registrar('espera_cola', time.perf_counter() - lote[0][3])
+
+            try:
+                crudas = self.analyzer.inferir_crudo_lote([imagen for imagen, *_ in lote])
+            except Exception as e:
+                logger.error("Fallo la inferencia de un lote de %d imagenes: %s", len(lote), e)
+                for *_, futuro, _ in lote:
+                    futuro.set_exception(e)
+                continue
+
+            with self._condicion:
+                self.lotes += 1
+                self.imagenes_procesadas += len(lote)
+
+            # Un error aqui no debe terminar el hilo despachador ni dejar futuros sin resolver
+            try:
+                resultados = [
+                    self.analyzer.filtrar_detecciones(detecciones_crudas, confianza_min)
+                    for (_, confianza_min, _, _), detecciones_crudas in zip(lote, crudas)
+                ]
+                for detecciones in resultados:
+                    self.analyzer._guardar_en_log(detecciones, fuente=self.fuente_log)
+            except Exception as e:
+                logger.error("Fallo el posprocesamiento de un lote de %d imagenes: %s", len(lote), e)
+                for *_, futuro, _ in lote:
+                    futuro.set_exception(e)
+                continue
+
+            for (_, _, futuro, _), detecciones in zip(lote, resultados):
+                futuro.set_result(detecciones)
+
+
+def decodificar_bytes(datos: bytes) -> Optional[np.ndarray]:
+    """Decodifica JPEG/PNG/... en memoria a RGB (None si no es una imagen valida)"""
+    cv2 = importar_perezoso('cv2')
+    imagen = cv2.imdecode(np.frombuffer(datos, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if imagen is None:
+        return None
+    return cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+
+class ManejadorDeteccion(BaseHTTPRequestHandler):
+    """
+    Rutas:
+        POST /detectar?confianza=0.4
+            - Cuerpo binario (image/jpeg, image/png...): una imagen
+              -> {"detecciones": [...]}
+            - application/json {"imagenes": ["<base64>", ...], "confianza": 0.4}
+              -> {"resultados": [{"detecciones": [...]}, ...]}
+        GET /metricas   Metricas de cola y etapas (Prometheus)
+        GET /salud      Estado del servicio
+    """
+
+    # Asignado por crear_servidor
+    planificador: PlanificadorLotes = None
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        ruta = urlparse(self.path).path
+        if ruta == '/salud':
+            self._responder_json(200, {
+                'estado': 'ok' if self.planificador.analyzer.listo else 'cargando',
+                'modelo': self.planificador.analyzer.model_id,
+                'cola': self.planificador.estadisticas()
+            })
+        elif ruta == '/metricas':
+            texto = self.planificador.texto_prometheus() + self.planificador.analyzer.medidor.texto_prometheus()
+            self._responder(200, texto.encode('utf-8'), 'text/plain; version=0.0.4')
+        else:
+            self._responder_json(404, {'error': f"Ruta no encontrada: {ruta}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/detectar':
+            self._responder_json(404, {'error': f"Ruta no encontrada: {url.path}"})
+            return
+
+        longitud = int(self.headers.get('Content-Length') or 0)
+        if longitud <= 0:
+            self._responder_json(400, {'error': "Cuerpo vacio"})
+            return
+        if longitud > MAX_BYTES_SOLICITUD:
+            self._responder_json(413, {'error': f"Solicitud mayor a {MAX_BYTES_SOLICITUD} bytes"})
+            self.close_connection = True
+            return
+        cuerpo = self.rfile.read(longitud)
+
+        try:
+            confianza = float(parse_qs(url.query).get('confianza', ['0.4'])[0])
+            es_lote = self.headers.get('Content-Type', '').startswith('application/json')
+            if es_lote:
+                solicitud = json.loads(cuerpo)
+                if not isinstance(solicitud, dict) or not isinstance(solicitud.get('imagenes'), list):
+                    raise ValueError('se esperaba un objeto {"imagenes": [...]}')
+                confianza = float(solicitud.get('confianza', confianza))
+                contenidos = [base64.b64decode(imagen, validate=True) for imagen in solicitud['imagenes']]
+            else:
+                contenidos = [cuerpo]
+            # NaN pasaria el parseo y luego filtraria todas las detecciones sin error
+            if not math.isfinite(confianza) or not 0.0 <= confianza <= 1.0:
+                raise ValueError(f"confianza debe estar entre 0 y 1 (recibido {confianza})")
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            self._responder_json(400, {'error': f"Solicitud invalida: {e}"})
+            return
+
+        if len(contenidos) > self.planificador.tamano_cola:
+            self._responder_json(413, {
+                'error': f"{len(contenidos)} imagenes superan la capacidad de la cola "
+                         f"({self.planificador.tamano_cola}); dividir la solicitud"
+            })
+            return
+
+        imagenes = [decodificar_bytes(contenido) for contenido in contenidos]
+        invalidas = [i for i, imagen in enumerate(imagenes) if imagen is None]
+        if not imagenes or invalidas:
+            self._responder_json(400, {'error': "Imagen no decodificable", 'indices': invalidas})
+            return
+
+        try:
+            resultados = self.planificador.detectar(imagenes, confianza)
+        except ColaLlena as e:
+            self._responder_json(503, {'error': str(e)}, {'Retry-After': '1'})
+            return
+        except SolicitudDemasiadoGrande as e:
+            self._responder_json(413, {'error': str(e)})
+            return
+        except Exception as e:
+            self._responder_json(500, {'error': f"Error de inferencia: {e}"})
+            return
+
+        # Mismo formato que detectar_numeros
+        if es_lote:
+            self._responder_json(200, {'resultados': [{'detecciones': d.a_dicts()} for d in resultados]})
+        else:
+            self._responder_json(200, {'detecciones': resultados[0].a_dicts()})
+
+    def _responder_json(self, estado: int, datos: Dict, cabeceras: Optional[Dict[str, str]] = None):
+        self._responder(estado, json.dumps(datos).encode('utf-8'), 'application/json', cabeceras)
+
+    def _responder(self, estado: int, cuerpo: bytes, tipo: str, cabeceras: Optional[Dict[str, str]] = None):
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        logger.debug("%s %s", self.address_string(), formato % args)
+
+
+def crear_servidor(
+    planificador: PlanificadorLotes,
+    host: str = "0.0.0.0",
+    puerto: int = 8080
+) -> ThreadingHTTPServer:
+    """Servidor HTTP con un hilo por conexion que delega en el planificador"""
+    manejador = type('ManejadorConfigurado', (ManejadorDeteccion,), {'planificador': planificador})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    """Punto de entrada de la linea de comandos"""
+    parser = argparse.ArgumentParser(description="Servicio HTTP de deteccion de numeros con micro-lotes")
+    parser.add_argument('--host', default="0.0.0.0")
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--api-key', default=os.environ.get('ROBOFLOW_API_KEY', ''),
+                        help="Roboflow API key (por defecto $ROBOFLOW_API_KEY; opcional si el modelo esta en cache)")
+    parser.add_argument('--model-id', default="basketball-jersey-numbers-ocr/7")
+    parser.add_argument('--lote-max', type=int, default=8, help="Imagenes maximas por llamada al modelo")
+    parser.add_argument('--espera-ms', type=float, default=10.0,
+                        help="Espera maxima para completar un lote (ms)")
+    parser.add_argument('--tamano-cola', type=int, default=64,
+                        help="Imagenes en espera antes de responder 503")
+    agregar_argumentos_backend(parser)
+    args = parser.parse_args()
+
+    configurar_logging()
+
+    analyzer = JerseyAnalyzer(
+        api_key=args.api_key or None,
+        model_id=args.model_id,
+        backend=backend_desde_argumentos(args)
+    )
+    planificador = PlanificadorLotes(
+        analyzer,
+        lote_max=args.lote_max,
+        espera_max_s=args.espera_ms / 1000,
+        tamano_cola=args.tamano_cola
+    )
+    servidor = crear_servidor(planificador, args.host, args.puerto)
+
+    print(f"[OK] Servicio escuchando en http://{args.host}:{args.puerto} "
+          f"(lote_max={args.lote_max}, espera={args.espera_ms} ms, cola={args.tamano_cola})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nDeteniendo servicio...")
+    finally:
+        servidor.server_close()
+        planificador.cerrar()
+        analyzer.cerrar()
+
+
+if __name__ == "__main__":
+    main()
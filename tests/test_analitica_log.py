@@ -0,0 +1,150 @@
+"""
+Pruebas de la analitica incremental del log de detecciones
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analitica_log import AnalizadorLog, formatear_reporte  # noqa: E402
+from registro_detecciones import COLUMNAS_LOG  # noqa: E402
+
+
+FILAS = [
+    ('2026-10-18 12:05:00', '23', '0.9', 'a.jpg'),
+    ('2026-10-18 12:40:00', '7', '0.45', 'b.jpg'),
+    ('2026-10-18 13:10:00', '23', '0.7', 'c.jpg'),
+]
+
+
+class TestAnalizadorLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        self.ruta_log = self.directorio / 'jersey_log.csv'
+        self.ruta_estado = self.directorio / 'estado.json'
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _escribir(self, filas, ruta=None, encabezado=False):
+        with open(ruta or self.ruta_log, 'a', newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f)
+            if encabezado:
+                escritor.writerow(COLUMNAS_LOG)
+            escritor.writerows(filas)
+
+    def _analizador(self, **opciones):
+        return AnalizadorLog(self.ruta_log, self.ruta_estado, **opciones)
+
+    def test_agregados(self):
+        self._escribir(FILAS, encabezado=True)
+        analizador = self._analizador()
+        self.assertEqual(analizador.actualizar(), 3)
+
+        reporte = analizador.reporte()
+        self.assertEqual(reporte['filas'], 3)
+        self.assertEqual(reporte['por_numero'][0], {'numero': '23', 'detecciones': 2, 'confianza_promedio': 0.8})
+        self.assertEqual([b['detecciones'] for b in reporte['histograma_confianza']], [0, 0, 0, 0, 1, 0, 0, 1, 0, 1])
+        self.assertEqual(reporte['por_tiempo'], [
+            {'cubeta': '2026-10-18 12:00', 'detecciones': 2},
+            {'cubeta': '2026-10-18 13:00', 'detecciones': 1}
+        ])
+        self.assertTrue(formatear_reporte(reporte))
+
+    def test_cubetas_por_dia_y_de_minutos(self):
+        self._escribir(FILAS)
+        por_dia = AnalizadorLog(self.ruta_log, None, minutos_cubeta=1440)
+        por_dia.actualizar()
+        self.assertEqual(por_dia.reporte()['por_tiempo'], [{'cubeta': '2026-10-18', 'detecciones': 3}])
+
+        cuartos = AnalizadorLog(self.ruta_log, None, minutos_cubeta=15)
+        cuartos.actualizar()
+        self.assertEqual([c['cubeta'][11:] for c in cuartos.reporte()['por_tiempo']], ['12:00', '12:30', '13:00'])
+
+    def test_solo_lee_lo_nuevo(self):
+        self._escribir(FILAS[:2], encabezado=True)
+        analizador = self._analizador()
+        self.assertEqual(analizador.actualizar(), 2)
+        self.assertEqual(analizador.actualizar(), 0)
+
+        self._escribir(FILAS[2:])
+        self.assertEqual(analizador.actualizar(), 1)
+        self.assertEqual(analizador.reporte()['offset_bytes'], self.ruta_log.stat().st_size)
+
+    def test_reanuda_desde_estado_persistido(self):
+        self._escribir(FILAS[:2], encabezado=True)
+        self._analizador().actualizar()
+
+        self._escribir(FILAS[2:])
+        nuevo = self._analizador()
+        self.assertEqual(nuevo.actualizar(), 1)
+        self.assertEqual(nuevo.reporte()['filas'], 3)
+
+        # Con otra configuracion el estado guardado no aplica
+        otra = self._analizador(minutos_cubeta=30)
+        self.assertEqual(otra.actualizar(), 3)
+
+    def test_linea_incompleta_se_procesa_despues(self):
+        self._escribir(FILAS[:1])
+        with open(self.ruta_log, 'a', encoding='utf-8') as f:
+            f.write('2026-10-18 14:00:00,11,0.')
+        analizador = self._analizador()
+        self.assertEqual(analizador.actualizar(), 1)
+
+        with open(self.ruta_log, 'a', encoding='utf-8') as f:
+            f.write('6,d.jpg\n')
+        self.assertEqual(analizador.actualizar(), 1)
+        self.assertEqual(analizador.reporte()['por_numero'][0]['numero'], '11')
+
+    def test_filas_invalidas(self):
+        self._escribir([('2026-10-18 12:00:00', '5', 'alta', 'e.jpg'), ('corta',)] + FILAS[:1])
+        analizador = self._analizador()
+        self.assertEqual(analizador.actualizar(), 1)
+        self.assertEqual(analizador.reporte()['filas_invalidas'], 1)
+
+    def test_truncado_reinicia(self):
+        self._escribir(FILAS, encabezado=True)
+        analizador = self._analizador()
+        analizador.actualizar()
+
+        self.ruta_log.write_text('', encoding='utf-8')
+        self._escribir(FILAS[1:2])
+        self.assertEqual(analizador.actualizar(), 1)
+        self.assertEqual(analizador.reporte()['filas'], 1)
+
+    def test_rotacion_reinicia(self):
+        self._escribir(FILAS[:1])
+        analizador = self._analizador()
+        analizador.actualizar()
+
+        # Archivo nuevo (otro inodo) y mas largo que el offset guardado
+        rotado = self.directorio / 'nuevo.csv'
+        self._escribir(FILAS[1:] * 2, ruta=rotado)
+        os.replace(rotado, self.ruta_log)
+
+        self.assertEqual(analizador.actualizar(), 4)
+        self.assertEqual(analizador.reporte()['filas'], 4)
+
+    def test_reiniciar_relee_todo(self):
+        self._escribir(FILAS)
+        analizador = self._analizador()
+        analizador.actualizar()
+        analizador.reiniciar()
+        self.assertEqual(analizador.actualizar(), 3)
+
+    def test_log_inexistente(self):
+        self.assertEqual(self._analizador().actualizar(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Pruebas del backend sintetico
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import BackendSintetico  # noqa: E402
+
+
+def _imagenes(n, forma=(240, 320, 3)):
+    generador = np.random.default_rng(1)
+    return [generador.integers(0, 255, forma, dtype=np.uint8) for _ in range(n)]
+
+
+class TestBackendSintetico(unittest.TestCase):
+
+    def test_determinista(self):
+        backend = BackendSintetico(detecciones_por_imagen=5)
+        imagen = _imagenes(1)[0]
+        self.assertEqual(backend.infer(imagen, 0.1), backend.infer(imagen.copy(), 0.1))
+
+    def test_lote_igual_a_individual(self):
+        backend = BackendSintetico(detecciones_por_imagen=3)
+        imagenes = _imagenes(4)
+        self.assertEqual(backend.infer(imagenes, 0.2), [backend.infer(i, 0.2) for i in imagenes])
+
+    def test_refiltrar_igual_a_inferir_con_umbral(self):
+        backend = BackendSintetico(detecciones_por_imagen=8)
+        for imagen in _imagenes(10):
+            todas = backend.infer(imagen, 0.1).predictions
+            for umbral in (0.25, 0.4, 0.5, 0.75):
+                refiltradas = [p for p in todas if p.confidence >= umbral]
+                self.assertEqual(backend.infer(imagen, umbral).predictions, refiltradas)
+
+    def test_cajas_dentro_de_la_imagen(self):
+        backend = BackendSintetico(detecciones_por_imagen=10)
+        for imagen in _imagenes(5):
+            h, w = imagen.shape[:2]
+            for p in backend.infer(imagen, 0.1).predictions:
+                self.assertTrue(0.1 <= p.confidence <= 1.0)
+                self.assertGreaterEqual(p.x - p.width / 2, 0)
+                self.assertLessEqual(p.x + p.width / 2, w)
+                self.assertGreaterEqual(p.y - p.height / 2, 0)
+                self.assertLessEqual(p.y + p.height / 2, h)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Pruebas del cache de inferencia (niveles en memoria y en disco)
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import Prediccion, RespuestaDeteccion  # noqa: E402
+from cache_inferencia import CacheInferencia, clave_cache, huella_imagen  # noqa: E402
+from normalizacion import normalizar_respuesta  # noqa: E402
+
+
+def _respuesta(texto: str = 'a'):
+    """Respuesta VLM de exactamente 100 bytes en JSON compacto"""
+    return {'response': texto * 85}
+
+
+class TestClaves(unittest.TestCase):
+
+    def test_huella_depende_de_contenido_forma_y_dtype(self):
+        imagen = np.zeros((4, 6, 3), dtype=np.uint8)
+        self.assertEqual(huella_imagen(imagen), huella_imagen(imagen.copy()))
+        self.assertNotEqual(huella_imagen(imagen), huella_imagen(imagen.reshape(6, 4, 3)))
+        self.assertNotEqual(huella_imagen(imagen), huella_imagen(imagen.astype(np.uint16)))
+
+    def test_clave_incluye_modelo_y_confianza(self):
+        self.assertNotEqual(clave_cache('h', 'modelo/1', 0.1), clave_cache('h', 'modelo/2', 0.1))
+        self.assertNotEqual(clave_cache('h', 'modelo/1', 0.1), clave_cache('h', 'modelo/1', 0.2))
+
+
+class TestNivelMemoria(unittest.TestCase):
+
+    def test_expulsa_la_menos_reciente_por_bytes(self):
+        cache = CacheInferencia(max_bytes=250)
+        cache.guardar('a', _respuesta('a'))
+        cache.guardar('b', _respuesta('b'))
+        self.assertIsNotNone(cache.obtener('a'))
+
+        # 'b' quedo como la menos reciente y sale al superar 250 bytes
+        cache.guardar('c', _respuesta('c'))
+        self.assertIsNone(cache.obtener('b'))
+        self.assertIsNotNone(cache.obtener('a'))
+        self.assertIsNotNone(cache.obtener('c'))
+        self.assertEqual(cache.estadisticas()['bytes_memoria'], 200)
+
+    def test_reemplazo_no_duplica_bytes(self):
+        cache = CacheInferencia(max_bytes=1000)
+        cache.guardar('a', _respuesta('a'))
+        cache.guardar('a', _respuesta('b'))
+        self.assertEqual(cache.estadisticas()['bytes_memoria'], 100)
+        self.assertEqual(cache.obtener('a'), _respuesta('b'))
+
+    def test_sin_nivel_en_memoria(self):
+        cache = CacheInferencia(max_bytes=0)
+        cache.guardar('a', _respuesta())
+        self.assertIsNone(cache.obtener('a'))
+        self.assertEqual(cache.estadisticas()['entradas_memoria'], 0)
+
+    def test_aciertos_son_copias(self):
+        cache = CacheInferencia()
+        cache.guardar('a', _respuesta())
+        cache.obtener('a')['response'] = 'modificado'
+        self.assertEqual(cache.obtener('a'), _respuesta())
+
+    def test_respuesta_no_serializable_no_se_cachea(self):
+        cache = CacheInferencia()
+        cache.guardar('a', object())
+        cache.guardar('b', {'predictions': [{'x': object()}]})
+        self.assertIsNone(cache.obtener('a'))
+        self.assertIsNone(cache.obtener('b'))
+
+    def test_respuesta_yolo_normaliza_igual(self):
+        respuesta = RespuestaDeteccion([
+            Prediccion('23', 0.9, 100.0, 80.0, 30.0, 60.0),
+            Prediccion('7', 0.4, 10.0, 20.0, 5.0, 8.0)
+        ])
+        cache = CacheInferencia()
+        cache.guardar('a', respuesta)
+
+        desde_cache = normalizar_respuesta(cache.obtener('a'), 200, 200)
+        original = normalizar_respuesta(respuesta, 200, 200)
+        self.assertTrue(np.array_equal(desde_cache.datos, original.datos))
+
+
+class TestNivelDisco(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _archivos(self):
+        return sorted(ruta.stem for ruta in self.directorio.glob('*/*.json'))
+
+    def _envejecer(self, cache, clave, segundos):
+        """Fija el mtime de una entrada para no depender de la resolucion del reloj"""
+        ruta = cache._ruta_disco(clave)
+        os.utime(ruta, (segundos, segundos))
+
+    def test_escribe_json_y_lee_desde_disco(self):
+        cache = CacheInferencia(max_bytes=0, dir_disco=self.directorio)
+        cache.guardar('ab12', _respuesta())
+        self.assertTrue((self.directorio / 'ab' / 'ab12.json').exists())
+
+        nueva = CacheInferencia(dir_disco=self.directorio)
+        self.assertEqual(nueva.obtener('ab12'), _respuesta())
+        self.assertEqual(nueva.estadisticas()['aciertos_disco'], 1)
+
+        # El acierto en disco sube la entrada al nivel en memoria
+        nueva.obtener('ab12')
+        self.assertEqual(nueva.estadisticas()['aciertos_memoria'], 1)
+
+    def test_poda_las_menos_recientes(self):
+        cache = CacheInferencia(max_bytes=0, dir_disco=self.directorio, max_bytes_disco=250)
+        cache.guardar('aa01', _respuesta('a'))
+        cache.guardar('bb02', _respuesta('b'))
+        cache.guardar('cc03', _respuesta('c'))
+
+        self.assertEqual(self._archivos(), ['bb02', 'cc03'])
+        self.assertEqual(cache.estadisticas()['bytes_disco'], 200)
+
+    def test_lectura_protege_de_la_poda(self):
+        cache = CacheInferencia(max_bytes=0, dir_disco=self.directorio, max_bytes_disco=250)
+        cache.guardar('aa01', _respuesta('a'))
+        cache.guardar('bb02', _respuesta('b'))
+        self.assertIsNotNone(cache.obtener('aa01'))
+
+        cache.guardar('cc03', _respuesta('c'))
+        self.assertEqual(self._archivos(), ['aa01', 'cc03'])
+
+    def test_reindexa_por_mtime_al_iniciar(self):
+        cache = CacheInferencia(max_bytes=0, dir_disco=self.directorio)
+        for clave in ['aa01', 'bb02', 'cc03']:
+            cache.guardar(clave, _respuesta(clave[0]))
+        # 'cc03' es la mas antigua en disco aunque se escribio ultima
+        for segundos, clave in [(1000, 'cc03'), (2000, 'aa01'), (3000, 'bb02')]:
+            self._envejecer(cache, clave, segundos)
+
+        nueva = CacheInferencia(max_bytes=0, dir_disco=self.directorio, max_bytes_disco=250)
+        self.assertEqual(self._archivos(), ['aa01', 'bb02'])
+        self.assertEqual(nueva.estadisticas()['entradas_disco'], 2)
+
+    def test_borra_entradas_pickle_antiguas(self):
+        (self.directorio / 'ab').mkdir()
+        antigua = self.directorio / 'ab' / 'ab12.pkl'
+        antigua.write_bytes(b'\x80\x04N.')
+
+        cache = CacheInferencia(dir_disco=self.directorio)
+        self.assertFalse(antigua.exists())
+        self.assertIsNone(cache.obtener('ab12'))
+
+    def test_json_corrupto_es_fallo(self):
+        (self.directorio / 'ab').mkdir()
+        (self.directorio / 'ab' / 'ab12.json').write_bytes(b'{no es json')
+
+        cache = CacheInferencia(dir_disco=self.directorio)
+        self.assertIsNone(cache.obtener('ab12'))
+        self.assertEqual(cache.estadisticas()['fallos'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Pruebas del contenedor columnar de detecciones
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from detecciones import COLUMNAS, DTYPE_DETECCION, Detecciones  # noqa: E402
+
+
+def _detecciones():
+    return Detecciones.desde_columnas(
+        ['7', '23', '4', '11'],
+        [0.35, 0.9, 0.4, 0.1],
+        [100, 200, 50, 10],
+        [80, 120, 40, 10],
+        [30, 40, 20, 4],
+        [60, 70, 30, 6]
+    )
+
+
+class TestDetecciones(unittest.TestCase):
+
+    def test_filtrar(self):
+        detecciones = _detecciones()
+        self.assertEqual(detecciones.filtrar(0.4).numeros.tolist(), ['23', '4'])
+        self.assertEqual(len(detecciones.filtrar(0.0)), 4)
+        self.assertEqual(len(detecciones.filtrar(0.95)), 0)
+
+    def test_filtrar_incluye_el_umbral_pese_al_float32(self):
+        # 0.35 y 0.1 no son exactos en float32 y quedan apenas por debajo del umbral
+        detecciones = _detecciones()
+        self.assertIn('7', detecciones.filtrar(0.35).numeros.tolist())
+        self.assertEqual(len(detecciones.filtrar(0.1)), 4)
+
+    def test_filtrar_es_idempotente_y_monotono(self):
+        detecciones = _detecciones()
+        umbrales = [0.1, 0.2, 0.35, 0.4, 0.5, 0.9]
+        for menor, mayor in zip(umbrales, umbrales[1:]):
+            self.assertTrue(np.array_equal(
+                detecciones.filtrar(menor).filtrar(mayor).datos,
+                detecciones.filtrar(mayor).datos
+            ))
+
+    def test_vacio(self):
+        vacio = Detecciones()
+        self.assertFalse(vacio)
+        self.assertEqual(len(vacio.filtrar(0.5)), 0)
+        self.assertEqual(vacio.estadisticas()['total'], 0)
+        self.assertEqual(vacio.a_dicts(), [])
+        self.assertEqual(vacio.datos.dtype, DTYPE_DETECCION)
+
+    def test_dicts_ida_y_vuelta(self):
+        detecciones = _detecciones()
+        dicts = detecciones.a_dicts()
+        self.assertEqual(dicts[1], {'numero': '23', 'confianza': 0.9, 'bbox': {'x': 200, 'y': 120, 'width': 40, 'height': 70}})
+        self.assertEqual(Detecciones.desde_dicts(dicts).filas(), detecciones.filas())
+
+    def test_estadisticas(self):
+        stats = _detecciones().estadisticas()
+        self.assertEqual(stats['total'], 4)
+        self.assertEqual(stats['confianza_max'], 0.9)
+        self.assertEqual(stats['confianza_min'], 0.1)
+        self.assertAlmostEqual(stats['confianza_promedio'], 0.4375, places=2)
+
+    def test_esquinas(self):
+        esquinas = _detecciones().esquinas()
+        self.assertEqual(esquinas.shape, (4, 4))
+        self.assertEqual(esquinas[0].tolist(), [85, 50, 115, 110])
+
+    def test_seleccion_y_concatenar(self):
+        detecciones = _detecciones()
+        self.assertEqual(len(detecciones[0]), 1)
+        self.assertEqual(detecciones[1:3].numeros.tolist(), ['23', '4'])
+        unidas = Detecciones.concatenar([detecciones[:2], detecciones[2:]])
+        self.assertTrue(np.array_equal(unidas.datos, detecciones.datos))
+        self.assertEqual(len(Detecciones.concatenar([])), 0)
+
+    def test_filas_en_orden_de_columnas(self):
+        fila = _detecciones().filas()[0]
+        self.assertEqual(len(fila), len(COLUMNAS))
+        self.assertEqual(fila, ('7', 0.35, 100, 80, 30, 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
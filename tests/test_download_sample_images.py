@@ -0,0 +1,185 @@
+"""
+Pruebas de DescargadorImagenes contra un servidor HTTP local
+
+Las URLs de las tareas apuntan a un host ficticio y se redirigen al servidor
+de prueba con `url_base`, como hace `--url-base` en la linea de comandos.
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_sample_images import NOMBRE_MANIFIESTO, DescargadorImagenes  # noqa: E402
+
+
+IMAGENES = {
+    '/img/a.jpg': b'\xff\xd8' + b'a' * 5000,
+    '/img/b.jpg': b'\xff\xd8' + b'b' * 70000,
+    '/img/c.jpg': b'\xff\xd8' + b'c' * 10,
+}
+
+
+class ServidorPrueba:
+    """Servidor HTTP en un hilo que sirve IMAGENES y cuenta solicitudes por ruta"""
+
+    def __init__(self):
+        self.solicitudes = Counter()
+        # ruta -> codigos de estado a devolver antes de servir la imagen
+        self.fallos = {}
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor.solicitudes[self.path] += 1
+                pendientes = servidor.fallos.get(self.path)
+                if pendientes:
+                    self.send_response(pendientes.pop(0))
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                cuerpo = IMAGENES.get(self.path)
+                if cuerpo is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.url_base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.hilo = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.hilo.start()
+
+    def cerrar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestDescargadorImagenes(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ServidorPrueba()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.cerrar()
+
+    def setUp(self):
+        self.servidor.solicitudes.clear()
+        self.servidor.fallos.clear()
+        self.directorio = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _descargador(self):
+        return DescargadorImagenes(
+            self.directorio,
+            hilos=4,
+            timeout=5,
+            reintentos=2,
+            backoff_s=0,
+            url_base=self.servidor.url_base
+        )
+
+    def _descargar(self, tareas):
+        descargador = self._descargador()
+        try:
+            return descargador.descargar(tareas)
+        finally:
+            descargador.cerrar()
+
+    @staticmethod
+    def _tareas(*rutas):
+        return [(f"https://origen.invalid{ruta}", Path(ruta).name) for ruta in rutas]
+
+    def test_descarga_y_manifiesto(self):
+        resumen = self._descargar(self._tareas(*IMAGENES))
+
+        self.assertEqual(resumen['descargadas'], len(IMAGENES))
+        self.assertEqual(resumen['fallidas'], 0)
+        self.assertEqual(resumen['bytes'], sum(len(c) for c in IMAGENES.values()))
+
+        entradas = [
+            json.loads(linea)
+            for linea in (self.directorio / NOMBRE_MANIFIESTO).read_text(encoding='utf-8').splitlines()
+        ]
+        self.assertEqual(len(entradas), len(IMAGENES))
+        for entrada in entradas:
+            cuerpo = IMAGENES['/img/' + entrada['archivo']]
+            self.assertEqual((self.directorio / entrada['archivo']).read_bytes(), cuerpo)
+            self.assertEqual(entrada['sha256'], hashlib.sha256(cuerpo).hexdigest())
+            self.assertEqual(entrada['bytes'], len(cuerpo))
+            self.assertEqual(entrada['url'], 'https://origen.invalid/img/' + entrada['archivo'])
+
+        self.assertEqual(list(self.directorio.glob('*.part')), [])
+
+    def test_reanudacion_omite_descargadas(self):
+        self._descargar(self._tareas('/img/a.jpg', '/img/b.jpg'))
+        self.servidor.solicitudes.clear()
+
+        resumen = self._descargar(self._tareas('/img/a.jpg', '/img/b.jpg', '/img/c.jpg'))
+
+        self.assertEqual(resumen['omitidas'], 2)
+        self.assertEqual(resumen['descargadas'], 1)
+        self.assertEqual(self.servidor.solicitudes, Counter({'/img/c.jpg': 1}))
+
+    def test_misma_ruta_con_otra_url_se_descarga(self):
+        self._descargar([("https://origen.invalid/img/a.jpg", 'imagen.jpg')])
+        self.servidor.solicitudes.clear()
+
+        resumen = self._descargar([("https://origen.invalid/img/b.jpg", 'imagen.jpg')])
+
+        self.assertEqual(resumen['omitidas'], 0)
+        self.assertEqual(resumen['descargadas'], 1)
+        self.assertEqual((self.directorio / 'imagen.jpg').read_bytes(), IMAGENES['/img/b.jpg'])
+
+    def test_archivo_modificado_se_descarga(self):
+        self._descargar(self._tareas('/img/a.jpg'))
+        ruta = self.directorio / 'a.jpg'
+        ruta.write_bytes(b'x' * len(IMAGENES['/img/a.jpg']))
+
+        resumen = self._descargar(self._tareas('/img/a.jpg'))
+
+        self.assertEqual(resumen['descargadas'], 1)
+        self.assertEqual(ruta.read_bytes(), IMAGENES['/img/a.jpg'])
+
+    def test_reintenta_errores_transitorios(self):
+        self.servidor.fallos['/img/a.jpg'] = [503, 429]
+
+        resumen = self._descargar(self._tareas('/img/a.jpg'))
+
+        self.assertEqual(resumen['descargadas'], 1)
+        self.assertEqual(self.servidor.solicitudes['/img/a.jpg'], 3)
+
+    def test_error_definitivo_no_se_reintenta(self):
+        resumen = self._descargar(self._tareas('/img/no_existe.jpg'))
+
+        self.assertEqual(resumen['fallidas'], 1)
+        self.assertEqual(self.servidor.solicitudes['/img/no_existe.jpg'], 1)
+        self.assertFalse((self.directorio / 'no_existe.jpg').exists())
+        self.assertFalse((self.directorio / NOMBRE_MANIFIESTO).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Pruebas del arnes de evaluacion con el backend sintetico
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import evaluar_modelo  # noqa: E402
+from backends import BackendSintetico  # noqa: E402
+from basketball_jersey_analyzer import CONFIANZA_INFERENCIA, JerseyAnalyzer  # noqa: E402
+from cache_inferencia import CacheInferencia  # noqa: E402
+from detecciones import Detecciones  # noqa: E402
+from evaluar_modelo import Muestra, parsear_config, prediccion, resumir  # noqa: E402
+
+
+BASE = {'nombre': 'A', 'umbral': 0.4, 'backend': 'sintetico', 'tam_entrada': 640, 'modo': 'reducir'}
+
+
+class BackendNoSeguro(BackendSintetico):
+    seguro_entre_hilos = False
+
+
+class TestFunciones(unittest.TestCase):
+
+    def test_parsear_config(self):
+        config = parsear_config("umbral=0.6, tam-entrada=480", BASE)
+        self.assertEqual(config['umbral'], 0.6)
+        self.assertEqual(config['tam_entrada'], 480)
+        self.assertEqual(config['backend'], 'sintetico')
+
+    def test_parsear_config_invalida(self):
+        for texto in ("color=rojo", "modo=estirar", f"umbral={CONFIANZA_INFERENCIA / 2}", "umbral=1.5"):
+            with self.assertRaises(ValueError, msg=texto):
+                parsear_config(texto, BASE)
+
+    def test_prediccion_mayor_confianza_sobre_umbral(self):
+        detecciones = Detecciones.desde_columnas(['7', '23', '4'], [0.5, 0.9, 0.3], [0] * 3, [0] * 3, [1] * 3, [1] * 3)
+        self.assertEqual(prediccion(detecciones, 0.4), ('23', 0.9))
+        self.assertEqual(prediccion(detecciones, 0.95), (None, 0.0))
+
+    def test_resumir(self):
+        imagen = np.zeros((1, 1, 3), dtype=np.uint8)
+        muestras = [Muestra('a', '7', imagen), Muestra('b', '7', imagen), Muestra('c', '23', imagen)]
+        reporte = resumir(muestras, [('7', 0.9), (None, 0.0), ('23', 0.8)], [0.01, 0.02, 0.03], 0.5)
+
+        self.assertEqual(reporte['aciertos'], 2)
+        self.assertEqual(reporte['sin_deteccion'], 1)
+        self.assertEqual(reporte['por_numero']['7'], {'muestras': 2, 'aciertos': 1, 'exactitud': 0.5})
+        self.assertAlmostEqual(reporte['latencia']['p50_ms'], 20.0)
+        self.assertEqual(reporte['imagenes_por_segundo'], 6.0)
+
+
+class TestEvaluarConfiguraciones(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        # El analizador escribe jersey_log.csv en el directorio actual
+        self.cwd = os.getcwd()
+        os.chdir(self.directorio)
+
+        generador = np.random.default_rng(3)
+        self.muestras = [
+            Muestra(str(i), str(i % 3), generador.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+            for i in range(9)
+        ]
+        self.args = argparse.Namespace(hilos=4)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _evaluar(self, clase_backend, configs):
+        creados = []
+
+        def crear_analizador(args, config):
+            creados.append(config)
+            return JerseyAnalyzer(
+                backend=clase_backend(detecciones_por_imagen=3),
+                cache=CacheInferencia(max_bytes=0),
+                calentamiento=0
+            )
+
+        with mock.patch.object(evaluar_modelo, 'crear_analizador', crear_analizador):
+            reportes = evaluar_modelo.evaluar_configuraciones(self.args, configs, self.muestras)
+        return reportes, creados
+
+    def test_solo_umbral_reutiliza_inferencia(self):
+        configs = [BASE, dict(BASE, nombre='B', umbral=0.7)]
+        reportes, creados = self._evaluar(BackendSintetico, configs)
+
+        self.assertEqual(len(creados), 1)
+        self.assertEqual([r['hilos'] for r in reportes], [4, 4])
+        self.assertGreaterEqual(reportes[1]['sin_deteccion'], reportes[0]['sin_deteccion'])
+
+    def test_backend_no_seguro_usa_un_hilo(self):
+        reportes, _ = self._evaluar(BackendNoSeguro, [BASE])
+        self.assertEqual(reportes[0]['hilos'], 1)
+        self.assertEqual(reportes[0]['confianza_inferencia'], CONFIANZA_INFERENCIA)
+
+
+if __name__ == '__main__':
+    unittest.main()
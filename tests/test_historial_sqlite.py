@@ -0,0 +1,108 @@
+"""
+Pruebas del historial SQLite y de la importacion incremental del log CSV
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import csv
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from historial_sqlite import HistorialSQLite  # noqa: E402
+from registro_detecciones import COLUMNAS_LOG, RegistroCSVAsincrono  # noqa: E402
+
+
+def _filas(numeros, dia='2026-10-18'):
+    return [(f'{dia} 12:00:{i:02d}', str(n), '0.8', 'x.jpg') for i, n in enumerate(numeros)]
+
+
+class TestHistorialSQLite(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        self.ruta_csv = self.directorio / 'jersey_log.csv'
+        self.historial = HistorialSQLite(self.directorio / 'historial.sqlite')
+
+    def tearDown(self):
+        self.historial.cerrar()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _escribir_csv(self, filas, modo='a'):
+        with open(self.ruta_csv, modo, newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f)
+            if modo == 'w':
+                escritor.writerow(COLUMNAS_LOG)
+            escritor.writerows(filas)
+
+    def test_contar_y_ranking(self):
+        self.historial.agregar(_filas(['23', '23', '7']))
+        self.historial.agregar(_filas(['23'], dia='2026-10-19'))
+
+        self.assertEqual(self.historial.contar(), 4)
+        self.assertEqual(self.historial.contar('23'), 3)
+        self.assertEqual(self.historial.contar('23', hasta='2026-10-19'), 2)
+        self.assertEqual(self.historial.contar_por_numero(), [('23', 3, 0.8), ('7', 1, 0.8)])
+        self.assertEqual(self.historial.contar_por_numero(limite=1), [('23', 3, 0.8)])
+
+    def test_podar(self):
+        self.historial.agregar(_filas(['1', '2'], dia='2020-01-01') + _filas(['3']))
+        self.assertEqual(self.historial.podar(antes_de='2026-01-01'), 2)
+        self.assertEqual(self.historial.contar(), 1)
+
+    def test_importacion_incremental(self):
+        self._escribir_csv(_filas(['1', '2', '3']), modo='w')
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 3)
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 0)
+
+        self._escribir_csv(_filas(['4']))
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 1)
+        self.assertEqual(self.historial.contar(), 4)
+
+    def test_linea_incompleta_se_importa_despues(self):
+        self._escribir_csv(_filas(['1']), modo='w')
+        with open(self.ruta_csv, 'a', encoding='utf-8') as f:
+            f.write('2026-10-18 12:00:09,5,0.')
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 1)
+
+        with open(self.ruta_csv, 'a', encoding='utf-8') as f:
+            f.write('7,x.jpg\n')
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 1)
+        self.assertEqual(self.historial.contar('5'), 1)
+
+    def test_archivo_truncado_reimporta(self):
+        self._escribir_csv(_filas(['1', '2', '3']), modo='w')
+        self.historial.importar_csv(self.ruta_csv)
+
+        self._escribir_csv(_filas(['9']), modo='w')
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 1)
+        self.assertEqual(self.historial.contar('9'), 1)
+
+    def test_no_duplica_filas_escritas_en_ambos(self):
+        # Filas previas solo en el CSV, luego escritura doble desde el registro
+        self._escribir_csv(_filas(['1', '2']), modo='w')
+        registro = RegistroCSVAsincrono(self.ruta_csv, max_filas=1000, intervalo_s=60, historial=self.historial)
+        registro.agregar(_filas(['23', '7']))
+        registro.vaciar()
+        registro.agregar(_filas(['11']))
+        registro.vaciar()
+        registro.cerrar()
+        # Otra fila solo en el CSV, despues de los rangos dobles
+        self._escribir_csv(_filas(['4']))
+
+        self.assertEqual(self.historial.contar(), 3)
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 3)
+        self.assertEqual(self.historial.contar(), 6)
+        for numero in ('1', '2', '4', '7', '11', '23'):
+            self.assertEqual(self.historial.contar(numero), 1, numero)
+
+        self.assertEqual(self.historial.importar_csv(self.ruta_csv), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
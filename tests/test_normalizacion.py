@@ -0,0 +1,116 @@
+"""
+Pruebas de la normalizacion de respuestas del modelo
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backends import Prediccion, RespuestaDeteccion  # noqa: E402
+from normalizacion import (  # noqa: E402
+    CONFIANZA_VLM,
+    FRACCION_CAJA_VLM,
+    NormalizadorRespuestas,
+    numeros_en_texto,
+    respuesta_a_json
+)
+from preprocesamiento import Transformacion  # noqa: E402
+
+
+class RespuestaVLM:
+    def __init__(self, response):
+        self.response = response
+
+
+def _yolo():
+    return RespuestaDeteccion([
+        Prediccion('23', 0.9, 320.0, 240.0, 64.0, 48.0),
+        Prediccion('7', 0.4, 10.0, 20.0, 6.0, 8.0)
+    ])
+
+
+class TestNormalizador(unittest.TestCase):
+
+    def setUp(self):
+        self.normalizador = NormalizadorRespuestas()
+
+    def test_numeros_en_texto(self):
+        self.assertEqual(numeros_en_texto("Veo el #23, el 7. y otra vez 23"), ['23', '7'])
+        self.assertEqual(numeros_en_texto("sin numeros"), [])
+
+    def test_vlm_varios_numeros(self):
+        detecciones = self.normalizador.normalizar(RespuestaVLM("Jugadores 23 y 7"), 200, 300)
+        self.assertEqual(detecciones.numeros.tolist(), ['23', '7'])
+        self.assertTrue(np.allclose(detecciones.confianzas, CONFIANZA_VLM))
+        self.assertEqual(detecciones.filas()[0][2:], (150, 100, int(300 * FRACCION_CAJA_VLM), int(200 * FRACCION_CAJA_VLM)))
+
+    def test_vlm_sin_numeros(self):
+        self.assertEqual(len(self.normalizador.normalizar(RespuestaVLM("nada"), 200, 300)), 0)
+
+    def test_yolo(self):
+        detecciones = self.normalizador.normalizar(_yolo(), 480, 640)
+        self.assertEqual(detecciones.numeros.tolist(), ['23', '7'])
+        self.assertTrue(np.allclose(detecciones.confianzas, [0.9, 0.4]))
+        self.assertEqual(detecciones.filas()[0][2:], (320, 240, 64, 48))
+
+    def test_yolo_con_transformacion(self):
+        transformacion = Transformacion(3000, 4000, 480, 640, escala=0.16)
+        detecciones = self.normalizador.normalizar(_yolo(), 3000, 4000, transformacion)
+        self.assertEqual(detecciones.filas()[0][2:], (2000, 1500, 400, 300))
+
+    def test_dict_predicciones(self):
+        transformacion = Transformacion(3000, 4000, 480, 640, escala=0.16)
+        respuesta = {'predictions': [
+            {'class': '23', 'confidence': 0.9, 'x': 320, 'y': 240, 'width': 64, 'height': 48},
+            {'class_name': '7', 'confidence': 0.4, 'x': 10, 'y': 20, 'width': 6, 'height': 8}
+        ]}
+        detecciones = self.normalizador.normalizar(respuesta, 3000, 4000, transformacion)
+        self.assertEqual(detecciones.numeros.tolist(), ['23', '7'])
+        self.assertEqual(detecciones.filas()[0][2:], (2000, 1500, 400, 300))
+
+    def test_dict_vlm_y_desconocido(self):
+        detecciones = self.normalizador.normalizar({'response': '11'}, 100, 100)
+        self.assertEqual(detecciones.numeros.tolist(), ['11'])
+        self.assertEqual(len(self.normalizador.normalizar({'otra': 1}, 100, 100)), 0)
+
+    def test_tipo_desconocido(self):
+        self.assertEqual(len(self.normalizador.normalizar(object(), 100, 100)), 0)
+        self.assertEqual(len(self.normalizador.normalizar(None, 100, 100)), 0)
+
+    def test_despacho_por_tipo_en_cache(self):
+        self.normalizador.normalizar(_yolo(), 100, 100)
+        self.normalizador.normalizar(_yolo(), 100, 100)
+        self.normalizador.normalizar(RespuestaVLM("5"), 100, 100)
+        self.assertEqual(set(self.normalizador._despacho), {dict, RespuestaDeteccion, RespuestaVLM})
+
+        # El manejador se resuelve con la primera respuesta de cada tipo y no se revisa
+        self.normalizador.normalizar(SimpleNamespace(response="9"), 100, 100)
+        detecciones = self.normalizador.normalizar(SimpleNamespace(predictions=_yolo().predictions), 100, 100)
+        self.assertEqual(len(detecciones), 0)
+        self.assertEqual(len(NormalizadorRespuestas().normalizar(SimpleNamespace(predictions=_yolo().predictions), 100, 100)), 2)
+
+
+class TestRespuestaAJson(unittest.TestCase):
+
+    def test_ida_y_vuelta(self):
+        normalizador = NormalizadorRespuestas()
+        transformacion = Transformacion(3000, 4000, 480, 640, escala=0.16)
+        for respuesta in (_yolo(), RespuestaVLM("23 y 4"), {'response': '8'}):
+            original = normalizador.normalizar(respuesta, 3000, 4000, transformacion)
+            desde_json = normalizador.normalizar(respuesta_a_json(respuesta), 3000, 4000, transformacion)
+            self.assertTrue(np.array_equal(original.datos, desde_json.datos))
+
+    def test_tipo_desconocido(self):
+        self.assertIsNone(respuesta_a_json(object()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Pruebas del preprocesamiento y de la transformacion inversa de cajas
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from detecciones import Detecciones  # noqa: E402
+from preprocesamiento import Preprocesador, Transformacion, a_arreglo_rgb  # noqa: E402
+
+
+def _caja(x, y, w, h):
+    return Detecciones.desde_columnas(['7'], [0.9], [x], [y], [w], [h])
+
+
+class TestTransformacion(unittest.TestCase):
+
+    def test_identidad_no_copia(self):
+        detecciones = _caja(10, 20, 4, 6)
+        transformacion = Transformacion(100, 200, 100, 200)
+        self.assertTrue(transformacion.es_identidad)
+        self.assertIs(transformacion.a_original(detecciones), detecciones)
+
+    def test_reduccion(self):
+        # 3000x4000 reducida a 480x640 (escala 0.16)
+        transformacion = Preprocesador(640, 'reducir').transformacion(3000, 4000)
+        self.assertEqual((transformacion.alto_escalado, transformacion.ancho_escalado), (480, 640))
+
+        original = transformacion.a_original(_caja(320, 240, 64, 48))
+        self.assertEqual(original.filas()[0][2:], (2000, 1500, 400, 300))
+
+    def test_letterbox(self):
+        transformacion = Preprocesador(640, 'letterbox').transformacion(3000, 4000)
+        self.assertEqual((transformacion.pad_x, transformacion.pad_y), (0, 80))
+
+        # Centro de la region util -> centro de la imagen original
+        original = transformacion.a_original(_caja(320, 80 + 240, 64, 48))
+        self.assertEqual(original.filas()[0][2:], (2000, 1500, 400, 300))
+
+    def test_letterbox_sin_ampliar(self):
+        transformacion = Preprocesador(640, 'letterbox').transformacion(200, 300)
+        self.assertEqual(transformacion.escala, 1.0)
+        self.assertEqual((transformacion.pad_x, transformacion.pad_y), (170, 220))
+
+        original = transformacion.a_original(_caja(170 + 150, 220 + 100, 30, 20))
+        self.assertEqual(original.filas()[0][2:], (150, 100, 30, 20))
+
+    def test_centros_recortados_a_la_imagen(self):
+        transformacion = Preprocesador(640, 'letterbox').transformacion(3000, 4000)
+        original = transformacion.a_original(_caja(700, 0, 10, 10))
+        x, y = original.filas()[0][2:4]
+        self.assertEqual((x, y), (4000, 0))
+
+    def test_no_modifica_la_entrada(self):
+        detecciones = _caja(320, 240, 64, 48)
+        Preprocesador(640, 'reducir').transformacion(3000, 4000).a_original(detecciones)
+        self.assertEqual(detecciones.filas()[0][2:], (320, 240, 64, 48))
+
+
+class TestPreprocesador(unittest.TestCase):
+
+    def setUp(self):
+        self.imagen = np.random.default_rng(4).integers(0, 255, (300, 400, 3), dtype=np.uint8)
+
+    def test_modos(self):
+        reducida, _ = Preprocesador(200, 'reducir').preparar(self.imagen)
+        self.assertEqual(reducida.shape, (150, 200, 3))
+
+        lienzo, transformacion = Preprocesador(200, 'letterbox', color_relleno=114).preparar(self.imagen)
+        self.assertEqual(lienzo.shape, (200, 200, 3))
+        self.assertTrue((lienzo[:transformacion.pad_y] == 114).all())
+
+        original, transformacion = Preprocesador(200, 'ninguno').preparar(self.imagen)
+        self.assertIs(original, self.imagen)
+        self.assertTrue(transformacion.es_identidad)
+
+    def test_imagen_chica_pasa_sin_cambios(self):
+        imagen, transformacion = Preprocesador(640, 'reducir').preparar(self.imagen)
+        self.assertIs(imagen, self.imagen)
+        self.assertTrue(transformacion.es_identidad)
+
+    def test_buffers_por_indice_y_por_hilo(self):
+        preprocesador = Preprocesador(200, 'reducir')
+        a, _ = preprocesador.preparar(self.imagen, indice=0)
+        b, _ = preprocesador.preparar(self.imagen, indice=1)
+        self.assertFalse(np.shares_memory(a, b))
+
+        otro_hilo = {}
+        hilo = threading.Thread(target=lambda: otro_hilo.update(c=preprocesador.preparar(self.imagen)[0]))
+        hilo.start()
+        hilo.join()
+        self.assertFalse(np.shares_memory(a, otro_hilo['c']))
+
+    def test_firma(self):
+        self.assertEqual(Preprocesador(480, 'letterbox').firma, 'letterbox:480')
+        self.assertEqual(Preprocesador(480, 'ninguno').firma, 'ninguno')
+        with self.assertRaises(ValueError):
+            Preprocesador(480, 'estirar')
+
+
+class TestArregloRGB(unittest.TestCase):
+
+    def test_conversiones(self):
+        gris = np.full((4, 5), 7, dtype=np.uint8)
+        self.assertEqual(a_arreglo_rgb(gris).shape, (4, 5, 3))
+
+        rgba = np.zeros((4, 5, 4), dtype=np.uint8)
+        self.assertEqual(a_arreglo_rgb(rgba).shape, (4, 5, 3))
+
+        flotante = np.ones((2, 2, 3), dtype=np.float32)
+        self.assertTrue((a_arreglo_rgb(flotante) == 255).all())
+
+        bgr = np.zeros((1, 1, 3), dtype=np.uint8)
+        bgr[..., 0] = 200
+        self.assertEqual(a_arreglo_rgb(bgr, bgr=True)[0, 0].tolist(), [0, 0, 200])
+
+    def test_rgb_uint8_sin_copia(self):
+        imagen = np.zeros((3, 3, 3), dtype=np.uint8)
+        self.assertIs(a_arreglo_rgb(imagen), imagen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Pruebas del pipeline de directorio con el backend sintetico
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cv2  # noqa: E402
+
+from backends import BackendSintetico  # noqa: E402
+from basketball_jersey_analyzer import JerseyAnalyzer  # noqa: E402
+from exportacion import EscritorDetecciones  # noqa: E402
+from procesar_directorio import PipelineDirectorio, listar_imagenes  # noqa: E402
+
+
+class TestPipelineDirectorio(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        # El analizador escribe jersey_log.csv en el directorio actual
+        self.cwd = os.getcwd()
+        os.chdir(self.directorio)
+
+        self.dir_imagenes = self.directorio / 'imagenes'
+        self.dir_imagenes.mkdir()
+        generador = np.random.default_rng(0)
+        for i in range(24):
+            imagen = generador.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+            cv2.imwrite(str(self.dir_imagenes / f'img_{i:02d}.png'), imagen)
+
+        self.analyzer = JerseyAnalyzer(backend=BackendSintetico(), calentamiento=0)
+
+    def tearDown(self):
+        self.analyzer.registro.cerrar()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _procesar(self, pipeline, salida):
+        """Ejecuta procesar() en un hilo para detectar bloqueos"""
+        resultado = {}
+
+        def ejecutar():
+            try:
+                resultado['resumen'] = pipeline.procesar(listar_imagenes(self.dir_imagenes), salida)
+            except Exception as e:
+                resultado['error'] = e
+
+        hilo = threading.Thread(target=ejecutar, daemon=True)
+        hilo.start()
+        hilo.join(timeout=30)
+        self.assertFalse(hilo.is_alive(), "procesar() quedo bloqueado")
+        return resultado
+
+    def test_procesa_todas_las_imagenes(self):
+        salida = self.directorio / 'resultados.csv'
+        resultado = self._procesar(PipelineDirectorio(self.analyzer, tamano_lote=4), salida)
+
+        self.assertNotIn('error', resultado)
+        self.assertEqual(resultado['resumen']['procesadas'], 24)
+        lineas = salida.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lineas) - 1, resultado['resumen']['detecciones'])
+
+    def test_error_de_escritura_no_bloquea(self):
+        pipeline = PipelineDirectorio(self.analyzer, tamano_lote=2, tamano_cola=2, hilos_escritura=2)
+
+        with mock.patch.object(EscritorDetecciones, 'escribir', side_effect=OSError("disco lleno")):
+            resultado = self._procesar(pipeline, self.directorio / 'resultados.csv')
+
+        self.assertIsInstance(resultado.get('error'), OSError)
+
+
+if __name__ == '__main__':
+    unittest.main()
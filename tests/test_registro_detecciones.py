@@ -0,0 +1,102 @@
+"""
+Pruebas del registro CSV asincrono
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import csv
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from registro_detecciones import COLUMNAS_LOG, RegistroCSVAsincrono  # noqa: E402
+
+
+class HistorialLento:
+    """Historial en memoria cuya escritura tarda, para agrandar las ventanas de carrera"""
+
+    def __init__(self, espera_s: float = 0.005):
+        self.espera_s = espera_s
+        self.filas = []
+        self.rangos = []
+
+    def agregar(self, filas, rango_csv=None):
+        time.sleep(self.espera_s)
+        self.filas.extend(filas)
+        self.rangos.append(rango_csv)
+
+
+class TestRegistroCSVAsincrono(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        self.ruta = self.directorio / 'jersey_log.csv'
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _leer_csv(self):
+        with open(self.ruta, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def test_cerrar_escribe_pendientes(self):
+        registro = RegistroCSVAsincrono(self.ruta, max_filas=1000, intervalo_s=60)
+        registro.agregar([('t', '23', '0.9', 'a.jpg'), ('t', '7', '0.5', 'b.jpg')])
+        registro.cerrar()
+
+        filas = self._leer_csv()
+        self.assertEqual(filas[0], COLUMNAS_LOG)
+        self.assertEqual([f[1] for f in filas[1:]], ['23', '7'])
+
+    def test_orden_con_vaciados_concurrentes(self):
+        historial = HistorialLento()
+        registro = RegistroCSVAsincrono(self.ruta, max_filas=5, intervalo_s=0.001, historial=historial)
+        terminado = threading.Event()
+
+        def vaciar_repetido():
+            while not terminado.is_set():
+                registro.vaciar()
+
+        vaciadores = [threading.Thread(target=vaciar_repetido) for _ in range(6)]
+        for hilo in vaciadores:
+            hilo.start()
+
+        for i in range(0, 600, 3):
+            registro.agregar([('t', str(j), '0.5', 'x.jpg') for j in range(i, i + 3)])
+            if i % 30 == 0:
+                time.sleep(0.001)
+
+        terminado.set()
+        for hilo in vaciadores:
+            hilo.join()
+        registro.cerrar()
+
+        esperado = [str(i) for i in range(600)]
+        self.assertEqual([f[1] for f in self._leer_csv()[1:]], esperado)
+        self.assertEqual([f[1] for f in historial.filas], esperado)
+
+        # Los rangos de bytes registrados son contiguos y crecientes
+        rangos = [r for r in historial.rangos if r is not None]
+        for anterior, siguiente in zip(rangos, rangos[1:]):
+            self.assertEqual(anterior[2], siguiente[1])
+
+    def test_sin_csv_solo_historial(self):
+        historial = HistorialLento(espera_s=0)
+        registro = RegistroCSVAsincrono(self.ruta, historial=historial, escribir_csv=False)
+        registro.agregar([('t', '11', '0.8', 'c.jpg')])
+        registro.cerrar()
+
+        self.assertFalse(self.ruta.exists())
+        self.assertEqual(historial.filas, [('t', '11', '0.8', 'c.jpg')])
+        self.assertEqual(historial.rangos, [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
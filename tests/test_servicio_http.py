@@ -0,0 +1,198 @@
+"""
+Pruebas del planificador de micro-lotes y del servicio HTTP con el backend sintetico
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cv2  # noqa: E402
+
+from backends import BackendSintetico  # noqa: E402
+from basketball_jersey_analyzer import JerseyAnalyzer  # noqa: E402
+from servicio_http import (  # noqa: E402
+    ColaLlena,
+    PlanificadorLotes,
+    SolicitudDemasiadoGrande,
+    crear_servidor
+)
+
+
+class BackendRetenido(BackendSintetico):
+    """Backend sintetico que no responde hasta que se libera `paso`"""
+
+    def __init__(self, **opciones):
+        super().__init__(**opciones)
+        self.paso = threading.Event()
+        self.en_curso = threading.Event()
+        self.tamanos_lote = []
+
+    def infer(self, imagenes, confidence: float = 0.4):
+        self.tamanos_lote.append(1 if isinstance(imagenes, np.ndarray) else len(imagenes))
+        self.en_curso.set()
+        self.paso.wait(10)
+        return super().infer(imagenes, confidence)
+
+
+def _imagenes(n):
+    generador = np.random.default_rng(2)
+    return [generador.integers(0, 255, (96, 128, 3), dtype=np.uint8) for _ in range(n)]
+
+
+class _ConAnalizador(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = Path(tempfile.mkdtemp())
+        # El analizador escribe jersey_log.csv en el directorio actual
+        self.cwd = os.getcwd()
+        os.chdir(self.directorio)
+        self.backend = BackendRetenido(detecciones_por_imagen=4)
+        self.analyzer = JerseyAnalyzer(backend=self.backend, calentamiento=0)
+        self.backend.tamanos_lote.clear()
+
+    def tearDown(self):
+        self.backend.paso.set()
+        self.analyzer.cerrar()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+class TestPlanificadorLotes(_ConAnalizador):
+
+    def test_agrupa_solicitudes_concurrentes(self):
+        planificador = PlanificadorLotes(self.analyzer, lote_max=4, espera_max_s=0.5, tamano_cola=16)
+        imagenes = _imagenes(4)
+        resultados = [None] * 4
+
+        def detectar(i):
+            resultados[i] = planificador.detectar([imagenes[i]], 0.3)[0]
+
+        self.backend.paso.set()
+        hilos = [threading.Thread(target=detectar, args=(i,)) for i in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(10)
+        planificador.cerrar()
+
+        self.assertEqual(self.backend.tamanos_lote, [4])
+        self.assertEqual(planificador.estadisticas()['lotes'], 1)
+        for imagen, detecciones in zip(imagenes, resultados):
+            esperado = self.analyzer.inferir_crudo(imagen).filtrar(0.3)
+            self.assertTrue(np.array_equal(detecciones.datos, esperado.datos))
+
+    def test_respeta_lote_max(self):
+        planificador = PlanificadorLotes(self.analyzer, lote_max=3, espera_max_s=0.01, tamano_cola=16)
+        self.backend.paso.set()
+
+        resultados = planificador.detectar(_imagenes(7), 0.1)
+        planificador.cerrar()
+
+        self.assertEqual(len(resultados), 7)
+        self.assertEqual(sum(self.backend.tamanos_lote), 7)
+        self.assertLessEqual(max(self.backend.tamanos_lote), 3)
+
+    def test_cola_llena_rechaza(self):
+        planificador = PlanificadorLotes(self.analyzer, lote_max=2, espera_max_s=0, tamano_cola=2)
+        imagenes = _imagenes(5)
+
+        # Primer lote retenido en el modelo; el segundo llena la cola
+        en_modelo = planificador.enviar(imagenes[:2])
+        self.assertTrue(self.backend.en_curso.wait(5))
+        en_cola = planificador.enviar(imagenes[2:4])
+
+        with self.assertRaises(ColaLlena):
+            planificador.enviar(imagenes[4:])
+        with self.assertRaises(SolicitudDemasiadoGrande):
+            planificador.enviar(_imagenes(3))
+        self.assertEqual(planificador.estadisticas()['rechazadas'], 1)
+
+        self.backend.paso.set()
+        for futuro in en_modelo + en_cola:
+            futuro.result(10)
+        planificador.cerrar()
+
+
+class TestServicioHTTP(_ConAnalizador):
+
+    def setUp(self):
+        super().setUp()
+        self.backend.paso.set()
+        self.planificador = PlanificadorLotes(self.analyzer, lote_max=4, espera_max_s=0.005, tamano_cola=4)
+        self.servidor = crear_servidor(self.planificador, '127.0.0.1', 0)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/detectar"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+        ok, codificada = cv2.imencode('.png', _imagenes(1)[0])
+        self.png = codificada.tobytes()
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.planificador.cerrar()
+        super().tearDown()
+
+    def _post(self, cuerpo: bytes, tipo: str, consulta: str = ''):
+        solicitud = urllib.request.Request(
+            self.url + consulta, data=cuerpo, headers={'Content-Type': tipo}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(solicitud, timeout=10) as respuesta:
+                return respuesta.status, json.loads(respuesta.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def _post_lote(self, imagenes, **campos):
+        cuerpo = json.dumps(dict(campos, imagenes=imagenes)).encode('utf-8')
+        return self._post(cuerpo, 'application/json')
+
+    def test_imagen_individual(self):
+        estado, datos = self._post(self.png, 'image/png', '?confianza=0.2')
+        self.assertEqual(estado, 200)
+        self.assertIn('detecciones', datos)
+
+    def test_lote(self):
+        imagen = base64.b64encode(self.png).decode('ascii')
+        estado, datos = self._post_lote([imagen, imagen], confianza=0.3)
+        self.assertEqual(estado, 200)
+        self.assertEqual(len(datos['resultados']), 2)
+
+    def test_confianza_fuera_de_rango(self):
+        for valor in ('nan', 'inf', '-inf', '-1', '5', 'x'):
+            estado, _ = self._post(self.png, 'image/png', f'?confianza={valor}')
+            self.assertEqual(estado, 400, valor)
+
+        imagen = base64.b64encode(self.png).decode('ascii')
+        for valor in ('NaN', 'Infinity', -0.5, 1.5):
+            estado, _ = self._post_lote([imagen], confianza=valor)
+            self.assertEqual(estado, 400, valor)
+
+        for valor in ('0', '1'):
+            estado, _ = self._post(self.png, 'image/png', f'?confianza={valor}')
+            self.assertEqual(estado, 200, valor)
+
+    def test_solicitudes_invalidas(self):
+        self.assertEqual(self._post(b'[1, 2]', 'application/json')[0], 400)
+        self.assertEqual(self._post(b'no es una imagen', 'image/png')[0], 400)
+
+        imagen = base64.b64encode(self.png).decode('ascii')
+        self.assertEqual(self._post_lote([imagen] * 5)[0], 413)
+
+
+if __name__ == '__main__':
+    unittest.main()